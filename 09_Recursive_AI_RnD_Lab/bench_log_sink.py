@@ -0,0 +1,106 @@
+import time
+import queue
+import logging
+import argparse
+import datetime
+import threading
+
+from broadcast import BroadcastRing
+from log_sink import RingLogHandler
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class DropOldestQueueHandler(logging.Handler):
+    """The previous dashboard handler: format eagerly, then put/get/put on overflow."""
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+            entry = {"timestamp": datetime.datetime.now().isoformat(), "level": record.levelname, "message": msg}
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(entry)
+                except (queue.Empty, queue.Full):
+                    pass
+        except Exception:
+            self.handleError(record)
+
+
+def _producer(logger, records, pause, start):
+    start.wait()
+    for i in range(records):
+        logger.info("step %d loss=%.4f", i, 1.0 / (i + 1))
+        if pause:
+            time.sleep(pause)
+
+
+def _reader(handler, stop):
+    """A dashboard client polling the handler like the /logs page and stream do."""
+    while not stop.is_set():
+        if isinstance(handler, RingLogHandler):
+            handler.entries(limit=100)
+        else:
+            list(handler.queue.queue)[-100:]
+        time.sleep(0.01)
+
+
+def bench(handler, training_threads, request_threads, records, readers):
+    """Records/sec with one metrics thread, training output threads and request threads logging at once."""
+    handler.setFormatter(logging.Formatter(FORMAT))
+    roles = [("metrics", records // 10, 0.0005)]
+    roles += [(f"training.{i}", records, 0.0) for i in range(training_threads)]
+    roles += [(f"request.{i}", records // 2, 0.0) for i in range(request_threads)]
+
+    start = threading.Event()
+    stop = threading.Event()
+    threads, total = [], 0
+    for name, count, pause in roles:
+        logger = logging.getLogger(f"bench_log_sink.{type(handler).__name__}.{name}")
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        threads.append(threading.Thread(target=_producer, args=(logger, count, pause, start)))
+        total += count
+    reader_threads = [threading.Thread(target=_reader, args=(handler, stop)) for _ in range(readers)]
+
+    for t in threads + reader_threads:
+        t.start()
+    began = time.perf_counter()
+    start.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - began
+    stop.set()
+    for t in reader_threads:
+        t.join()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ring-buffer log sink against the drop-oldest queue handler")
+    parser.add_argument("--records", type=int, default=20000, help="records per training thread")
+    parser.add_argument("--training-threads", type=int, default=2)
+    parser.add_argument("--request-threads", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2, help="concurrent dashboard readers")
+    parser.add_argument("--capacity", type=int, default=1000)
+    args = parser.parse_args()
+
+    ring = RingLogHandler(BroadcastRing(args.capacity))
+    old = bench(DropOldestQueueHandler(args.capacity), args.training_threads, args.request_threads,
+                args.records, args.readers)
+    new = bench(ring, args.training_threads, args.request_threads, args.records, args.readers)
+
+    print(f"drop-oldest queue: {old:10.0f} records/s")
+    print(f"ring buffer sink:  {new:10.0f} records/s ({new / old:.1f}x, {ring.dropped} overwritten)")
+
+
+if __name__ == "__main__":
+    main()
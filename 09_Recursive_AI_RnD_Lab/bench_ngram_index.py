@@ -0,0 +1,67 @@
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+from ngram_index import NgramIndex
+from strategy_index import DEFAULT_LIBRARY, FIELD_WEIGHTS
+
+QUERIES = [
+    "I keep referring back to myself and cannot get out",
+    "A depends on B and B depends on A",
+    "the goal and the limit contradict each other",
+    "it keeps recursing without getting anywhere",
+    "we assumed two things that cannot both hold",
+    "the question answers itself in a circle",
+]
+
+
+def library_texts(size, rng):
+    """The strategy library, padded with shuffled variants of its entries up to `size`."""
+    with open(DEFAULT_LIBRARY, "r", encoding="utf-8") as f:
+        entries = [" ".join(str(e.get(field, "")) for field in FIELD_WEIGHTS) for e in json.load(f)]
+    texts = list(entries)
+    words = " ".join(entries).split()
+    while len(texts) < size:
+        base = rng.choice(entries).split()
+        rng.shuffle(base)
+        texts.append(" ".join(base[:20] + [rng.choice(words) for _ in range(10)]))
+    return texts
+
+
+def bench(fn, seconds):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        count += fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queries/sec of the character n-gram similarity index")
+    parser.add_argument("--sizes", default="9,1000,20000", help="library sizes to test")
+    parser.add_argument("--batch", type=int, default=64, help="queries per batch")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per measurement")
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    batch = [QUERIES[i % len(QUERIES)] + f" {i}" for i in range(args.batch)]
+    for size in (int(s) for s in args.sizes.split(",")):
+        texts = library_texts(size, rng)
+        start = time.perf_counter()
+        exact = NgramIndex(texts, approximate=False)
+        build = time.perf_counter() - start
+        print(f"{size} entries (built in {build * 1000:.0f} ms):")
+        variants = [("exact", exact)]
+        if size >= 1000:
+            variants.append(("approximate", NgramIndex(texts, approximate=True)))
+        for name, index in variants:
+            single = bench(lambda: len([index.search(q, args.k) for q in QUERIES]), args.seconds)
+            batched = bench(lambda: len(index.search_batch(batch, args.k)), args.seconds)
+            print(f"  {name:12s} single {single:9.0f} queries/s   batched {batched:9.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
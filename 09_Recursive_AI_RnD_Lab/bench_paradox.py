@@ -0,0 +1,85 @@
+import time
+import random
+import argparse
+import importlib.util
+from pathlib import Path
+
+PLUGIN = Path(__file__).parent / "strategy_plugins" / "handle_paradox.py"
+
+WORDS = ("the model should evaluate this candidate and return a value that is true to its training data "
+         "while keeping memory usage low during long recursive runs so every statement stays consistent").split()
+VOCAB = "alpha beta gamma delta omega sigma tau phi psi rho kappa lambda zeta theta iota".split()
+
+
+def load_plugin():
+    spec = importlib.util.spec_from_file_location("handle_paradox", PLUGIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_handle(prompt, paradoxes):
+    """The previous implementation: one substring scan per phrase, plus the liar heuristic."""
+    prompt_lower = prompt.lower()
+    for paradox in paradoxes:
+        if paradox in prompt_lower:
+            return "Paradox detected"
+    if "sentence is" in prompt_lower and ("false" in prompt_lower or "true" in prompt_lower) and "this" in prompt_lower:
+        return "Potential liar paradox detected"
+    return None
+
+
+def make_prompt(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def bench(fn, prompts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prompt in prompts:
+            fn(prompt)
+    elapsed = time.perf_counter() - start
+    total = repeat * sum(len(p) for p in prompts)
+    return total / elapsed / 1e6, repeat * len(prompts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the compiled paradox detector against per-phrase substring scans")
+    parser.add_argument("--sizes", default="1024,16384,65536", help="prompt sizes in bytes")
+    parser.add_argument("--prompts", type=int, default=50, help="prompts per size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--extra-phrases", type=int, default=300,
+                        help="synthetic phrases added for the scaling run")
+    args = parser.parse_args()
+
+    plugin = load_plugin()
+    rng = random.Random(0)
+    phrases = [p for c in plugin._detector.categories for p in c.get("phrases", [])]
+    extra = [" ".join(rng.choice(VOCAB + WORDS) for _ in range(3)) + " " + rng.choice(VOCAB)
+             for _ in range(args.extra_phrases)]
+    big_categories = plugin._detector.categories + [{"name": "synthetic", "message": "", "phrases": extra}]
+    big = plugin.ParadoxDetector(big_categories)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        prompts = [make_prompt(size, rng) for _ in range(args.prompts)]
+        runs = [
+            (f"legacy ({len(phrases)} phrases)", lambda p: legacy_handle(p, phrases)),
+            (f"compiled ({len(phrases)} phrases)", plugin.handle),
+            ("compiled scan with spans", plugin.scan),
+            (f"legacy (+{len(extra)} phrases)", lambda p: legacy_handle(p, phrases + extra)),
+            (f"compiled (+{len(extra)} phrases)", lambda p: big.detect(p, first_only=True)),
+        ]
+        print(f"{size} byte prompts:")
+        for name, fn in runs:
+            mb_per_s, per_s = bench(fn, prompts, args.repeat)
+            print(f"  {name:32s} {mb_per_s:8.1f} MB/s {per_s:10.0f} prompts/s")
+
+
+if __name__ == "__main__":
+    main()
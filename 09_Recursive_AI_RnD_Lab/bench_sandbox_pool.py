@@ -0,0 +1,59 @@
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+from sandbox_pool import SandboxPool
+
+CANDIDATE = """# AI_Main.py - benchmark candidate
+import json
+import logging
+import platform
+logger = logging.getLogger("ai_main")
+
+def main():
+    return {"status": "ok", "platform": platform.system()}
+
+if __name__ == "__main__":
+    print(json.dumps(main()))
+"""
+
+
+def bench_cold(script, cwd, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, script], capture_output=True, text=True, cwd=cwd, timeout=30)
+    return runs / (time.perf_counter() - start)
+
+
+def bench_pool(script, cwd, runs, size):
+    pool = SandboxPool(size=size)
+    try:
+        start = time.perf_counter()
+        for _ in range(runs):
+            pool.run(script, cwd=cwd, timeout=30)
+        return runs / (time.perf_counter() - start)
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare warm sandbox pool against cold subprocess execution")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        script = str(Path(cwd) / "AI_Main.py")
+        Path(script).write_text(CANDIDATE)
+        cold = bench_cold(script, cwd, args.runs)
+        warm = bench_pool(script, cwd, args.runs, args.pool_size)
+
+    print(f"cold subprocess: {cold:8.1f} candidates/s")
+    print(f"sandbox pool:    {warm:8.1f} candidates/s ({warm / cold:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
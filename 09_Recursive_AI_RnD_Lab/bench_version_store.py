@@ -0,0 +1,85 @@
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+from version_store import VersionStore
+
+
+def evolve(n_versions, lines=300, seed=0):
+    """Yield (version, code) pairs where each version changes a few lines of the last."""
+    rng = random.Random(seed)
+    code = [f"def step_{i}(x):\n    return x + {i}\n" for i in range(lines)]
+    for version in range(1, n_versions + 1):
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randrange(len(code))
+            code[i] = f"def step_{i}(x):\n    return x * {version} + {rng.randint(0, 99)}\n"
+        yield version, "".join(code)
+
+
+def dir_size(path):
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def bench_legacy(root, versions, reads):
+    start = time.perf_counter()
+    for version, code in versions:
+        (Path(root) / f"AI_Main_v{version}.py").write_text(code)
+    write_time = time.perf_counter() - start
+
+    latencies = []
+    for version in reads:
+        start = time.perf_counter()
+        (Path(root) / f"AI_Main_v{version}.py").read_text()
+        latencies.append(time.perf_counter() - start)
+    return dir_size(root), write_time, latencies
+
+
+def bench_store(root, versions, reads, snapshot_interval):
+    store = VersionStore(root, "AI_Main", snapshot_interval=snapshot_interval)
+    start = time.perf_counter()
+    for version, code in versions:
+        store.put(version, code, parent=version - 1 or None)
+    write_time = time.perf_counter() - start
+
+    # Reopen so reads start with an empty reconstruction cache
+    store = VersionStore(root, "AI_Main", snapshot_interval=snapshot_interval)
+    latencies = []
+    for version in reads:
+        start = time.perf_counter()
+        store.get(version)
+        latencies.append(time.perf_counter() - start)
+    return store.disk_usage(), write_time, latencies
+
+
+def report(name, n_versions, size, write_time, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<24} {size / 1024:>10.1f} KiB {size / n_versions:>9.0f} B/ver "
+          f"{write_time / n_versions * 1e3:>8.3f} ms/put "
+          f"{statistics.median(latencies) * 1e3:>8.3f} ms p50 {p95 * 1e3:>8.3f} ms p95")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare version store against full-copy _vN.py backups")
+    parser.add_argument("--versions", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--snapshot-interval", type=int, nargs="+", default=[1, 20, 50])
+    args = parser.parse_args()
+
+    versions = list(evolve(args.versions))
+    rng = random.Random(1)
+    reads = [rng.randint(1, args.versions) for _ in range(args.reads)]
+
+    print(f"{args.versions} versions of {len(versions[-1][1])} bytes, {args.reads} random reads")
+    with tempfile.TemporaryDirectory() as root:
+        report("legacy _vN.py", args.versions, *bench_legacy(root, versions, reads))
+    for interval in args.snapshot_interval:
+        with tempfile.TemporaryDirectory() as root:
+            report(f"store interval={interval}", args.versions, *bench_store(root, versions, reads, interval))
+
+
+if __name__ == "__main__":
+    main()
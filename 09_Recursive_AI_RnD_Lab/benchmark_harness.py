@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import math
+import shutil
+import logging
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Tuple
+
+from sandbox_pool import SandboxPool, SandboxPoolError, ResourceLimits, run_limited
+
+logger = logging.getLogger("benchmark_harness")
+
+# Runs inside the sandbox: loads the target script as a module and times main().
+# Scripts without a main() are timed by re-running the whole module.
+RUNNER_SOURCE = '''
+import io
+import sys
+import json
+import time
+import runpy
+import contextlib
+import importlib.util
+
+target, warmup, iterations = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+sys.path.insert(0, __import__("os").path.dirname(target))
+sink = io.StringIO()
+with contextlib.redirect_stdout(sink):
+    spec = importlib.util.spec_from_file_location("benchmarked_main", target)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+entry = getattr(module, "main", None)
+if not callable(entry):
+    entry = lambda: runpy.run_path(target, run_name="__benchmark__")
+
+timings = []
+with contextlib.redirect_stdout(sink):
+    for i in range(warmup + iterations):
+        sink.seek(0)
+        sink.truncate()
+        start = time.perf_counter()
+        entry()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+print(json.dumps({"timings": timings}))
+'''
+
+
+@dataclass
+class BenchmarkResult:
+    """Latency and memory figures for one benchmarked version."""
+    iterations: int = 0
+    warmup: int = 0
+    median: float = 0.0
+    p95: float = 0.0
+    mean: float = 0.0
+    peak_rss_mb: float = 0.0
+    timings: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.timings)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BenchmarkResult":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = min(max(1, math.ceil(fraction * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+
+class BenchmarkHarness:
+    """
+    Benchmark an AI_Main.py version by timing its main() in the sandbox.
+
+    The script is loaded once per run, `warmup` calls are discarded and the
+    next `iterations` calls are timed. Peak memory is the RSS high-water mark
+    reported by the sandbox for the whole run.
+    """
+
+    def __init__(self,
+                 sandbox_pool: Optional[SandboxPool] = None,
+                 limits: Optional[ResourceLimits] = None,
+                 warmup: int = 2,
+                 iterations: int = 10,
+                 timeout: float = 60):
+        """
+        Initialize the harness.
+
+        Args:
+            sandbox_pool: Warm workers to run in; a cold limited subprocess is used without one
+            limits: Resource limits for each benchmark run
+            warmup: Untimed calls before measuring
+            iterations: Timed calls
+            timeout: Seconds allowed for the whole run
+        """
+        self.sandbox_pool = sandbox_pool
+        self.limits = limits or ResourceLimits()
+        self.warmup = warmup
+        self.iterations = iterations
+        self.timeout = timeout
+
+    def run(self, script_path: str) -> BenchmarkResult:
+        """Benchmark a script; failures are reported in `BenchmarkResult.error`."""
+        script_path = os.path.abspath(script_path)
+        result = BenchmarkResult(iterations=self.iterations, warmup=self.warmup)
+        workdir = tempfile.mkdtemp(prefix="bench_")
+        try:
+            runner = Path(workdir) / "bench_runner.py"
+            runner.write_text(RUNNER_SOURCE)
+            args = [str(runner), script_path, str(self.warmup), str(self.iterations)]
+            completed = self._spawn(args, os.path.dirname(script_path))
+        except subprocess.TimeoutExpired:
+            result.error = f"Benchmark timed out after {self.timeout}s"
+            return result
+        except (SandboxPoolError, OSError) as e:
+            result.error = str(e)
+            return result
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        result.peak_rss_mb = completed.usage.get("peak_rss_mb", 0.0)
+        if completed.returncode != 0:
+            result.error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else \
+                f"Exited with code {completed.returncode}"
+            return result
+        try:
+            result.timings = json.loads(completed.stdout.strip().splitlines()[-1])["timings"]
+        except (IndexError, KeyError, json.JSONDecodeError):
+            result.error = "Benchmark runner produced no timings"
+            return result
+
+        if result.timings:
+            result.median = statistics.median(result.timings)
+            result.mean = statistics.fmean(result.timings)
+            result.p95 = percentile(result.timings, 0.95)
+        return result
+
+    def _spawn(self, args: List[str], cwd: str) -> subprocess.CompletedProcess:
+        if self.sandbox_pool is not None:
+            try:
+                # The pool runs a script path; arguments go through sys.argv
+                return self.sandbox_pool.run(args[0], cwd=cwd, timeout=self.timeout,
+                                             limits=self.limits, argv=args)
+            except SandboxPoolError as e:
+                logger.warning(f"Sandbox pool failed ({e}), benchmarking in a cold subprocess")
+        return run_limited([sys.executable] + args, cwd=cwd, timeout=self.timeout, limits=self.limits)
+
+
+def check_regression(candidate: BenchmarkResult,
+                     baseline: Optional[BenchmarkResult],
+                     latency_threshold: float = 0.10,
+                     memory_threshold: float = 0.25,
+                     latency_floor: float = 0.001,
+                     memory_floor_mb: float = 4.0) -> Tuple[bool, str]:
+    """
+    Decide whether a candidate regressed against its parent.
+
+    Increases smaller than the floors are treated as noise, so sub-millisecond
+    scripts are not rejected for timer jitter.
+
+    Args:
+        candidate: Benchmark of the candidate
+        baseline: Benchmark of the parent version, if one exists
+        latency_threshold: Allowed relative increase in median and p95 latency
+        memory_threshold: Allowed relative increase in peak RSS
+        latency_floor: Absolute latency increase (seconds) always allowed
+        memory_floor_mb: Absolute peak RSS increase (MB) always allowed
+
+    Returns:
+        Tuple of (acceptable, reason)
+    """
+    if not candidate.ok:
+        return False, f"benchmark failed: {candidate.error}"
+    if baseline is None or not baseline.ok:
+        return True, "no baseline benchmark"
+
+    checks = [
+        ("median latency", candidate.median, baseline.median, latency_threshold, latency_floor),
+        ("p95 latency", candidate.p95, baseline.p95, latency_threshold, latency_floor),
+        ("peak RSS", candidate.peak_rss_mb, baseline.peak_rss_mb, memory_threshold, memory_floor_mb),
+    ]
+    for name, new, old, threshold, floor in checks:
+        if old > 0 and new > old * (1 + threshold) and new - old > floor:
+            return False, f"{name} regressed {(new / old - 1) * 100:.1f}% (limit {threshold * 100:.0f}%)"
+    return True, (f"median {candidate.median * 1e3:.3f} ms vs {baseline.median * 1e3:.3f} ms, "
+                  f"peak RSS {candidate.peak_rss_mb:.1f} MB vs {baseline.peak_rss_mb:.1f} MB")
@@ -0,0 +1,118 @@
+import itertools
+import threading
+from typing import List, Any, Optional, Tuple
+
+
+class BroadcastRing:
+    """
+    Fixed-size broadcast buffer read by any number of independent cursors.
+
+    Every published item gets a monotonically increasing sequence number and
+    overwrites the oldest slot, so publishing never blocks and never waits
+    for readers. A reader keeps its own cursor (the next sequence number it
+    wants); if it falls more than `capacity` items behind, the overwritten
+    items are skipped and reported as dropped.
+
+    Publishers take a short lock around the sequence number, the slot store
+    and the `next_seq` update, so concurrent publishers can neither move
+    `next_seq` backwards nor let a stalled older item overwrite a newer one
+    in the same slot. Readers take no lock: each slot holds `(seq, item)`,
+    so they can tell a slot that is not written yet from one that was
+    already overwritten. The condition variable is only touched when a
+    reader is actually waiting.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._items: List[Optional[Tuple[int, Any]]] = [None] * capacity
+        self._counter = itertools.count()
+        self._next = 0  # one past the highest sequence number written so far
+        self._publish_lock = threading.Lock()
+        self._waiting = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def publish(self, item: Any) -> int:
+        """Append an item and wake waiting readers; returns its sequence number."""
+        with self._publish_lock:
+            seq = next(self._counter)
+            self._items[seq % self.capacity] = (seq, item)
+            self._next = seq + 1
+        if self._waiting:
+            with self._cond:
+                self._cond.notify_all()
+        return seq
+
+    @property
+    def next_seq(self) -> int:
+        return self._next
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self._next - self.capacity)
+
+    @property
+    def dropped(self) -> int:
+        """Items overwritten before the slowest possible reader could see them."""
+        return self.oldest_seq
+
+    def __len__(self) -> int:
+        return self._next - self.oldest_seq
+
+    def _published(self, seq: int) -> bool:
+        """Whether `seq` has been written (a later item in its slot means it was, then overwritten)."""
+        slot = self._items[seq % self.capacity]
+        return slot is not None and slot[0] >= seq
+
+    def _collect(self, cursor: int, max_items: int) -> Tuple[List[Tuple[int, Any]], int, int]:
+        oldest = self.oldest_seq
+        dropped = max(0, oldest - cursor)
+        cursor = max(cursor, oldest)
+        items: List[Tuple[int, Any]] = []
+        while len(items) < max_items:
+            slot = self._items[cursor % self.capacity]
+            if slot is None or slot[0] < cursor:
+                break  # not published yet (or its publisher is mid-write)
+            seq, item = slot
+            if seq > cursor:
+                # Overwritten while we were reading; resume at the oldest survivor
+                survivor = seq - self.capacity + 1
+                dropped += survivor - cursor
+                cursor = survivor
+                continue
+            items.append(slot)
+            cursor += 1
+        return items, cursor, dropped
+
+    def read(self, cursor: int, max_items: int = 256,
+             timeout: Optional[float] = None) -> Tuple[List[Tuple[int, Any]], int, int]:
+        """
+        Return items published at or after `cursor`.
+
+        Args:
+            cursor: Next sequence number the reader wants (use `next_seq` to
+                start from now, `oldest_seq` to replay what is buffered)
+            max_items: Maximum number of items to return
+            timeout: Seconds to wait for new items if none are available
+                (None waits indefinitely, 0 returns immediately)
+
+        Returns:
+            Tuple of ([(seq, item), ...], new_cursor, dropped_count)
+        """
+        if cursor > self._next and not self._published(cursor - 1):
+            cursor = self._next  # a cursor from before a restart starts from now
+        if not self._published(cursor) and timeout != 0:
+            with self._cond:
+                # Register as a waiter before re-checking, so a publish that
+                # misses the counter has already filled the slot we check
+                self._waiting += 1
+                try:
+                    self._cond.wait_for(lambda: self._published(cursor), timeout=timeout)
+                finally:
+                    self._waiting -= 1
+        return self._collect(cursor, max_items)
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Any]:
+        """Return the buffered items, oldest first (at most the last `limit`)."""
+        start = self.oldest_seq if limit is None else max(self.oldest_seq, self._next - limit)
+        items, _, _ = self._collect(start, self._next - start)
+        return [item for _, item in items]
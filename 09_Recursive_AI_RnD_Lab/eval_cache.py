@@ -0,0 +1,175 @@
+import json
+import time
+import sqlite3
+import logging
+import itertools
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("eval_cache")
+
+
+@dataclass
+class CachedEvaluation:
+    """Stored outcome of validating and (optionally) executing one piece of code."""
+    code_hash: str
+    valid: bool
+    success: Optional[bool] = None  # None until the code has been executed
+    result: Dict[str, Any] = field(default_factory=dict)
+    runtime: Optional[float] = None
+    score: Optional[float] = None
+    created: float = 0.0
+    last_used: float = 0.0
+
+    @property
+    def executed(self) -> bool:
+        return self.success is not None
+
+
+class EvaluationCache:
+    """
+    Persistent cache of evaluation results keyed by code hash.
+
+    Entries live in a SQLite database so they survive restarts. Entries older
+    than `ttl` seconds are treated as misses, and the least recently used
+    entries are evicted once more than `max_entries` are stored.
+
+    The entry count is kept in memory and `generation` changes whenever the
+    stored entries do, so `stats()` and change checks need no query.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 7 * 24 * 3600):
+        """
+        Open (or create) an evaluation cache.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached evaluations
+            ttl: Seconds after which an entry expires (0 disables expiry)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._generations = itertools.count(1)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                code_hash TEXT PRIMARY KEY,
+                valid INTEGER NOT NULL,
+                success INTEGER,
+                result TEXT,
+                runtime REAL,
+                score REAL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS evaluations_last_used ON evaluations (last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def get(self, code_hash: str, executed_only: bool = False, count: bool = True) -> Optional[CachedEvaluation]:
+        """
+        Look up an evaluation, counting a hit or miss.
+
+        Args:
+            code_hash: Hash of the code
+            executed_only: Treat entries that only record a compile result as misses
+            count: Count the lookup in `hits`/`misses` (off for repeat lookups of the same code)
+
+        Returns:
+            The cached evaluation, or None if absent or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT valid, success, result, runtime, score, created FROM evaluations WHERE code_hash = ?",
+                (code_hash,)).fetchone()
+            if row is not None and self.ttl and now - row[5] > self.ttl:
+                self._conn.execute("DELETE FROM evaluations WHERE code_hash = ?", (code_hash,))
+                self._conn.commit()
+                self._entries -= 1
+                self.generation = next(self._generations)
+                row = None
+            if row is None or (executed_only and row[1] is None):
+                self.misses += count
+                return None
+
+            self.hits += count
+            self._conn.execute("UPDATE evaluations SET last_used = ? WHERE code_hash = ?", (now, code_hash))
+            self._conn.commit()
+
+        valid, success, result, runtime, score, created = row
+        return CachedEvaluation(
+            code_hash=code_hash,
+            valid=bool(valid),
+            success=None if success is None else bool(success),
+            result=json.loads(result) if result else {},
+            runtime=runtime,
+            score=score,
+            created=created,
+            last_used=now
+        )
+
+    def put(self,
+            code_hash: str,
+            valid: bool,
+            success: Optional[bool] = None,
+            result: Optional[Dict[str, Any]] = None,
+            runtime: Optional[float] = None,
+            score: Optional[float] = None) -> None:
+        """Store (or replace) the evaluation for a code hash."""
+        now = time.time()
+        try:
+            result_json = json.dumps(result) if result is not None else None
+        except (TypeError, ValueError):
+            result_json = json.dumps({"stdout": str(result)})
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (code_hash, int(valid), None if success is None else int(success),
+                 result_json, runtime, score, now, now))
+            self._evict()
+            self._conn.commit()
+
+    def update_score(self, code_hash: str, score: float) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE evaluations SET score = ? WHERE code_hash = ?", (score, code_hash))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if self.ttl:
+            self._conn.execute("DELETE FROM evaluations WHERE created < ?", (time.time() - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM evaluations WHERE code_hash IN "
+                "(SELECT code_hash FROM evaluations ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+            count = self.max_entries
+        self._entries = count
+        self.generation = next(self._generations)
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for display."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self)
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,468 @@
+import sys
+import time
+import hashlib
+import uuid
+import queue
+import signal
+import logging
+import argparse
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+from process_registry import ProcessRegistry, default_registry
+
+logger = logging.getLogger("evolution_scheduler")
+
+STAGES = ("generate", "validate", "execute", "promote")
+DEFAULT_WORKERS = {"generate": 2, "validate": 2, "execute": 2, "promote": 1}
+
+# Sentinel telling the dispatcher to exit
+_STOP = object()
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised when a job is refused because of backpressure or the hourly rate limit."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class EvolutionJob:
+    """One evolution cycle: generate candidates, validate, execute and promote the best."""
+    id: str
+    num_candidates: int
+    status: str = "queued"  # queued, running, succeeded, failed, cancelled
+    stage: str = "queued"
+    message: str = ""
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    version: Optional[int] = None
+    current_code: str = ""
+    parent_hash: str = ""  # md5 of current_code; promotion is refused once the main script moved on
+    candidates: List[Any] = field(default_factory=list)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    cancel_requested: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_requested.is_set()
+
+    def to_dict(self, include_results: bool = False, registry: Optional[ProcessRegistry] = None) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "message": self.message,
+            "num_candidates": self.num_candidates,
+            "candidates_done": len(self.candidates),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "version": self.version,
+            "cancel_requested": self.cancelled
+        }
+        if registry is not None:
+            data["resources"] = registry.job_usage(self.id)
+        if include_results:
+            data["candidates"] = [{
+                "index": c.index,
+                "valid": c.valid,
+                "success": c.success,
+                "score": c.score if c.score != float("-inf") else None,
+                "runtime": c.runtime,
+                "cached": c.cached,
+                "result": c.result
+            } for c in sorted(self.candidates, key=lambda c: c.index)]
+        return data
+
+
+class HourlyRateLimiter:
+    """Sliding one-hour window allowing at most `max_per_hour` events (0 disables the limit)."""
+
+    def __init__(self, max_per_hour: int, window: float = 3600.0):
+        self.max_per_hour = max_per_hour
+        self.window = window
+        self._events: deque = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """
+        Record an event if the limit allows it.
+
+        Returns:
+            Tuple of (allowed, seconds_until_next_slot)
+        """
+        if not self.max_per_hour:
+            return True, 0.0
+        now = time.monotonic()
+        with self._lock:
+            while self._events and now - self._events[0] >= self.window:
+                self._events.popleft()
+            if len(self._events) >= self.max_per_hour:
+                return False, self.window - (now - self._events[0])
+            self._events.append(now)
+            return True, 0.0
+
+
+class EvolutionScheduler:
+    """
+    Long-running evolution pipeline with one worker pool per stage.
+
+    A job fans out into `num_candidates` work items that flow through bounded
+    generate → validate → execute queues; the single promotion worker collects
+    a job's candidates and promotes the best one. Backpressure comes from three
+    places: new jobs are refused once `max_pending_jobs` are in the system,
+    stage queues are bounded so upstream workers block when downstream is
+    behind, and generate/execute workers hold off while the model client or
+    sandbox pool report they are saturated.
+    """
+
+    def __init__(self,
+                 ai_system: Any,
+                 config: Optional[Dict[str, Any]] = None,
+                 registry: Optional[ProcessRegistry] = None):
+        """
+        Initialize the scheduler (call `start` to launch its workers).
+
+        Args:
+            ai_system: SelfModifyingAI instance doing the actual work
+            config: Configuration dict; defaults to the AI system's config
+            registry: Process registry that attributes spawned processes to jobs
+        """
+        self.ai = ai_system
+        self.registry = registry or default_registry
+        config = config if config is not None else getattr(ai_system, "config", {})
+        self.workers = dict(DEFAULT_WORKERS, **config.get("scheduler_workers", {}))
+        self.max_pending_jobs = config.get("scheduler_max_pending_jobs", 8)
+        self.continuous = config.get("scheduler_continuous", False)
+        self.interval = config.get("scheduler_interval", 300)
+        self.drain_timeout = config.get("scheduler_drain_timeout", 120)
+        self.default_candidates = config.get("candidates_per_cycle", 1)
+        self.rate_limiter = HourlyRateLimiter(config.get("scheduler_max_jobs_per_hour", 30))
+        self.job_history = config.get("scheduler_job_history", 200)
+
+        queue_size = config.get("scheduler_queue_size", 16)
+        self._queues: Dict[str, queue.Queue] = {stage: queue.Queue(maxsize=queue_size) for stage in STAGES}
+        self._intake: queue.Queue = queue.Queue()
+        self._jobs: Dict[str, EvolutionJob] = {}
+        self._jobs_lock = threading.Lock()
+        self._active = 0
+        self._idle = threading.Condition(self._jobs_lock)
+        self._threads: List[threading.Thread] = []
+        self._accepting = False
+        self._stopping = threading.Event()
+        self.stats = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0, "cancelled": 0,
+                      "backpressure_waits": 0}
+        # Changes whenever a job is added or changes stage, so callers can cache job listings.
+        # Each change stores a fresh value from the counter, so no update can go unnoticed.
+        self._generations = itertools.count(1)
+        self.generation = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> "EvolutionScheduler":
+        """Start the stage workers (and the continuous loop if enabled)."""
+        if self._threads:
+            return self
+        self._accepting = True
+        self._spawn("dispatch", self._dispatch_loop)
+        # Promotion stays single-threaded so versions are assigned in order
+        self.workers["promote"] = 1
+        for stage in STAGES:
+            for i in range(max(1, self.workers[stage])):
+                self._spawn(f"{stage}-{i}", self._stage_loop, stage)
+        if self.continuous:
+            self._spawn("continuous", self._continuous_loop)
+        logger.info(f"Evolution scheduler started with workers {self.workers}")
+        return self
+
+    def _spawn(self, name: str, target, *args) -> None:
+        thread = threading.Thread(target=target, args=args, name=f"evolution-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Stop accepting jobs and stop the workers.
+
+        Args:
+            drain: Wait for queued and running jobs to finish first
+            timeout: Seconds to wait for the drain (defaults to `scheduler_drain_timeout`)
+
+        Returns:
+            True if every job finished before the workers were stopped
+        """
+        self._accepting = False
+        drained = self.wait_idle(self.drain_timeout if timeout is None else timeout) if drain else False
+        if not drained:
+            logger.warning(f"Stopping scheduler with {self._active} job(s) unfinished")
+        # Stage workers poll `_stopping`; the dispatcher blocks on the intake queue
+        self._stopping.set()
+        self._intake.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+        logger.info("Evolution scheduler stopped")
+        return drained
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no job is queued or running; return False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, num_candidates: Optional[int] = None) -> EvolutionJob:
+        """
+        Queue an evolution job.
+
+        Raises:
+            SchedulerBusy: If the scheduler is shutting down, has too many
+                pending jobs, or the hourly rate limit is exhausted
+        """
+        if not self._accepting:
+            raise SchedulerBusy("Scheduler is not accepting jobs")
+        with self._jobs_lock:
+            if self._active >= self.max_pending_jobs:
+                self.stats["rejected"] += 1
+                raise SchedulerBusy(f"{self._active} jobs already pending", retry_after=5.0)
+            allowed, retry_after = self.rate_limiter.try_acquire()
+            if not allowed:
+                self.stats["rejected"] += 1
+                raise SchedulerBusy("Hourly evolution limit reached", retry_after=retry_after)
+            job = EvolutionJob(id=uuid.uuid4().hex[:12], num_candidates=max(1, num_candidates or self.default_candidates))
+            self._jobs[job.id] = job
+            self._active += 1
+            self.stats["submitted"] += 1
+        self._touch()
+        self._intake.put(job)
+        logger.info(f"Queued evolution job {job.id} ({job.num_candidates} candidates)")
+        return job
+
+    def get(self, job_id: str) -> Optional[EvolutionJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation of a queued or running job.
+
+        Work already started (e.g. a model call in flight) finishes, but the
+        job's remaining candidates are skipped and nothing is promoted.
+
+        Returns:
+            True if the job exists and had not finished yet
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.done.is_set():
+            return False
+        job.cancel_requested.set()
+        logger.info(f"Cancellation requested for evolution job {job_id}")
+        return True
+
+    def jobs(self) -> List[EvolutionJob]:
+        """Return known jobs, newest first."""
+        with self._jobs_lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created, reverse=True)
+
+    def status(self) -> Dict[str, Any]:
+        """Queue depths, saturation flags and counters for display."""
+        return {
+            "accepting": self._accepting,
+            "active_jobs": self._active,
+            "queues": {stage: q.qsize() for stage, q in self._queues.items()},
+            "model_saturated": self._model_saturated(),
+            "sandbox_saturated": self._sandbox_saturated(),
+            **self.stats
+        }
+
+    def _touch(self) -> None:
+        self.generation = next(self._generations)
+
+    def _finish(self, job: EvolutionJob, success: bool, message: str, status: Optional[str] = None) -> None:
+        job.status = status or ("succeeded" if success else "failed")
+        job.stage = "done"
+        job.message = message
+        job.finished = time.time()
+        if success:
+            job.version = getattr(self.ai, "version", None)
+        job.current_code = ""
+        with self._jobs_lock:
+            self.stats[job.status] += 1
+            self._active -= 1
+            self._idle.notify_all()
+            self._trim_history()
+        self._touch()
+        job.done.set()
+        logger.info(f"Evolution job {job.id} {job.status}: {message}")
+
+    def _trim_history(self) -> None:
+        """Forget the oldest finished jobs beyond `job_history` (caller holds the lock)."""
+        excess = len(self._jobs) - self.job_history
+        if excess <= 0:
+            return
+        finished = sorted((j for j in self._jobs.values() if j.finished is not None), key=lambda j: j.finished)
+        for job in finished[:excess]:
+            del self._jobs[job.id]
+
+    # ------------------------------------------------------------------
+    # Backpressure
+    # ------------------------------------------------------------------
+
+    def _model_saturated(self) -> bool:
+        client = getattr(self.ai, "model_client", None)
+        return bool(client is not None and client.saturated)
+
+    def _sandbox_saturated(self) -> bool:
+        pool = getattr(self.ai, "sandbox_pool", None)
+        return bool(pool is not None and pool.saturated)
+
+    def _wait_for_capacity(self, saturated) -> None:
+        if saturated():
+            self.stats["backpressure_waits"] += 1
+            while saturated() and not self._stopping.is_set():
+                time.sleep(0.05)
+
+    def _put(self, stage: str, item: Any) -> None:
+        """Blocking put into a bounded stage queue (this is where backpressure propagates)."""
+        while not self._stopping.is_set():
+            try:
+                self._queues[stage].put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            job = self._intake.get()
+            if job is _STOP:
+                return
+            if job.cancelled:
+                self._finish(job, False, "Cancelled before start", status="cancelled")
+                continue
+            try:
+                job.status = "running"
+                job.stage = "generate"
+                job.started = time.time()
+                job.current_code = self.ai.get_current_code()
+                job.parent_hash = hashlib.md5(job.current_code.encode()).hexdigest()
+                self._touch()
+            except Exception as e:
+                self._finish(job, False, f"Error: {e}")
+                continue
+            for index in range(job.num_candidates):
+                self._put("generate", (job, index, None))
+
+    def _stage_loop(self, stage: str) -> None:
+        handler = getattr(self, f"_{stage}")
+        while not self._stopping.is_set():
+            try:
+                item = self._queues[stage].get(timeout=0.5)
+            except queue.Empty:
+                continue
+            job = item[0]
+            try:
+                if job.cancelled and stage != "promote":
+                    # Skip the remaining work; the promote stage still counts the candidate
+                    self._put("promote", (job, self.ai.evaluate_candidate(item[1], None), None))
+                    continue
+                with self.registry.job_scope(job.id):
+                    handler(*item)
+            except Exception as e:
+                logger.error(f"{stage} stage failed for job {job.id}: {e}")
+                if stage == "promote":
+                    self._finish(job, False, f"Error: {e}")
+                else:
+                    self._put("promote", (job, self.ai.evaluate_candidate(item[1], None), None))
+
+    def _generate(self, job: EvolutionJob, index: int, _: Any) -> None:
+        self._wait_for_capacity(self._model_saturated)
+        code = self.ai.draft_candidate(job.current_code)
+        self._put("validate", (job, index, code))
+
+    def _validate(self, job: EvolutionJob, index: int, code: Optional[str]) -> None:
+        if job.stage == "generate":
+            job.stage = "validate"
+            self._touch()
+        if code is None or not self.ai._validate_python_code(code):
+            # evaluate_candidate(None) records an invalid candidate without running anything
+            self._put("promote", (job, self.ai.evaluate_candidate(index, None), None))
+        else:
+            self._put("execute", (job, index, code))
+
+    def _execute(self, job: EvolutionJob, index: int, code: str) -> None:
+        if job.stage in ("generate", "validate"):
+            job.stage = "execute"
+            self._touch()
+        self._wait_for_capacity(self._sandbox_saturated)
+        self._put("promote", (job, self.ai.evaluate_candidate(index, code), None))
+
+    def _promote(self, job: EvolutionJob, candidate: Any, _: Any) -> None:
+        job.candidates.append(candidate)
+        if len(job.candidates) < job.num_candidates:
+            return
+        if job.cancelled:
+            self._finish(job, False, "Cancelled", status="cancelled")
+            return
+        job.stage = "promote"
+        self._touch()
+        success, message = self.ai.promote_best(sorted(job.candidates, key=lambda c: c.index),
+                                                parent_hash=job.parent_hash)
+        self._finish(job, success, message)
+
+    def _continuous_loop(self) -> None:
+        """Submit a new job every `interval` seconds while the scheduler is idle."""
+        while not self._stopping.wait(self.interval):
+            if not self._accepting or self._active:
+                continue
+            try:
+                self.submit()
+            except SchedulerBusy as e:
+                logger.info(f"Continuous evolution deferred: {e}")
+
+
+def main() -> int:
+    """Run the scheduler as a standalone daemon until SIGINT/SIGTERM."""
+    from self_modify import SelfModifyingAI
+
+    parser = argparse.ArgumentParser(description="Continuously evolve AI_Main.py")
+    parser.add_argument("--main-script", default="AI_Main.py")
+    parser.add_argument("--backup-dir", default="ai_backups")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--max-versions", type=int, default=100000)
+    args = parser.parse_args()
+
+    ai_system = SelfModifyingAI(main_script=args.main_script, backup_dir=args.backup_dir,
+                                config_file=args.config, max_versions=args.max_versions)
+    config = dict(ai_system.config, scheduler_continuous=True)
+    scheduler = EvolutionScheduler(ai_system, config).start()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    # Kick off the first cycle immediately rather than after one interval
+    try:
+        scheduler.submit()
+    except SchedulerBusy as e:
+        logger.info(f"Initial evolution deferred: {e}")
+    stop.wait()
+
+    logger.info("Shutdown requested, draining evolution jobs")
+    return 0 if scheduler.shutdown(drain=True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import datetime
+import threading
+import logging.handlers
+from typing import Dict, Any, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is
+# written as a structured field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "process": record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RotatingJsonFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    JSON-lines file handler that rotates on size or age, whichever comes first.
+
+    Rotated files are renamed `<file>.1`, `<file>.2`, ... like
+    `RotatingFileHandler`. The age of the current file counts from the time
+    of its first record, so restarts do not reset the interval.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 interval: Optional[float] = 86400):
+        """
+        Open (lazily) a rotating JSON-lines log file.
+
+        Args:
+            filename: Log file path
+            max_bytes: Rotate once the file would grow beyond this size (0 disables)
+            backup_count: Number of rotated files to keep
+            interval: Rotate once the file is this many seconds old (None disables)
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval = interval
+        self.rollover_at = None
+        if interval:
+            self.rollover_at = self._started(filename) + interval
+        self.setFormatter(JsonLinesFormatter())
+
+    @staticmethod
+    def _started(filename: str) -> float:
+        """When the current file was begun: the time of its first record (now for a new or empty file)."""
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                first = f.readline()
+        except OSError:
+            return time.time()
+        if not first.strip():
+            return time.time()
+        try:
+            return datetime.datetime.fromisoformat(json.loads(first)["time"]).timestamp()
+        except (ValueError, KeyError, TypeError):
+            # Not one of our records; the last write is the best estimate left
+            return os.path.getmtime(filename)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rollover_at is not None and record.created >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments and render any traceback on the calling thread (the
+        # originals may change or hold frames), but leave all other formatting
+        # to the writer thread; the stdlib version formats the full message here
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Detach:
+    """Queue marker: the listener removes and closes `handler` when it reaches this point."""
+
+    def __init__(self, handler: logging.Handler):
+        self.handler = handler
+
+
+class _Listener(logging.handlers.QueueListener):
+    def __init__(self, queue: "queue.Queue[Any]", *handlers: logging.Handler, respect_handler_level: bool = False):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self._handlers_lock = threading.Lock()
+
+    def add_handler(self, handler: logging.Handler) -> None:
+        with self._handlers_lock:
+            self.handlers = self.handlers + (handler,)
+
+    def remove_handler(self, handler: logging.Handler) -> None:
+        with self._handlers_lock:
+            self.handlers = tuple(h for h in self.handlers if h is not handler)
+        handler.close()
+
+    def handle(self, record: Any) -> None:
+        if isinstance(record, _Detach):
+            self.remove_handler(record.handler)
+            return
+        super().handle(record)
+
+
+class LogPipeline:
+    """
+    Process-wide logging: callers enqueue, one background thread writes.
+
+    The root logger gets a `QueueHandler`, so logging on a hot path (request
+    handlers, training output parsing, the metrics sampler) only copies the
+    record into a queue. A `QueueListener` thread writes it to the rotating
+    JSON-lines file and the console, plus any handlers attached for a
+    session with `attach`.
+    """
+
+    def __init__(self, log_file: str, level: int = logging.INFO, console: bool = True,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 interval: Optional[float] = 86400):
+        self.log_file = log_file
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        handlers = [RotatingJsonFileHandler(log_file, max_bytes, backup_count, interval)]
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(console_handler)
+        self.listener = _Listener(self.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = _QueueHandler(self.queue)
+        self.level = level
+        self._running = False
+
+    def start(self) -> "LogPipeline":
+        root = logging.getLogger()
+        root.setLevel(self.level)
+        root.addHandler(self.queue_handler)
+        self.listener.start()
+        self._running = True
+        return self
+
+    def stop(self) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        if not self._running:
+            return
+        self._running = False
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+    def attach(self, handler: logging.Handler) -> logging.Handler:
+        """Start writing records to an extra handler (e.g. a per-session file) on the writer thread."""
+        self.listener.add_handler(handler)
+        return handler
+
+    def detach(self, handler: logging.Handler) -> None:
+        """
+        Stop writing to `handler` and close it.
+
+        The handler is removed once the writer thread reaches the records
+        queued before this call, so none of them are lost.
+        """
+        if self._running:
+            self.queue.put_nowait(_Detach(handler))
+        else:
+            self.listener.remove_handler(handler)
+
+
+_pipeline: Optional[LogPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def configure_logging(log_file: str, level: int = logging.INFO, **kwargs: Any) -> LogPipeline:
+    """
+    Set up the process-wide log pipeline writing JSON lines to `log_file`.
+
+    Like `logging.basicConfig`, only the first call in a process configures
+    anything; later calls (e.g. from modules imported by the daemon) return
+    the existing pipeline. Keyword arguments are passed to `LogPipeline`.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LogPipeline(log_file, level, **kwargs).start()
+            atexit.register(_pipeline.stop)
+        return _pipeline
+
+
+def get_pipeline() -> Optional[LogPipeline]:
+    return _pipeline
+
+
+class _FieldFilter(logging.Filter):
+    def __init__(self, key: str, value: Any):
+        super().__init__()
+        self.key = key
+        self.value = value
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return getattr(record, self.key, None) == self.value
+
+
+def open_session_log(path: str, key: str, value: Any, **kwargs: Any) -> logging.Handler:
+    """
+    Write records tagged with `extra={key: value}` to their own JSON-lines file.
+
+    The handler runs on the pipeline's writer thread when a pipeline is
+    configured (and is attached to the root logger otherwise). Pass it to
+    `close_session_log` when the session ends.
+
+    Args:
+        path: Session log file
+        key: Record attribute identifying the session (e.g. "session_id")
+        value: Value of that attribute for this session
+        **kwargs: Rotation settings for `RotatingJsonFileHandler`
+    """
+    handler = RotatingJsonFileHandler(path, **kwargs)
+    handler.addFilter(_FieldFilter(key, value))
+    if _pipeline is not None:
+        return _pipeline.attach(handler)
+    logging.getLogger().addHandler(handler)
+    return handler
+
+
+def close_session_log(handler: logging.Handler) -> None:
+    """Detach and close a handler returned by `open_session_log`."""
+    if _pipeline is not None and handler in _pipeline.listener.handlers:
+        _pipeline.detach(handler)
+    else:
+        logging.getLogger().removeHandler(handler)
+        handler.close()
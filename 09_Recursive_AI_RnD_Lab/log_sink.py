@@ -0,0 +1,112 @@
+import json
+import logging
+import datetime
+from typing import Dict, List, Any, Optional
+
+from broadcast import BroadcastRing
+
+LOG_TOPIC = "log"
+
+
+class LogEntry:
+    """
+    A captured log record, formatted on first use.
+
+    The record is stored as-is when it is logged; the formatted message and
+    its JSON encoding are produced only when someone reads the entry (the
+    /logs page or a stream client) and are then cached for every other reader.
+    """
+
+    __slots__ = ("record", "formatter", "_dict", "_json")
+
+    def __init__(self, record: logging.LogRecord, formatter: logging.Formatter):
+        self.record = record
+        self.formatter = formatter
+        self._dict: Optional[Dict[str, Any]] = None
+        self._json: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._dict is None:
+            self._dict = {
+                "timestamp": datetime.datetime.fromtimestamp(self.record.created).isoformat(),
+                "level": self.record.levelname,
+                "logger": self.record.name,
+                "message": self.formatter.format(self.record)
+            }
+        return self._dict
+
+    @property
+    def json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), default=str)
+        return self._json
+
+
+class RingLogHandler(logging.Handler):
+    """
+    Logging handler that keeps the most recent records in a `BroadcastRing`.
+
+    `emit` only wraps the record and publishes it: no formatting and no
+    copying. `handle` skips the handler lock that `logging.Handler.handle`
+    would take, since publishing is already thread-safe (the ring holds its
+    own short lock). Once the ring is full the oldest records are
+    overwritten; `dropped` counts them.
+    """
+
+    def __init__(self, ring: Optional[BroadcastRing] = None, capacity: int = 1000,
+                 level: int = logging.NOTSET):
+        """
+        Create the handler.
+
+        Args:
+            ring: Ring to publish into (shared with other event topics), or
+                None to create a private ring of `capacity` records
+            capacity: Size of the private ring
+            level: Minimum level to capture
+        """
+        super().__init__(level)
+        self.ring = ring if ring is not None else BroadcastRing(capacity)
+
+    def handle(self, record: logging.LogRecord):
+        # Same as Handler.handle, minus the handler lock around emit
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.exc_info:
+            # Render the traceback now so the entry does not keep frames alive
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        self.ring.publish((LOG_TOPIC, LogEntry(record, self.formatter or logging.Formatter())))
+
+    @property
+    def dropped(self) -> int:
+        """Events overwritten in the ring so far (including other topics when the ring is shared)."""
+        return self.ring.dropped
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the buffered log entries, oldest first (at most the last `limit`)."""
+        entries = [entry for topic, entry in self.ring.snapshot() if topic == LOG_TOPIC]
+        if limit is not None:
+            entries = entries[-limit:]
+        return [entry.to_dict() for entry in entries]
+
+
+def attach(handler: logging.Handler, logger: Optional[logging.Logger] = None) -> logging.Handler:
+    """
+    Add `handler` to `logger` (the root logger by default) unless an equivalent one is already there.
+
+    Named loggers propagate to the root logger, so attaching a handler to both
+    would deliver each record twice; repeated setup calls would do the same.
+    Returns the handler that ends up attached.
+    """
+    logger = logger or logging.getLogger()
+    for existing in logger.handlers:
+        if existing is handler or type(existing) is type(handler):
+            return existing
+    logger.addHandler(handler)
+    return handler
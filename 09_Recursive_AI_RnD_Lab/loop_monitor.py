@@ -0,0 +1,345 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Deque, Dict, FrozenSet, List, Any, Optional, Tuple
+
+logger = logging.getLogger("loop_monitor")
+
+# Rolling hashes are polynomials over token hashes modulo a Mersenne prime
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+_MIX = 0x9E3779B97F4A7C15
+_EMPTY = 1 << 64  # larger than any sketch value: an empty MinHash bin
+_NOTHING_NEW = 0  # stands in for the shingles of a response that only repeats its parent
+
+_PUNCTUATION = ".,;:!?\"'()[]`*"
+_SELF_WORDS = frozenset({"i", "i'm", "i've", "i'll", "i'd", "me", "my", "myself"})
+_SENTENCE_END = re.compile(r"[.!?:]$")
+_MAX_SENTENCE = 64  # tokens; longer runs are not treated as a sentence
+_MAX_TOKEN = 256  # characters buffered before a split token is emitted anyway
+
+
+@dataclass
+class LoopDetection:
+    """Why the monitor fired."""
+    kind: str  # "cycle", "self_reference" or "repeated_response"
+    detail: str
+    tokens: int  # tokens of the response seen when it fired
+    timestamp: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class LoopMonitor:
+    """
+    Streaming repetition detector for model output (Internal Recursive Loop Monitor).
+
+    Implements the RLM triggers that can be checked mechanically: a
+    response that cycles (the same run of tokens over and over), a
+    response that repeats the same self-referencing statement, and the
+    same response produced `repeats` times.
+
+    Each response is read through a `watch` as it streams, one token at a
+    time in O(1): a Rabin-Karp rolling hash over the last `shingle` tokens
+    finds cycles within the response, and the same hashes fill a
+    one-permutation MinHash sketch of the response. When the response
+    ends, its sketch is looked up in an LSH table of the last `window`
+    responses (`bands` buckets per response), so near-duplicates are found
+    without comparing against every stored response. Memory is bounded by
+    `horizon` tokens per open response plus `window` sketches.
+
+    A response that rewrites a `parent` text (e.g. the whole main script
+    with one function changed) is compared by what it adds: shingles
+    copied from the parent are left out of its sketch and statements
+    copied from it are not counted, so different edits of the same file
+    are not near-duplicates of each other.
+    """
+
+    def __init__(self,
+                 window: int = 8,
+                 repeats: int = 3,
+                 similarity: float = 0.9,
+                 shingle: int = 8,
+                 sketch_size: int = 64,
+                 bands: int = 16,
+                 cycle_min_tokens: int = 64,
+                 horizon: int = 2048):
+        """
+        Configure the monitor.
+
+        Args:
+            window: Number of recent responses compared against
+            repeats: Occurrences (of a response, cycle or statement) that count as a loop
+            similarity: Estimated Jaccard similarity from which two responses are duplicates
+            shingle: Tokens per rolling-hash window
+            sketch_size: MinHash bins per response
+            bands: LSH bands (must divide `sketch_size`)
+            cycle_min_tokens: Shortest repeated span reported as a cycle
+            horizon: Tokens back within which a cycle's period can be found
+        """
+        if sketch_size % bands:
+            raise ValueError(f"bands ({bands}) must divide sketch_size ({sketch_size})")
+        self.window = window
+        self.repeats = repeats
+        self.similarity = similarity
+        self.shingle = shingle
+        self.sketch_size = sketch_size
+        self.bands = bands
+        self.cycle_min_tokens = cycle_min_tokens
+        self.horizon = horizon
+        self.on_detect: Optional[Callable[[LoopDetection], None]] = None
+
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._recent: Deque[Tuple[int, List[int], List[Tuple[int, Tuple[int, ...]]]]] = deque()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._sketches: Dict[int, List[int]] = {}
+        self._parent: Tuple[Optional[int], FrozenSet[int]] = (None, frozenset())
+        self.responses = 0
+        self.detections: Dict[str, int] = {"cycle": 0, "self_reference": 0, "repeated_response": 0}
+        self.last_detection: Optional[LoopDetection] = None
+
+    def watch(self, parent: Optional[str] = None) -> "ResponseWatch":
+        """
+        Start following one response.
+
+        Args:
+            parent: Text the response is expected to rewrite; only what the
+                response adds to it is compared with earlier responses
+        """
+        return ResponseWatch(self, self._shingles(parent) if parent else frozenset())
+
+    def observe(self, text: str, parent: Optional[str] = None) -> Optional[LoopDetection]:
+        """Check a complete (non-streamed) response and record it."""
+        watch = self.watch(parent)
+        watch.feed(text)
+        return watch.close()
+
+    def _shingles(self, text: str) -> FrozenSet[int]:
+        """Rolling hashes of every `shingle`-token window of `text` (the last parent is cached)."""
+        key = hash(text)
+        with self._lock:
+            cached_key, cached = self._parent
+        if cached_key == key:
+            return cached
+        drop = pow(_BASE, self.shingle, _MOD)
+        window: Deque[int] = deque()
+        value = 0
+        shingles = set()
+        for token in text.split():
+            token_hash = hash(token.lower()) % _MOD
+            window.append(token_hash)
+            value = (value * _BASE + token_hash) % _MOD
+            if len(window) > self.shingle:
+                value = (value - window.popleft() * drop) % _MOD
+            if len(window) == self.shingle:
+                shingles.add(value)
+        result = frozenset(shingles)
+        with self._lock:
+            self._parent = (key, result)
+        return result
+
+    def _fire(self, kind: str, detail: str, tokens: int) -> LoopDetection:
+        detection = LoopDetection(kind=kind, detail=detail, tokens=tokens, timestamp=time.time())
+        with self._lock:
+            self.detections[kind] += 1
+            self.last_detection = detection
+        logger.warning(f"Loop detected ({kind}): {detail}")
+        if self.on_detect is not None:
+            try:
+                self.on_detect(detection)
+            except Exception as e:
+                logger.error(f"Loop detection handler failed: {e}")
+        return detection
+
+    def _band_keys(self, sketch: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        rows = self.sketch_size // self.bands
+        return [(band, tuple(sketch[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _estimate(self, a: List[int], b: List[int]) -> float:
+        filled = equal = 0
+        for x, y in zip(a, b):
+            if x != _EMPTY or y != _EMPTY:
+                filled += 1
+                equal += x == y
+        return equal / filled if filled else 0.0
+
+    def _record(self, sketch: List[int]) -> int:
+        """Store a response sketch; returns how many recent responses it duplicates."""
+        keys = self._band_keys(sketch)
+        with self._lock:
+            self.responses += 1
+            candidates = {rid for key in keys for rid in self._buckets.get(key, ())}
+            duplicates = sum(self._estimate(sketch, self._sketches[rid]) >= self.similarity for rid in candidates)
+
+            rid = self._ids
+            self._ids += 1
+            self._recent.append((rid, sketch, keys))
+            self._sketches[rid] = sketch
+            for key in keys:
+                self._buckets.setdefault(key, []).append(rid)
+            if len(self._recent) > self.window:
+                old, _, old_keys = self._recent.popleft()
+                del self._sketches[old]
+                for key in old_keys:
+                    bucket = self._buckets[key]
+                    bucket.remove(old)
+                    if not bucket:
+                        del self._buckets[key]
+            return duplicates
+
+    def reset(self) -> None:
+        """Forget all recorded responses (e.g. once their parent has been replaced)."""
+        with self._lock:
+            self._recent.clear()
+            self._buckets.clear()
+            self._sketches.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "remembered": len(self._recent),
+                "detections": dict(self.detections),
+                "last_detection": self.last_detection.to_dict() if self.last_detection else None
+            }
+
+
+class ResponseWatch:
+    """
+    Incremental state for one response; see `LoopMonitor`.
+
+    `feed` returns a detection as soon as the response starts cycling or
+    repeats a self-referencing statement, so the caller can stop
+    generation. `close` records the response and reports it if it
+    duplicates earlier ones.
+    """
+
+    def __init__(self, monitor: LoopMonitor, known: FrozenSet[int] = frozenset()):
+        self.monitor = monitor
+        self._known = known  # shingles of the parent text
+        self.detection: Optional[LoopDetection] = None
+        self.tokens = 0
+        self._partial = ""
+        self._window: Deque[int] = deque()
+        self._hash = 0
+        self._drop = pow(_BASE, monitor.shingle, _MOD)  # weight of the token leaving the window
+        self._seen: Dict[int, int] = {}  # window hash -> last position
+        self._positions: Deque[Tuple[int, int]] = deque()
+        self._period = 0
+        self._run = 0
+        self._sentence: List[str] = []
+        self._self_reference = False
+        self._statements: Dict[int, int] = {}  # self-referencing statement -> times seen in this response
+        self._sketch = [_EMPTY] * monitor.sketch_size
+        self._closed = False
+
+    def feed(self, chunk: str) -> Optional[LoopDetection]:
+        """Add streamed text; returns the detection once the monitor has fired."""
+        if self.detection is not None:
+            return self.detection
+        text = self._partial + chunk
+        tokens = text.split()
+        self._partial = ""
+        if tokens and not text[-1].isspace() and len(tokens[-1]) < _MAX_TOKEN:
+            # The last token may continue in the next chunk
+            self._partial = tokens.pop()
+        for token in tokens:
+            self._token(token.lower())
+            if self.detection is not None:
+                break
+        return self.detection
+
+    def close(self) -> Optional[LoopDetection]:
+        """
+        Finish the response and record it.
+
+        Returns:
+            The detection from `feed`, or one for a response that repeats
+            `repeats - 1` of the recent ones
+        """
+        if self._closed:
+            return self.detection
+        self._closed = True
+        if self._partial and self.detection is None:
+            self._token(self._partial.lower())
+        if self._window and len(self._window) < self.monitor.shingle:
+            self._add_shingle(self._hash)  # short response: a single shingle of all its tokens
+        if self.tokens == 0:
+            return self.detection
+        if all(value == _EMPTY for value in self._sketch):
+            self._add_shingle(_NOTHING_NEW)
+        duplicates = self.monitor._record(self._sketch)
+        if self.detection is None and duplicates + 1 >= self.monitor.repeats:
+            self.detection = self.monitor._fire(
+                "repeated_response", f"response repeats {duplicates} of the last {self.monitor.window}", self.tokens)
+        return self.detection
+
+    def _token(self, token: str) -> None:
+        monitor = self.monitor
+        position = self.tokens
+        self.tokens += 1
+
+        value = hash(token) % _MOD
+        self._window.append(value)
+        self._hash = (self._hash * _BASE + value) % _MOD
+        if len(self._window) > monitor.shingle:
+            self._hash = (self._hash - self._window.popleft() * self._drop) % _MOD
+        copied = False
+        if len(self._window) == monitor.shingle:
+            copied = self._hash in self._known
+            if not copied:
+                self._add_shingle(self._hash)
+            self._check_cycle(self._hash, position)
+
+        self._check_statement(token, copied)
+
+    def _add_shingle(self, value: int) -> None:
+        mixed = (value * _MIX) & 0xFFFFFFFFFFFFFFFF
+        bin_, rank = mixed % self.monitor.sketch_size, mixed // self.monitor.sketch_size
+        if rank < self._sketch[bin_]:
+            self._sketch[bin_] = rank
+
+    def _check_cycle(self, value: int, position: int) -> None:
+        monitor = self.monitor
+        last = self._seen.get(value)
+        if last is None:
+            self._period = self._run = 0
+        elif position - last == self._period:
+            self._run += 1
+        else:
+            self._period, self._run = position - last, 1
+        self._seen[value] = position
+        self._positions.append((position, value))
+        if len(self._positions) > monitor.horizon:
+            old_position, old_value = self._positions.popleft()
+            if self._seen.get(old_value) == old_position:
+                del self._seen[old_value]
+
+        if self._period:
+            # Tokens covered by the periodic stretch ending at this position
+            span = self._run + monitor.shingle - 1 + self._period
+            if span >= max(monitor.repeats * self._period, monitor.cycle_min_tokens):
+                self.detection = monitor._fire(
+                    "cycle", f"last {span} tokens repeat with a period of {self._period} tokens", self.tokens)
+
+    def _check_statement(self, token: str, copied: bool) -> None:
+        word = token.strip(_PUNCTUATION)
+        if word:
+            self._sentence.append(word)
+            self._self_reference = self._self_reference or word in _SELF_WORDS
+        if _SENTENCE_END.search(token) or len(self._sentence) >= _MAX_SENTENCE:
+            # A statement whose closing shingle comes from the parent text was copied, not produced
+            if self._self_reference and len(self._sentence) < _MAX_SENTENCE and not copied:
+                key = hash(tuple(self._sentence))
+                seen = self._statements[key] = self._statements.get(key, 0) + 1
+                if seen >= self.monitor.repeats:
+                    self.detection = self.monitor._fire(
+                        "self_reference", f"statement repeated {seen} times: {' '.join(self._sentence)[:120]!r}",
+                        self.tokens)
+            self._sentence = []
+            self._self_reference = False
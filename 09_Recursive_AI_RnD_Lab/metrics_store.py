@@ -0,0 +1,270 @@
+import math
+import time
+import bisect
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+# Sampled fields and their array typecodes ('d' = float64, 'q' = int64).
+# Missing float values (e.g. no temperature sensor) are stored as NaN.
+METRIC_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("cpu_percent", "d"),
+    ("memory_percent", "d"),
+    ("disk_usage_percent", "d"),
+    ("network_bytes_sent", "q"),
+    ("network_bytes_recv", "q"),
+    ("temperature", "d"),
+)
+
+
+class _TimestampView(Sequence):
+    """Read-only logical view over a ring's timestamp column, for bisect."""
+
+    def __init__(self, ring: "RingBuffer"):
+        self.ring = ring
+
+    def __len__(self) -> int:
+        return self.ring.count
+
+    def __getitem__(self, i: int) -> float:
+        return self.ring.timestamps[self.ring._physical(i)]
+
+
+class RingBuffer:
+    """
+    Fixed-capacity, columnar ring buffer of timestamped rows.
+
+    Each column is a preallocated `array`, so appending overwrites the oldest
+    row in O(1) and memory use is fixed at creation. Timestamps must be
+    appended in non-decreasing order, which lets range lookups bisect.
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[Tuple[str, str]]):
+        self.capacity = capacity
+        self.columns = [name for name, _ in columns]
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.data: Dict[str, array] = {
+            name: array(code, bytes(array(code).itemsize * capacity)) for name, code in columns
+        }
+        self.start = 0
+        self.count = 0
+
+    def _physical(self, i: int) -> int:
+        return (self.start + i) % self.capacity
+
+    def append(self, timestamp: float, values: Dict[str, Any]) -> None:
+        if self.count < self.capacity:
+            slot = self._physical(self.count)
+            self.count += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.timestamps[slot] = timestamp
+        for name, column in self.data.items():
+            value = values.get(name)
+            if value is None:
+                value = math.nan if column.typecode == "d" else 0
+            column[slot] = value
+
+    def __len__(self) -> int:
+        return self.count
+
+    def oldest(self) -> Optional[float]:
+        return self.timestamps[self.start] if self.count else None
+
+    def newest(self) -> Optional[float]:
+        return self.timestamps[self._physical(self.count - 1)] if self.count else None
+
+    def index_range(self, start: float, end: float) -> Tuple[int, int]:
+        """Logical [lo, hi) indices of rows with start <= timestamp <= end."""
+        view = _TimestampView(self)
+        return bisect.bisect_left(view, start), bisect.bisect_right(view, end)
+
+    def _slices(self, lo: int, hi: int) -> List[slice]:
+        """Physical slices covering logical rows [lo, hi) (two when the range wraps)."""
+        if lo >= hi:
+            return []
+        a, b = self._physical(lo), self._physical(hi - 1) + 1
+        if a < b:
+            return [slice(a, b)]
+        return [slice(a, self.capacity), slice(0, b)]
+
+    def column(self, name: str, lo: int, hi: int) -> List[Any]:
+        source = self.timestamps if name == "timestamp" else self.data[name]
+        values: List[Any] = []
+        for part in self._slices(lo, hi):
+            values.extend(source[part])
+        return values
+
+
+class _Accumulator:
+    """Running min/sum/max for one rollup bucket."""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.reset(0.0)
+
+    def reset(self, bucket: float) -> None:
+        self.bucket = bucket
+        self.samples = 0
+        self.count = {n: 0 for n in self.names}
+        self.total = {n: 0.0 for n in self.names}
+        self.low = {n: math.inf for n in self.names}
+        self.high = {n: -math.inf for n in self.names}
+
+    def add(self, values: Dict[str, Any]) -> None:
+        self.samples += 1
+        for name in self.names:
+            value = values.get(name)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            self.count[name] += 1
+            self.total[name] += value
+            self.low[name] = min(self.low[name], value)
+            self.high[name] = max(self.high[name], value)
+
+    def rollup(self) -> Dict[str, Any]:
+        row: Dict[str, Any] = {"samples": self.samples}
+        for name in self.names:
+            if self.count[name]:
+                row[f"{name}_min"] = self.low[name]
+                row[f"{name}_avg"] = self.total[name] / self.count[name]
+                row[f"{name}_max"] = self.high[name]
+        return row
+
+
+@dataclass
+class TierSpec:
+    """A retention tier: `capacity` rows, each covering `resolution` seconds (0 = raw samples)."""
+    name: str
+    resolution: float
+    capacity: int
+
+
+# 24 h of 5 s samples, 14 days of 1 min rollups, 1 year of 1 h rollups (about 6 MB in total)
+DEFAULT_TIERS = (
+    TierSpec("raw", 0, 17280),
+    TierSpec("1m", 60, 20160),
+    TierSpec("1h", 3600, 8760),
+)
+
+
+class MetricsStore:
+    """
+    In-memory metrics history with downsampled retention tiers.
+
+    Raw samples go to a ring buffer; every sample also feeds one accumulator
+    per rollup tier, which emits a min/avg/max row when its bucket closes.
+    Queries read the finest tier that still covers the requested start time.
+    """
+
+    def __init__(self, tiers: Sequence[TierSpec] = DEFAULT_TIERS,
+                 fields: Sequence[Tuple[str, str]] = METRIC_FIELDS):
+        self.fields = list(fields)
+        self.names = [name for name, _ in fields]
+        self._lock = threading.Lock()
+        self.tiers: List[Tuple[TierSpec, RingBuffer]] = []
+        self._accumulators: Dict[str, _Accumulator] = {}
+        rollup_columns = [("samples", "q")] + [
+            (f"{name}_{stat}", "d") for name, _ in fields for stat in ("min", "avg", "max")]
+        for spec in sorted(tiers, key=lambda t: t.resolution):
+            columns = self.fields if spec.resolution == 0 else rollup_columns
+            self.tiers.append((spec, RingBuffer(spec.capacity, columns)))
+            if spec.resolution:
+                self._accumulators[spec.name] = _Accumulator(self.names)
+        self._latest: Optional[Dict[str, Any]] = None
+
+    def append(self, sample: Any) -> None:
+        """Add a sample (a dict or a dataclass such as SystemMetrics with a `timestamp`)."""
+        values = sample if isinstance(sample, dict) else vars(sample)
+        timestamp = values.get("timestamp")
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            self._latest = dict(values, timestamp=timestamp)
+            for spec, ring in self.tiers:
+                if spec.resolution == 0:
+                    ring.append(timestamp, values)
+                    continue
+                acc = self._accumulators[spec.name]
+                bucket = timestamp - timestamp % spec.resolution
+                if acc.samples and bucket != acc.bucket:
+                    ring.append(acc.bucket, acc.rollup())
+                if not acc.samples or bucket != acc.bucket:
+                    acc.reset(bucket)
+                acc.add(values)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        return self._latest
+
+    def __len__(self) -> int:
+        return len(self.tiers[0][1]) if self.tiers else 0
+
+    def _pick_tier(self, start: float, resolution: Optional[float]) -> Tuple[TierSpec, RingBuffer]:
+        candidates = [(spec, ring) for spec, ring in self.tiers if len(ring)]
+        if not candidates:
+            return self.tiers[0]
+        if resolution is not None:
+            coarse_enough = [t for t in candidates if t[0].resolution <= resolution]
+            candidates = coarse_enough or candidates[:1]
+            for spec, ring in reversed(candidates):
+                if ring.oldest() <= start:
+                    return spec, ring
+            return candidates[-1]
+        for spec, ring in candidates:
+            if ring.oldest() <= start:
+                return spec, ring
+        return candidates[-1]
+
+    def query(self,
+              start: Optional[float] = None,
+              end: Optional[float] = None,
+              fields: Optional[Sequence[str]] = None,
+              resolution: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Return columns for samples between `start` and `end` (inclusive).
+
+        Args:
+            start: Earliest timestamp (defaults to everything retained)
+            end: Latest timestamp (defaults to now)
+            fields: Metric names to return (defaults to all)
+            resolution: Coarsest acceptable resolution in seconds; by default the
+                finest tier that still reaches back to `start` is used
+
+        Returns:
+            Dict with "tier", "resolution", "timestamp" and one list per field.
+            Rollup tiers return the bucket average under the field name plus
+            "<field>_min" and "<field>_max".
+        """
+        start = 0.0 if start is None else start
+        end = time.time() if end is None else end
+        fields = list(fields or self.names)
+        with self._lock:
+            spec, ring = self._pick_tier(start, resolution)
+            lo, hi = ring.index_range(start, end)
+            result: Dict[str, Any] = {
+                "tier": spec.name,
+                "resolution": spec.resolution,
+                "timestamp": ring.column("timestamp", lo, hi)
+            }
+            for name in fields:
+                if spec.resolution == 0:
+                    result[name] = _nan_to_none(ring.column(name, lo, hi))
+                else:
+                    result[name] = _nan_to_none(ring.column(f"{name}_avg", lo, hi))
+                    result[f"{name}_min"] = _nan_to_none(ring.column(f"{name}_min", lo, hi))
+                    result[f"{name}_max"] = _nan_to_none(ring.column(f"{name}_max", lo, hi))
+        return result
+
+    def memory_bytes(self) -> int:
+        """Bytes preallocated for all tiers."""
+        total = 0
+        for _, ring in self.tiers:
+            total += ring.timestamps.itemsize * ring.capacity
+            total += sum(col.itemsize * ring.capacity for col in ring.data.values())
+        return total
+
+
+def _nan_to_none(values: List[Any]) -> List[Any]:
+    return [None if isinstance(v, float) and math.isnan(v) else v for v in values]
@@ -0,0 +1,237 @@
+import os
+import math
+import mmap
+import time
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from metrics_store import METRIC_FIELDS
+
+logger = logging.getLogger("metrics_timeseries")
+
+MAGIC = b"RAITS001"
+# magic, record size, record count, record format (without byte order)
+HEADER = struct.Struct("<8sIQ40s")
+HEADER_SIZE = 64
+
+
+class _Segment:
+    """One preallocated, memory-mapped segment file of fixed-width records."""
+
+    def __init__(self, path: Path, record: struct.Struct, capacity: Optional[int] = None):
+        self.path = path
+        self.record = record
+        if capacity is not None:
+            with open(path, "wb") as f:
+                f.truncate(HEADER_SIZE + capacity * record.size)
+        self._file = open(path, "r+b")
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = (len(self.mm) - HEADER_SIZE) // record.size
+        if capacity is not None:
+            self.count = 0
+            self._write_header()
+        else:
+            magic, record_size, count, fmt = HEADER.unpack_from(self.mm, 0)
+            if magic != MAGIC or record_size != record.size or fmt.rstrip(b"\0").decode() != record.format[1:]:
+                self.close()
+                raise ValueError(f"{path} has an incompatible record layout")
+            self.count = min(count, self.capacity)
+
+    def _write_header(self) -> None:
+        HEADER.pack_into(self.mm, 0, MAGIC, self.record.size, self.count, self.record.format[1:].encode())
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def timestamp(self, i: int) -> float:
+        return struct.unpack_from("<d", self.mm, HEADER_SIZE + i * self.record.size)[0]
+
+    def append(self, values: Tuple[Any, ...]) -> None:
+        self.record.pack_into(self.mm, HEADER_SIZE + self.count * self.record.size, *values)
+        self.count += 1
+        # The count is written after the record, so a crash never exposes a half-written record
+        struct.pack_into("<Q", self.mm, 12, self.count)
+
+    def bisect(self, timestamp: float, right: bool = False) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            ts = self.timestamp(mid)
+            if ts < timestamp or (right and ts == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, lo: int, hi: int):
+        """Iterate records [lo, hi) straight out of the mapping."""
+        with memoryview(self.mm) as view:
+            part = view[HEADER_SIZE + lo * self.record.size:HEADER_SIZE + hi * self.record.size]
+            try:
+                yield from self.record.iter_unpack(part)
+            finally:
+                part.release()
+
+    def flush(self) -> None:
+        self.mm.flush()
+
+    def close(self) -> None:
+        self.mm.close()
+        self._file.close()
+
+
+class MetricsTimeSeries:
+    """
+    Append-only metrics history persisted in memory-mapped segment files.
+
+    Each sample is one fixed-width little-endian record (timestamp followed by
+    the metric fields), so a time range maps to a contiguous slice that is
+    located by binary search and decoded directly from the mapping. Segments
+    are preallocated to `segment_bytes`; when one fills up a new segment is
+    started and the oldest is deleted beyond `max_segments`.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 fields: Sequence[Tuple[str, str]] = METRIC_FIELDS,
+                 segment_bytes: int = 8 * 1024 * 1024,
+                 max_segments: int = 8):
+        """
+        Open (or create) a time-series directory.
+
+        Args:
+            directory: Where segment files are kept
+            fields: (name, struct code) pairs stored after the timestamp
+            segment_bytes: Size of each segment file
+            max_segments: Number of segment files to keep
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self.names = [name for name, _ in fields]
+        self.record = struct.Struct("<d" + "".join(code for _, code in fields))
+        self.segment_capacity = max(1, (segment_bytes - HEADER_SIZE) // self.record.size)
+        self.max_segments = max(1, max_segments)
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+
+        for path in sorted(self.directory.glob("metrics-*.ts")):
+            try:
+                segment = _Segment(path, self.record)
+            except (ValueError, OSError, struct.error) as e:
+                logger.warning(f"Skipping metrics segment {path.name}: {e}")
+                continue
+            self._segments.append(segment)
+        self._next_number = self._segment_number(self._segments[-1].path) + 1 if self._segments else 1
+
+    @staticmethod
+    def _segment_number(path: Path) -> int:
+        return int(path.stem.split("-")[1])
+
+    def _rotate(self) -> _Segment:
+        if self._segments:
+            self._segments[-1].flush()
+        path = self.directory / f"metrics-{self._next_number:06d}.ts"
+        self._next_number += 1
+        segment = _Segment(path, self.record, capacity=self.segment_capacity)
+        self._segments.append(segment)
+        while len(self._segments) > self.max_segments:
+            oldest = self._segments.pop(0)
+            oldest.close()
+            oldest.path.unlink()
+            logger.info(f"Removed metrics segment {oldest.path.name}")
+        return segment
+
+    def append(self, sample: Any) -> None:
+        """Append a sample (dict or dataclass with a `timestamp`); timestamps must not go backwards."""
+        values = sample if isinstance(sample, dict) else vars(sample)
+        timestamp = values.get("timestamp")
+        row = [time.time() if timestamp is None else timestamp]
+        for name, code in zip(self.names, self.record.format[2:]):
+            value = values.get(name)
+            row.append((math.nan if code == "d" else 0) if value is None else value)
+        with self._lock:
+            segment = self._segments[-1] if self._segments and not self._segments[-1].full else self._rotate()
+            segment.append(tuple(row))
+
+    def __len__(self) -> int:
+        return sum(segment.count for segment in self._segments)
+
+    def query(self,
+              start: Optional[float] = None,
+              end: Optional[float] = None,
+              step: Optional[float] = None,
+              fields: Optional[Sequence[str]] = None) -> Dict[str, List[Any]]:
+        """
+        Return samples between `start` and `end` (inclusive), optionally downsampled.
+
+        Args:
+            start: Earliest timestamp (defaults to the oldest sample)
+            end: Latest timestamp (defaults to now)
+            step: Bucket width in seconds; each bucket reports the mean of its
+                samples at the bucket start time (raw samples when omitted)
+            fields: Metric names to return (defaults to all)
+
+        Returns:
+            Dict with a "timestamp" list and one list per field
+        """
+        start = 0.0 if start is None else start
+        end = time.time() if end is None else end
+        fields = [f for f in (fields or self.names) if f in self.names]
+        columns = [self.names.index(f) + 1 for f in fields]
+        result: Dict[str, List[Any]] = {"timestamp": [], **{f: [] for f in fields}}
+
+        bucket = None
+        sums = [0.0] * len(columns)
+        counts = [0] * len(columns)
+
+        def emit() -> None:
+            result["timestamp"].append(bucket)
+            for i, name in enumerate(fields):
+                result[name].append(sums[i] / counts[i] if counts[i] else None)
+
+        with self._lock:
+            for segment in self._segments:
+                if not segment.count or segment.timestamp(segment.count - 1) < start or segment.timestamp(0) > end:
+                    continue
+                lo, hi = segment.bisect(start), segment.bisect(end, right=True)
+                for record in segment.records(lo, hi):
+                    if not step:
+                        result["timestamp"].append(record[0])
+                        for name, col in zip(fields, columns):
+                            value = record[col]
+                            result[name].append(None if value != value else value)
+                        continue
+                    record_bucket = record[0] - record[0] % step
+                    if record_bucket != bucket:
+                        if bucket is not None:
+                            emit()
+                        bucket = record_bucket
+                        sums = [0.0] * len(columns)
+                        counts = [0] * len(columns)
+                    for i, col in enumerate(columns):
+                        value = record[col]
+                        if value == value:  # skip NaN
+                            sums[i] += value
+                            counts[i] += 1
+        if step and bucket is not None:
+            emit()
+        return result
+
+    def disk_usage(self) -> int:
+        return sum(os.path.getsize(segment.path) for segment in self._segments)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._segments:
+                self._segments[-1].flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.flush()
+                segment.close()
+            self._segments = []
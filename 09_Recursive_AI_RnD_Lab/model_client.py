@@ -0,0 +1,492 @@
+import os
+import json
+import time
+import codecs
+import queue
+import logging
+import tempfile
+import threading
+import subprocess
+import http.client
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from process_registry import default_registry
+from loop_monitor import LoopDetection, LoopMonitor
+
+logger = logging.getLogger("model_client")
+
+
+class ModelClientError(RuntimeError):
+    """Raised when the model service fails to produce a response."""
+
+
+class ModelLoopError(ModelClientError):
+    """Raised when the loop monitor aborted a response as repetitive."""
+
+    def __init__(self, detection: LoopDetection):
+        super().__init__(f"Model output is looping ({detection.kind}): {detection.detail}")
+        self.detection = detection
+
+
+class ModelClient:
+    """
+    Base class for clients that turn a prompt into a raw model response.
+
+    Subclasses implement `generate`; `stream` yields the response in pieces as
+    it arrives and stops the generation when the caller closes the iterator.
+    `close` releases any long-lived resources.
+    """
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        yield self.generate(prompt)
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new request would have to wait for a free slot."""
+        return False
+
+
+class SubprocessModelClient(ModelClient):
+    """Invoke a model service command once per prompt (the original behaviour)."""
+
+    def __init__(self, model_service: str, model_endpoint: str, timeout: float = 60):
+        """
+        Initialize the subprocess client.
+
+        Args:
+            model_service: Command used to run the model
+            model_endpoint: Endpoint or model identifier passed to the command
+            timeout: Seconds to wait for the command to finish
+        """
+        self.model_service = model_service
+        self.model_endpoint = model_endpoint
+        self.timeout = timeout
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield stdout as it is produced; closing the iterator kills the process."""
+        cmd = [self.model_service, self.model_endpoint, prompt]
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            except OSError as e:
+                raise ModelClientError(f"Cannot start {self.model_service}: {e}") from e
+            default_registry.register(process.pid, "model_service", label=self.model_endpoint)
+            timed_out = threading.Event()
+
+            def _kill_on_timeout():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(self.timeout, _kill_on_timeout)
+            timer.daemon = True
+            timer.start()
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            try:
+                while True:
+                    data = os.read(process.stdout.fileno(), 4096)
+                    if not data:
+                        break
+                    text = decoder.decode(data)
+                    if text:
+                        yield text
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield tail
+
+                returncode = process.wait()
+                if timed_out.is_set():
+                    raise ModelClientError(f"Model execution timed out after {self.timeout}s") \
+                        from subprocess.TimeoutExpired(cmd, self.timeout)
+                if returncode != 0:
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode("utf-8", "replace")
+                    raise ModelClientError(f"Model execution failed: {stderr}")
+            finally:
+                timer.cancel()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+                default_registry.unregister(process.pid)
+
+
+class HTTPModelClient(ModelClient):
+    """
+    Long-lived HTTP client for a model server such as Ollama's /api/generate.
+
+    Connections are kept alive and pooled between calls, and a semaphore caps
+    the number of requests in flight so concurrent generations cannot overload
+    the model server.
+    """
+
+    def __init__(self,
+                 api_url: str,
+                 model_name: str,
+                 timeout: float = 60,
+                 pool_size: int = 4,
+                 max_concurrency: int = 4,
+                 options: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the HTTP client.
+
+        Args:
+            api_url: Full URL of the generate endpoint
+            model_name: Name of the model to request
+            timeout: Socket timeout in seconds for each request
+            pool_size: Maximum number of idle connections kept open
+            max_concurrency: Maximum number of requests in flight at once
+            options: Extra model parameters sent with every request
+        """
+        parsed = urlsplit(api_url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported model API URL: {api_url}")
+
+        self.api_url = api_url
+        self.model_name = model_name
+        self.timeout = timeout
+        self.options = options or {}
+        self._scheme = parsed.scheme
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._path = parsed.path or "/"
+        if parsed.query:
+            self._path += f"?{parsed.query}"
+
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max(1, pool_size))
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "connections_opened": 0, "connections_reused": 0}
+        self.in_flight = 0
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        with self._slots:
+            with self._stats_lock:
+                self.in_flight += 1
+            try:
+                yield
+            finally:
+                with self._stats_lock:
+                    self.in_flight -= 1
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.max_concurrency
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        self._count("connections_opened")
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _acquire_connection(self) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            conn = self._pool.get_nowait()
+            self._count("connections_reused")
+            return conn, True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release_connection(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _build_payload(self, prompt: str, stream: bool = False) -> bytes:
+        payload: Dict[str, Any] = {"model": self.model_name, "prompt": prompt, "stream": stream}
+        if self.options:
+            payload["options"] = self.options
+        return json.dumps(payload).encode("utf-8")
+
+    def _post(self, body: bytes) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Send a request on a pooled connection, retrying once if a reused
+        keep-alive connection turns out to have been closed by the server.
+
+        Returns:
+            Tuple of (connection, response) with the response unread
+        """
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        conn, reused = self._acquire_connection()
+        while True:
+            try:
+                conn.request("POST", self._path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except (http.client.HTTPException, ConnectionError) as e:
+                conn.close()
+                if not reused:
+                    raise ModelClientError(f"Model server request failed: {e}") from e
+                logger.debug(f"Stale keep-alive connection, reconnecting: {e}")
+                conn, reused = self._new_connection(), False
+            except OSError as e:
+                conn.close()
+                raise ModelClientError(f"Model server request failed: {e}") from e
+
+    @staticmethod
+    def _parse_response(data: Dict[str, Any]) -> str:
+        """Extract generated text from Ollama or OpenAI-style response bodies."""
+        if "response" in data:
+            return data["response"]
+        choices = data.get("choices")
+        if choices:
+            choice = choices[0]
+            if "text" in choice:
+                return choice["text"]
+            return choice.get("message", {}).get("content", "")
+        raise ModelClientError(f"Unrecognised model response: {list(data.keys())}")
+
+    def generate(self, prompt: str) -> str:
+        self._count("requests")
+        with self._slot():
+            try:
+                conn, response = self._post(self._build_payload(prompt))
+                try:
+                    raw = response.read()
+                except (http.client.HTTPException, OSError) as e:
+                    conn.close()
+                    raise ModelClientError(f"Failed reading model response: {e}") from e
+
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._release_connection(conn)
+
+                if response.status != 200:
+                    raise ModelClientError(
+                        f"Model server returned HTTP {response.status}: {raw[:200].decode('utf-8', 'replace')}")
+                try:
+                    return self._parse_response(json.loads(raw))
+                except json.JSONDecodeError as e:
+                    raise ModelClientError(f"Model server returned invalid JSON: {e}") from e
+            except ModelClientError:
+                self._count("errors")
+                raise
+
+    @staticmethod
+    def _parse_stream_line(line: bytes) -> Tuple[str, bool]:
+        """
+        Decode one line of a streamed response.
+
+        Handles Ollama's newline-delimited JSON and OpenAI-style server-sent
+        events (`data: {...}` / `data: [DONE]`).
+
+        Returns:
+            Tuple of (text_fragment, is_final)
+        """
+        line = line.strip()
+        if line.startswith(b"data:"):
+            line = line[len(b"data:"):].strip()
+            if line == b"[DONE]":
+                return "", True
+        if not line:
+            return "", False
+
+        data = json.loads(line)
+        if "response" in data:
+            return data["response"], bool(data.get("done"))
+        choices = data.get("choices") or [{}]
+        choice = choices[0]
+        text = choice.get("text") or choice.get("delta", {}).get("content") or ""
+        return text, choice.get("finish_reason") is not None
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yield response fragments as the server produces them.
+
+        A connection is only returned to the pool once the stream has been read
+        to the end; if the caller stops early the connection is closed, which
+        tells the model server to stop generating.
+        """
+        self._count("requests")
+        with self._slot():
+            try:
+                conn, response = self._post(self._build_payload(prompt, stream=True))
+            except ModelClientError:
+                self._count("errors")
+                raise
+            finished = False
+            try:
+                if response.status != 200:
+                    raw = response.read()
+                    self._count("errors")
+                    raise ModelClientError(
+                        f"Model server returned HTTP {response.status}: {raw[:200].decode('utf-8', 'replace')}")
+                while True:
+                    try:
+                        line = response.readline()
+                    except (http.client.HTTPException, OSError) as e:
+                        self._count("errors")
+                        raise ModelClientError(f"Failed reading model stream: {e}") from e
+                    if not line:
+                        break
+                    try:
+                        text, done = self._parse_stream_line(line)
+                    except json.JSONDecodeError as e:
+                        self._count("errors")
+                        raise ModelClientError(f"Model server returned invalid JSON: {e}") from e
+                    if text:
+                        yield text
+                    if done:
+                        break
+                response.read()
+                finished = True
+            finally:
+                if finished and not response.will_close:
+                    self._release_connection(conn)
+                else:
+                    conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class CodeFenceDetector:
+    """
+    Incrementally detect the first complete ```python block in a streamed response.
+
+    Only the newly arrived text (plus a few characters of overlap for fences
+    split across chunks) is scanned on each `feed` call.
+    """
+
+    OPEN_FENCE = "```python"
+    CLOSE_FENCE = "```"
+
+    def __init__(self):
+        self.text = ""
+        self.code: Optional[str] = None
+        self._code_start = -1
+        self._scan_from = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.code is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add a chunk of response text.
+
+        Returns:
+            True once a complete code block has been seen
+        """
+        if self.complete:
+            return True
+        self.text += chunk
+
+        if self._code_start < 0:
+            idx = self.text.find(self.OPEN_FENCE, max(0, self._scan_from - len(self.OPEN_FENCE) + 1))
+            if idx < 0:
+                self._scan_from = len(self.text)
+                return False
+            self._code_start = idx + len(self.OPEN_FENCE)
+            self._scan_from = self._code_start
+
+        end = self.text.find(self.CLOSE_FENCE, max(self._code_start, self._scan_from - len(self.CLOSE_FENCE) + 1))
+        if end < 0:
+            self._scan_from = len(self.text)
+            return False
+
+        self.code = self.text[self._code_start:end].strip()
+        self.text = self.text[:end + len(self.CLOSE_FENCE)]
+        return True
+
+
+@dataclass
+class GenerationStats:
+    """Timing information for one streamed generation."""
+    time_to_first_token: Optional[float] = None
+    time_to_code_complete: Optional[float] = None
+    total_time: float = 0.0
+    chunks: int = 0
+    stopped_early: bool = False
+    loop: Optional[LoopDetection] = None
+
+
+def stream_until_code_block(client: ModelClient, prompt: str, monitor: Optional[LoopMonitor] = None,
+                            parent: Optional[str] = None) -> Tuple[str, GenerationStats]:
+    """
+    Stream a response and stop generation as soon as one code block is complete.
+
+    Args:
+        client: Model client to stream from
+        prompt: Prompt to send
+        monitor: Loop monitor; generation also stops as soon as it fires
+        parent: Text the response rewrites, passed to the monitor
+
+    Returns:
+        Tuple of (response_text, stats); the text ends at the closing fence
+        when a code block was found, and `stats.loop` is set if the monitor fired
+    """
+    stats = GenerationStats()
+    detector = CodeFenceDetector()
+    watch = monitor.watch(parent) if monitor is not None else None
+    start = time.perf_counter()
+    chunks = client.stream(prompt)
+    try:
+        for chunk in chunks:
+            if stats.time_to_first_token is None:
+                stats.time_to_first_token = time.perf_counter() - start
+            stats.chunks += 1
+            done = detector.feed(chunk)
+            if watch is not None and watch.feed(chunk) is not None:
+                stats.stopped_early = True
+                break
+            if done:
+                stats.time_to_code_complete = time.perf_counter() - start
+                stats.stopped_early = True
+                break
+    finally:
+        chunks.close()
+    if watch is not None:
+        stats.loop = watch.close()
+    stats.total_time = time.perf_counter() - start
+    return detector.text, stats
+
+
+def create_model_client(config: Dict[str, Any]) -> Optional[ModelClient]:
+    """
+    Build the preferred model client for a configuration.
+
+    An HTTP client is used when `api_url` is configured; otherwise the
+    `model_service` command is wrapped in a subprocess client.
+
+    Args:
+        config: Parsed contents of config.json
+
+    Returns:
+        A model client, or None if the configuration names no model backend
+    """
+    timeout = config.get("model_timeout", 60)
+    if config.get("api_url"):
+        return HTTPModelClient(
+            api_url=config["api_url"],
+            model_name=config.get("model_name", ""),
+            timeout=timeout,
+            pool_size=config.get("model_pool_size", 4),
+            max_concurrency=config.get("model_max_concurrency", 4),
+            options=config.get("model_parameters")
+        )
+    if config.get("model_service"):
+        return SubprocessModelClient(config["model_service"], config.get("model_endpoint", ""), timeout)
+    return None
@@ -0,0 +1,137 @@
+import math
+import heapq
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_NGRAMS = (3, 4)
+
+
+def ngram_counts(text: str, ngrams: Sequence[int] = DEFAULT_NGRAMS) -> Dict[str, int]:
+    """
+    Count the character n-grams of the case- and whitespace-folded text.
+
+    Words are padded with spaces, so n-grams at word boundaries are distinct
+    from those inside words. The n-grams themselves are the feature keys:
+    in a sparse dict representation the dict's hashing plays the role of
+    the feature-hashing trick, without its collisions.
+    """
+    text = " " + " ".join(text.lower().split()) + " "
+    counts: Counter = Counter()
+    for n in ngrams:
+        counts.update(map(text.__getitem__, map(slice, range(len(text) - n + 1), range(n, len(text) + 1))))
+    return counts
+
+
+class NgramIndex:
+    """
+    Cosine similarity search over character n-gram vectors.
+
+    Character n-grams match across inflections and small rewordings
+    ("recursing" / "recursion", "self-referential" / "self reference")
+    without a model or network access. Document vectors use sublinear tf
+    times idf and are L2-normalized when the index is built, then stored as
+    one sparse matrix in column-major (feature -> postings) form: two flat
+    `array`s of document ids and weights plus an offset per feature. Scoring
+    a query is a sparse matrix-vector product that touches only the
+    postings of the query's own features; `search_batch` walks each
+    feature's postings once for all queries that share it.
+
+    With `approximate`, features occurring in more than `max_df` of the
+    documents are skipped at query time. They carry little weight (low idf)
+    but have the longest postings, so large libraries get much faster at a
+    small cost in score accuracy.
+    """
+
+    def __init__(self, texts: Sequence[str], ngrams: Sequence[int] = DEFAULT_NGRAMS,
+                 approximate: Optional[bool] = None, approximate_above: int = 20000, max_df: float = 0.05):
+        """
+        Build the index.
+
+        Args:
+            texts: Documents; results refer to them by position
+            ngrams: Character n-gram lengths
+            approximate: Skip common features at query time (default: only
+                when there are more than `approximate_above` documents)
+            approximate_above: Document count from which `approximate` defaults to on
+            max_df: Document-frequency fraction above which a feature is common
+        """
+        self.ngrams = tuple(ngrams)
+        self.size = len(texts)
+        self.approximate = self.size > approximate_above if approximate is None else approximate
+        self.max_postings = max(1, int(max_df * self.size))
+
+        doc_counts = [ngram_counts(text, self.ngrams) for text in texts]
+        df: Dict[str, int] = {}
+        for counts in doc_counts:
+            for feature in counts:
+                df[feature] = df.get(feature, 0) + 1
+        self.idf = {feature: math.log((1 + self.size) / (1 + n)) + 1 for feature, n in df.items()}
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc, counts in enumerate(doc_counts):
+            vector = self._weigh(counts)
+            for feature, weight in vector.items():
+                postings.setdefault(feature, []).append((doc, weight))
+
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._docs = array("l")
+        self._weights = array("d")
+        for feature, entries in postings.items():
+            start = len(self._docs)
+            self._docs.extend(doc for doc, _ in entries)
+            self._weights.extend(weight for _, weight in entries)
+            self._offsets[feature] = (start, len(self._docs))
+
+    def _weigh(self, counts: Dict[str, int]) -> Dict[str, float]:
+        vector = {feature: (1 + math.log(count)) * self.idf[feature]
+                  for feature, count in counts.items() if feature in self.idf}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {feature: w / norm for feature, w in vector.items()} if norm else {}
+
+    def vectorize(self, text: str) -> Dict[str, float]:
+        """The normalized query vector (features unseen in the index are dropped: they score nothing)."""
+        return self._weigh(ngram_counts(text, self.ngrams))
+
+    def _postings(self, feature: str) -> Optional[Tuple[int, int]]:
+        span = self._offsets.get(feature)
+        if span is None or (self.approximate and span[1] - span[0] > self.max_postings):
+            return None
+        return span
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Return up to `k` (document index, cosine similarity) pairs, best first.
+        """
+        scores: Dict[int, float] = {}
+        docs, weights = self._docs, self._weights
+        for feature, q in self.vectorize(query).items():
+            span = self._postings(feature)
+            if span is None:
+                continue
+            for doc, w in zip(docs[span[0]:span[1]], weights[span[0]:span[1]]):
+                scores[doc] = scores.get(doc, 0.0) + q * w
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def search_batch(self, queries: Sequence[str], k: int = 5) -> List[List[Tuple[int, float]]]:
+        """Like `search` for many queries, reading each shared feature's postings once."""
+        by_feature: Dict[str, List[Tuple[int, float]]] = {}
+        for qi, query in enumerate(queries):
+            for feature, q in self.vectorize(query).items():
+                by_feature.setdefault(feature, []).append((qi, q))
+
+        scores: List[Dict[int, float]] = [{} for _ in queries]
+        docs, weights = self._docs, self._weights
+        for feature, users in by_feature.items():
+            span = self._postings(feature)
+            if span is None:
+                continue
+            column = list(zip(docs[span[0]:span[1]], weights[span[0]:span[1]]))
+            for qi, q in users:
+                row = scores[qi]
+                for doc, w in column:
+                    row[doc] = row.get(doc, 0.0) + q * w
+        return [heapq.nlargest(k, row.items(), key=lambda item: item[1]) for row in scores]
+
+    def __len__(self) -> int:
+        return self.size
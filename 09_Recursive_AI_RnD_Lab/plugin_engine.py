@@ -0,0 +1,409 @@
+import time
+import queue
+import bisect
+import logging
+import threading
+import multiprocessing
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from plugin_registry import PluginRegistry
+from process_registry import default_registry as process_registry
+
+logger = logging.getLogger("plugin_engine")
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                                      0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Recording is a bisect and an increment, and memory does not grow with
+    the number of calls. Quantiles are estimated as the upper bound of the
+    bucket they fall in.
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        i = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.total
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max if count else None,
+            # Cumulative counts per upper bound, as in Prometheus histograms
+            "buckets": [[le, sum(counts[:i + 1])] for i, le in enumerate(self.bounds)] + [["+Inf", count]]
+        }
+
+
+@dataclass
+class PluginStats:
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    detections: int = 0
+    overdue: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "errors": self.errors, "timeouts": self.timeouts,
+                "skipped": self.skipped, "detections": self.detections, "overdue": self.overdue,
+                "latency": self.latency.snapshot()}
+
+
+@dataclass
+class PluginOutcome:
+    """What one plugin did with one prompt."""
+    plugin: str
+    status: str  # "ok", "error", "timeout" or "skipped"
+    elapsed: float = 0.0
+    report: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def message(self) -> Optional[str]:
+        return self.report.get("message") if self.report else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ChainResult:
+    """Outcome of running a prompt through the chain; `detected` is the deciding outcome, if any."""
+    detected: Optional[PluginOutcome]
+    outcomes: List[PluginOutcome]
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = self.detected.report if self.detected else {}
+        return {
+            "paradox_detected": self.detected is not None,
+            "plugin": self.detected.plugin if self.detected else None,
+            "category": report.get("category"),
+            "message": report.get("message"),
+            "matches": report.get("matches", []),
+            "plugins": [{"plugin": o.plugin, "status": o.status, "elapsed": o.elapsed, "error": o.error}
+                        for o in self.outcomes]
+        }
+
+
+class PluginTimeout(Exception):
+    pass
+
+
+class _IsolatedWorker:
+    """A forked process that runs plugins from a copy of the registry, one call at a time."""
+
+    def __init__(self, registry: PluginRegistry, names: Iterable[str]):
+        # Import the plugins before forking: the child must not need the
+        # registry lock, which another thread may hold at the moment of the fork
+        for name in names:
+            registry.get(name)
+        self.generation = registry.generation
+        ctx = multiprocessing.get_context("fork")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=self._serve, args=(child_conn, registry),
+                                   name="plugin-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        process_registry.register(self.process.pid, "plugin", label="plugin-worker")
+
+    @staticmethod
+    def _serve(conn: Any, registry: PluginRegistry) -> None:
+        while True:
+            try:
+                name, prompt = conn.recv()
+            except EOFError:
+                return
+            try:
+                conn.send(("ok", registry.reporter(name)(prompt)))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    def call(self, name: str, prompt: str, timeout: float) -> Dict[str, Any]:
+        self.conn.send((name, prompt))
+        if not self.conn.poll(timeout):
+            raise PluginTimeout(f"no result within {timeout:g}s")
+        status, value = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        process_registry.unregister(self.process.pid)
+
+
+class PluginEngine:
+    """
+    Runs prompts through the registered plugins with deadlines and instrumentation.
+
+    In "ordered" mode plugins run one after another and, with
+    `short_circuit`, the first detection ends the chain. In "fanout" mode
+    all plugins start at once and the first detection (or the last plugin
+    to finish) returns.
+
+    Calls run on a shared thread pool and the caller waits at most the
+    plugin's deadline. A call that overruns is reported as a timeout and
+    left to finish in the background; once a plugin has `max_overdue`
+    such calls outstanding, further calls to it are skipped instead of
+    queueing, so a hanging plugin ties up a bounded number of threads and
+    every other plugin keeps running. Plugins listed as `isolated` run in
+    forked worker processes instead, and a worker that overruns is killed.
+    """
+
+    def __init__(self, registry: PluginRegistry, chain: Optional[List[str]] = None, mode: str = "ordered",
+                 deadline: float = 1.0, deadlines: Optional[Dict[str, float]] = None,
+                 isolated: Iterable[str] = (), workers: int = 8, max_overdue: int = 2,
+                 process_workers: int = 2):
+        """
+        Create the engine; worker processes start on first use.
+
+        Args:
+            registry: Plugins to run
+            chain: Plugin names in chain order (default: every registered plugin)
+            mode: "ordered" or "fanout"
+            deadline: Default per-call deadline in seconds
+            deadlines: Per-plugin deadline overrides
+            isolated: Plugins to run in worker processes
+            workers: Threads shared by all in-process calls
+            max_overdue: Calls per plugin still running past their deadline before new calls are skipped
+            process_workers: Worker processes for isolated plugins
+        """
+        if mode not in ("ordered", "fanout"):
+            raise ValueError(f"Unknown chain mode: {mode}")
+        self.registry = registry
+        self.chain = list(chain) if chain is not None else None
+        self.mode = mode
+        self.deadline = deadline
+        self.deadlines = dict(deadlines or {})
+        self.max_overdue = max(1, max_overdue)
+        self.process_workers = max(1, process_workers)
+        self.isolated = set(isolated) if "fork" in multiprocessing.get_all_start_methods() else set()
+        self.stats: Dict[str, PluginStats] = {}
+        self._stats_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plugin")
+        # Idle worker processes, plus None for each slot whose process has not been started yet
+        self._workers: "queue.Queue[Optional[_IsolatedWorker]]" = queue.Queue()
+        for _ in range(self.process_workers):
+            self._workers.put(None)
+
+    def names(self) -> List[str]:
+        return [name for name in (self.chain if self.chain is not None else self.registry) if name in self.registry]
+
+    def _stats(self, name: str) -> PluginStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            with self._stats_lock:
+                stats = self.stats.setdefault(name, PluginStats())
+        return stats
+
+    def _count(self, name: str, counter: str, delta: int = 1) -> None:
+        stats = self._stats(name)
+        with self._stats_lock:
+            setattr(stats, counter, getattr(stats, counter) + delta)
+
+    def _checkout(self, timeout: float) -> Optional[_IsolatedWorker]:
+        try:
+            worker = self._workers.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        try:
+            if worker is None:
+                return _IsolatedWorker(self.registry, self.isolated)
+            if worker.generation != self.registry.generation:
+                # A plugin was reloaded since this worker forked
+                worker.kill()
+                return _IsolatedWorker(self.registry, self.isolated)
+        except Exception:
+            self._workers.put(None)
+            raise
+        return worker
+
+    def _run_isolated(self, name: str, prompt: str, deadline: float) -> Dict[str, Any]:
+        start = time.monotonic()
+        worker = self._checkout(deadline)
+        if worker is None:
+            raise PluginTimeout("no worker process free")
+        try:
+            result = worker.call(name, prompt, max(0.0, deadline - (time.monotonic() - start)))
+        except (PluginTimeout, EOFError, OSError):
+            worker.kill()
+            self._workers.put(None)
+            raise
+        except Exception:
+            self._workers.put(worker)
+            raise
+        self._workers.put(worker)
+        return result
+
+    def _call(self, name: str, prompt: str, deadline: float) -> Dict[str, Any]:
+        """Runs on a pool thread; records the call's latency even if the caller stopped waiting."""
+        start = time.perf_counter()
+        try:
+            if name in self.isolated:
+                return self._run_isolated(name, prompt, deadline)
+            return self.registry.reporter(name)(prompt)
+        except PluginTimeout:
+            raise
+        except Exception:
+            self._count(name, "errors")
+            raise
+        finally:
+            self._stats(name).latency.record(time.perf_counter() - start)
+
+    def _start(self, name: str, prompt: str) -> Optional["Future[Dict[str, Any]]"]:
+        stats = self._stats(name)
+        with self._stats_lock:
+            if stats.overdue >= self.max_overdue:
+                stats.skipped += 1
+                return None
+            stats.calls += 1
+        return self._pool.submit(self._call, name, prompt, self.deadlines.get(name, self.deadline))
+
+    def _overdue(self, name: str, future: Future) -> None:
+        """Count a timeout and keep the call counted as overdue until it finishes."""
+        stats = self._stats(name)
+        with self._stats_lock:
+            stats.timeouts += 1
+            stats.overdue += 1
+        # Runs immediately if the call finished in the meantime
+        future.add_done_callback(lambda _: self._count(name, "overdue", -1))
+
+    def _outcome(self, name: str, future: Optional[Future], started: float,
+                 timeout: Optional[float]) -> PluginOutcome:
+        if future is None:
+            return PluginOutcome(name, "skipped", error=f"{self.max_overdue} calls still running past their deadline")
+        try:
+            report = future.result(timeout=timeout)
+        except FutureTimeout:
+            self._overdue(name, future)
+            return PluginOutcome(name, "timeout", time.perf_counter() - started,
+                                 error=f"no result within {self.deadlines.get(name, self.deadline):g}s")
+        except PluginTimeout as e:
+            self._count(name, "timeouts")
+            return PluginOutcome(name, "timeout", time.perf_counter() - started, error=str(e))
+        except Exception as e:
+            return PluginOutcome(name, "error", time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+        outcome = PluginOutcome(name, "ok", time.perf_counter() - started, report=report)
+        if outcome.message:
+            self._count(name, "detections")
+        return outcome
+
+    def run(self, prompt: str, short_circuit: bool = True) -> ChainResult:
+        """
+        Run `prompt` through the chain.
+
+        Args:
+            prompt: Text to screen
+            short_circuit: Stop at the first plugin that reports a message
+
+        Returns:
+            ChainResult with the deciding outcome (the first detection in
+            chain order for "ordered", the first to arrive for "fanout")
+        """
+        names = self.names()
+        if self.mode == "fanout":
+            return self._run_fanout(names, prompt, short_circuit)
+        outcomes = []
+        detected = None
+        for name in names:
+            started = time.perf_counter()
+            outcome = self._outcome(name, self._start(name, prompt), started, self.deadlines.get(name, self.deadline))
+            outcomes.append(outcome)
+            if outcome.message and detected is None:
+                detected = outcome
+                if short_circuit:
+                    break
+        return ChainResult(detected, outcomes)
+
+    def _run_fanout(self, names: List[str], prompt: str, short_circuit: bool) -> ChainResult:
+        started = time.perf_counter()
+        futures = {name: self._start(name, prompt) for name in names}
+        pending = {future: name for name, future in futures.items() if future is not None}
+        results: Dict[str, PluginOutcome] = {name: self._outcome(name, None, started, 0)
+                                             for name, future in futures.items() if future is None}
+        detected = None
+        end = started + max((self.deadlines.get(n, self.deadline) for n in names), default=0)
+        while pending and not (short_circuit and detected):
+            done, _ = wait(pending, timeout=max(0.0, end - time.perf_counter()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = pending.pop(future)
+                results[name] = outcome = self._outcome(name, future, started, 0)
+                if outcome.message and detected is None:
+                    detected = outcome
+        for future, name in pending.items():
+            # Short-circuited calls finish in the background; overdue ones count as timeouts
+            deadline = self.deadlines.get(name, self.deadline)
+            if time.perf_counter() - started >= deadline:
+                self._overdue(name, future)
+                results[name] = PluginOutcome(name, "timeout", time.perf_counter() - started,
+                                              error=f"no result within {deadline:g}s")
+        return ChainResult(detected, [results[name] for name in names if name in results])
+
+    def record(self, name: str, status: str, elapsed: float, detected: bool = False) -> None:
+        """Count a call that ran outside the engine (e.g. in a batch screening worker)."""
+        stats = self._stats(name)
+        with self._stats_lock:
+            stats.calls += 1
+            if status == "error":
+                stats.errors += 1
+            elif status == "timeout":
+                stats.timeouts += 1
+            if detected:
+                stats.detections += 1
+        stats.latency.record(elapsed)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-plugin call, error, timeout and detection counts with latency histograms."""
+        return {name: stats.to_dict() for name, stats in sorted(self.stats.items())}
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                worker = self._workers.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.kill()
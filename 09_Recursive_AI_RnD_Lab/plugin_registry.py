@@ -0,0 +1,311 @@
+import json
+import hashlib
+import logging
+import threading
+import itertools
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+from dataclasses import dataclass, field
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Any, Iterator, Optional, Tuple
+
+logger = logging.getLogger("plugin_registry")
+
+MANIFEST_FILE = "manifest.json"
+
+
+@dataclass
+class PluginSpec:
+    """A manifest entry: what to import for a plugin, without importing it."""
+    name: str
+    path: Path
+    entrypoint: Optional[str] = None  # attribute to call; None picks `handle`, then `register_plugin()`
+    capabilities: List[str] = field(default_factory=list)
+    watch: List[Path] = field(default_factory=list)  # data files whose changes also reload the plugin
+
+    @property
+    def files(self) -> List[Path]:
+        return [self.path] + self.watch
+
+
+@dataclass
+class _Loaded:
+    module: Optional[ModuleType]
+    handler: Optional[Callable[..., Any]]
+    stamp: Tuple[Any, ...]
+    digest: str
+    error: Optional[str] = None
+
+
+def _stamp(files: List[Path]) -> Tuple[Any, ...]:
+    stamps = []
+    for path in files:
+        try:
+            st = path.stat()
+            stamps.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def _digest(files: List[Path]) -> str:
+    sha = hashlib.sha256()
+    for path in files:
+        try:
+            sha.update(path.read_bytes())
+        except OSError:
+            pass
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def reporter(module: ModuleType, handler: Optional[Callable[..., Any]] = None) -> Callable[[str], Dict[str, Any]]:
+    """
+    Adapt a plugin to return a scan()-style report.
+
+    Plugins that define `scan` already return {"category", "message",
+    "matches"}; for the others the handler's message is wrapped in one.
+    """
+    if hasattr(module, "scan"):
+        return module.scan
+    if handler is None:
+        handler = module.handle if hasattr(module, "handle") else module.register_plugin()
+    return lambda prompt: {"category": None, "message": handler(prompt), "matches": []}
+
+
+class PluginRegistry(Mapping):
+    """
+    Strategy plugins indexed from a manifest, imported on first use.
+
+    Startup only reads `manifest.json` and lists the directory; plugin files
+    without a manifest entry are registered under their file name. The
+    registry is a read-only mapping of plugin name -> callable (the
+    `handle` function or whatever `register_plugin()` returns), so it can
+    stand in for the old `plugins` dict; `modules` maps names to the
+    imported modules the same way.
+
+    `refresh` (run periodically by `watch`) reloads any imported plugin
+    whose file, or one of its watched data files, changed content. The new
+    version is imported completely before it replaces the old one with a
+    single assignment, so a call already running keeps the version it
+    started with and a plugin that fails to import keeps serving the
+    previous version.
+    """
+
+    def __init__(self, plugin_dir: Path, manifest: str = MANIFEST_FILE):
+        """
+        Index the plugins in `plugin_dir`.
+
+        Args:
+            plugin_dir: Directory holding the plugin files and manifest
+            manifest: Manifest file name within `plugin_dir`
+        """
+        self.plugin_dir = Path(plugin_dir)
+        self.manifest_path = self.plugin_dir / manifest
+        self.specs: Dict[str, PluginSpec] = {}
+        self._loaded: Dict[str, _Loaded] = {}
+        self._lock = threading.RLock()
+        self._manifest_stamp: Tuple[Any, ...] = ()
+        self._files: List[Path] = []
+        # Bumped with a fresh value whenever a plugin is added, removed or swapped
+        self._generations = itertools.count(1)
+        self.generation = 0
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.modules = _ModuleView(self)
+        self._scan()
+
+    def _read_manifest(self) -> Dict[str, PluginSpec]:
+        specs: Dict[str, PluginSpec] = {}
+        if not self.manifest_path.exists():
+            return specs
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("plugins", [])
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading plugin manifest {self.manifest_path}: {e}")
+            return specs
+        for entry in entries:
+            module, _, attr = entry.get("entrypoint", entry["name"]).partition(":")
+            specs[entry["name"]] = PluginSpec(
+                name=entry["name"],
+                path=self.plugin_dir / f"{module}.py",
+                entrypoint=attr or None,
+                capabilities=list(entry.get("capabilities", [])),
+                watch=[self.plugin_dir / p for p in entry.get("watch", [])]
+            )
+        return specs
+
+    def _listing(self) -> List[Path]:
+        if not self.plugin_dir.exists():
+            return []
+        return sorted(p for p in self.plugin_dir.glob("*.py") if not p.name.startswith("__"))
+
+    def _scan(self) -> bool:
+        """Rebuild the index from the manifest and directory listing; True if the set of plugins changed."""
+        if not self.plugin_dir.exists():
+            logger.warning(f"Plugin directory {self.plugin_dir} not found")
+        self._manifest_stamp = _stamp([self.manifest_path])
+        self._files = self._listing()
+        specs = self._read_manifest()
+        listed = {spec.path for spec in specs.values()}
+        for path in self._files:
+            if path not in listed:
+                specs.setdefault(path.stem, PluginSpec(name=path.stem, path=path))
+        with self._lock:
+            changed = specs != self.specs
+            if changed:
+                for name in set(self._loaded) - set(specs):
+                    del self._loaded[name]
+                for name, spec in specs.items():
+                    if name in self._loaded and self.specs.get(name) != spec:
+                        del self._loaded[name]  # re-import with the new entrypoint on next use
+                self.specs = specs
+                self.generation = next(self._generations)
+        return changed
+
+    def _import(self, spec: PluginSpec) -> _Loaded:
+        files = spec.files
+        stamp, digest = _stamp(files), _digest(files)
+        try:
+            module_spec = importlib.util.spec_from_file_location(spec.name, spec.path)
+            if module_spec is None or module_spec.loader is None:
+                raise ImportError(f"Failed to create spec for {spec.path}")
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+            if spec.entrypoint == "register_plugin" or (spec.entrypoint is None and not hasattr(module, "handle")
+                                                        and hasattr(module, "register_plugin")):
+                handler = module.register_plugin()
+            elif spec.entrypoint is None and not hasattr(module, "handle"):
+                raise AttributeError("no 'handle' or 'register_plugin' function")
+            else:
+                handler = getattr(module, spec.entrypoint or "handle")
+            if not callable(handler):
+                raise TypeError(f"entrypoint {spec.entrypoint or 'register_plugin()'} is not callable")
+        except Exception as e:
+            logger.error(f"Error loading plugin {spec.path}: {e}")
+            return _Loaded(None, None, stamp, digest, error=f"{type(e).__name__}: {e}")
+        logger.info(f"Loaded plugin {spec.name} from {spec.path.name}")
+        return _Loaded(module, handler, stamp, digest)
+
+    def _entry(self, name: str) -> _Loaded:
+        loaded = self._loaded.get(name)
+        if loaded is None:
+            with self._lock:
+                loaded = self._loaded.get(name)
+                if loaded is None:
+                    if name not in self.specs:
+                        raise KeyError(name)
+                    loaded = self._loaded[name] = self._import(self.specs[name])
+        if loaded.handler is None:
+            # Stays unavailable until its file changes (see refresh)
+            raise KeyError(name)
+        return loaded
+
+    def __getitem__(self, name: str) -> Callable[..., Any]:
+        return self._entry(name).handler
+
+    def __contains__(self, name: object) -> bool:
+        # Mapping's default would import the plugin just to test membership
+        return name in self.specs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.specs))
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def reporter(self, name: str) -> Callable[[str], Dict[str, Any]]:
+        """The current version of a plugin, adapted by `reporter`."""
+        entry = self._entry(name)
+        return reporter(entry.module, entry.handler)
+
+    def names(self, capability: Optional[str] = None) -> List[str]:
+        """Plugin names, optionally only those declaring `capability` in the manifest."""
+        return [name for name, spec in self.specs.items()
+                if capability is None or capability in spec.capabilities]
+
+    def loaded(self) -> List[str]:
+        """Names of the plugins imported so far."""
+        return [name for name, loaded in self._loaded.items() if loaded.handler is not None]
+
+    def refresh(self) -> List[str]:
+        """
+        Pick up manifest and plugin file changes.
+
+        Imported plugins whose files changed content are re-imported and
+        swapped in; a touched but unchanged file only updates its stamp.
+
+        Returns:
+            Names of the plugins that were reloaded
+        """
+        if _stamp([self.manifest_path]) != self._manifest_stamp or self._listing() != self._files:
+            self._scan()
+
+        reloaded = []
+        for name, loaded in list(self._loaded.items()):
+            spec = self.specs.get(name)
+            if spec is None:
+                continue
+            files = spec.files
+            stamp = _stamp(files)
+            if stamp == loaded.stamp:
+                continue
+            if _digest(files) == loaded.digest:
+                loaded.stamp = stamp
+                continue
+            fresh = self._import(spec)
+            with self._lock:
+                if self._loaded.get(name) is not loaded:
+                    continue  # replaced concurrently
+                if fresh.handler is None and loaded.handler is not None:
+                    # Keep serving the working version; retry when the file changes again
+                    loaded.stamp, loaded.digest = fresh.stamp, fresh.digest
+                    continue
+                self._loaded[name] = fresh
+                self.generation = next(self._generations)
+            reloaded.append(name)
+            logger.info(f"Reloaded plugin {name}")
+        return reloaded
+
+    def watch(self, interval: float = 2.0) -> "PluginRegistry":
+        """Call `refresh` every `interval` seconds on a daemon thread."""
+        if self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                             name="plugin-watcher", daemon=True)
+            self._watcher.start()
+        return self
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing plugins: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+class _ModuleView(Mapping):
+    """Plugin name -> imported module, loading on first access like the registry itself."""
+
+    def __init__(self, registry: PluginRegistry):
+        self.registry = registry
+
+    def __getitem__(self, name: str) -> ModuleType:
+        return self.registry._entry(name).module
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.registry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.registry)
+
+    def __len__(self) -> int:
+        return len(self.registry)
@@ -0,0 +1,239 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Iterator, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger("process_registry")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class ProcessInfo:
+    """A tracked process and its most recent resource sample."""
+    pid: int
+    kind: str
+    label: str = ""
+    job_id: Optional[str] = None
+    started: float = field(default_factory=time.time)
+    cpu_percent: float = 0.0
+    cpu_time: float = 0.0
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    read_bytes: int = 0
+    write_bytes: int = 0
+    num_threads: int = 0
+    sampled: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class JobUsage:
+    """Resources used by all processes that ran on behalf of one job."""
+    job_id: str
+    processes: int = 0
+    cpu_time: float = 0.0
+    peak_rss_mb: float = 0.0
+    read_bytes: int = 0
+    write_bytes: int = 0
+
+
+def _read_proc(pid: int) -> Optional[Dict[str, Any]]:
+    """Sample a process from /proc (used when psutil is not installed)."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read().decode("ascii", "replace")
+    except OSError:
+        return None
+    # The command name may contain spaces, so split after its closing parenthesis
+    fields = stat[stat.rindex(")") + 2:].split()
+    if fields[0] in ("Z", "X"):
+        return None
+    sample = {
+        "cpu_time": (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS,
+        "num_threads": int(fields[17]),
+        "rss_mb": int(fields[21]) * _PAGE_SIZE / (1024 * 1024),
+        "read_bytes": 0,
+        "write_bytes": 0
+    }
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("read_bytes", "write_bytes"):
+                    sample[key] = int(value)
+    except OSError:
+        pass  # /proc/<pid>/io is not readable for other users' processes
+    return sample
+
+
+def _read_psutil(handle: Any) -> Optional[Dict[str, Any]]:
+    try:
+        with handle.oneshot():
+            if handle.status() == psutil.STATUS_ZOMBIE:
+                return None
+            times = handle.cpu_times()
+            sample = {
+                "cpu_time": times.user + times.system,
+                "num_threads": handle.num_threads(),
+                "rss_mb": handle.memory_info().rss / (1024 * 1024),
+                "read_bytes": 0,
+                "write_bytes": 0
+            }
+            try:
+                io = handle.io_counters()
+                sample["read_bytes"], sample["write_bytes"] = io.read_bytes, io.write_bytes
+            except (AttributeError, psutil.AccessDenied):
+                pass
+            return sample
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+class ProcessRegistry:
+    """
+    Registry of the processes the lab starts, sampled for per-process usage.
+
+    Code that spawns a process registers its PID with a kind ("sandbox",
+    "training", "model_service", ...). Processes registered while a
+    `job_scope` is active on the current thread are attributed to that job.
+    `sample` reads CPU time, RSS, IO and thread counts for every registered
+    PID (via psutil when available, /proc otherwise); processes that exited
+    are dropped and their last figures folded into their job's totals.
+    """
+
+    def __init__(self, max_jobs: int = 500):
+        self._lock = threading.Lock()
+        self._processes: Dict[int, ProcessInfo] = {}
+        self._handles: Dict[int, Any] = {}
+        self._jobs: "OrderedDict[str, JobUsage]" = OrderedDict()
+        self._local = threading.local()
+        self.max_jobs = max_jobs
+
+    @contextmanager
+    def job_scope(self, job_id: Optional[str]) -> Iterator[None]:
+        """Attribute processes registered on this thread to `job_id`."""
+        previous = getattr(self._local, "job_id", None)
+        self._local.job_id = job_id
+        try:
+            yield
+        finally:
+            self._local.job_id = previous
+
+    def current_job(self) -> Optional[str]:
+        return getattr(self._local, "job_id", None)
+
+    def register(self, pid: int, kind: str, label: str = "", job_id: Optional[str] = None) -> ProcessInfo:
+        info = ProcessInfo(pid=pid, kind=kind, label=label, job_id=job_id or self.current_job())
+        with self._lock:
+            self._processes[pid] = info
+            if info.job_id is not None:
+                self._job(info.job_id).processes += 1
+        return info
+
+    def unregister(self, pid: int, usage: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Stop tracking a process.
+
+        Args:
+            pid: Process id
+            usage: Exact final figures (e.g. from wait4) to record instead of the last sample
+        """
+        with self._lock:
+            info = self._processes.pop(pid, None)
+            self._handles.pop(pid, None)
+            if info is None:
+                return
+            if usage:
+                info.cpu_time = usage.get("cpu_time", info.cpu_time)
+                info.peak_rss_mb = max(info.peak_rss_mb, usage.get("peak_rss_mb", 0.0))
+            if info.job_id is not None:
+                job = self._job(info.job_id)
+                job.cpu_time += info.cpu_time
+                job.peak_rss_mb = max(job.peak_rss_mb, info.peak_rss_mb)
+                job.read_bytes += info.read_bytes
+                job.write_bytes += info.write_bytes
+
+    def _job(self, job_id: str) -> JobUsage:
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._jobs[job_id] = JobUsage(job_id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def _read(self, pid: int) -> Optional[Dict[str, Any]]:
+        if psutil is None:
+            return _read_proc(pid)
+        handle = self._handles.get(pid)
+        if handle is None:
+            try:
+                handle = self._handles[pid] = psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                return None
+        return _read_psutil(handle)
+
+    def sample(self) -> List[ProcessInfo]:
+        """Refresh every registered process; returns the live ones."""
+        now = time.time()
+        with self._lock:
+            pids = list(self._processes)
+        live, gone = [], []
+        for pid in pids:
+            stats = self._read(pid)
+            info = self._processes.get(pid)
+            if info is None:
+                continue
+            if stats is None:
+                gone.append(pid)
+                continue
+            if info.sampled is not None and now > info.sampled:
+                info.cpu_percent = max(0.0, (stats["cpu_time"] - info.cpu_time) / (now - info.sampled) * 100)
+            info.cpu_time = stats["cpu_time"]
+            info.rss_mb = stats["rss_mb"]
+            info.peak_rss_mb = max(info.peak_rss_mb, stats["rss_mb"])
+            info.read_bytes = stats["read_bytes"]
+            info.write_bytes = stats["write_bytes"]
+            info.num_threads = stats["num_threads"]
+            info.sampled = now
+            live.append(info)
+        for pid in gone:
+            self.unregister(pid)
+        return live
+
+    def processes(self, kind: Optional[str] = None, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [info.to_dict() for info in self._processes.values()
+                    if (kind is None or info.kind == kind) and (job_id is None or info.job_id == job_id)]
+
+    def job_usage(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Totals for a job: finished processes plus the latest sample of running ones."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            usage = asdict(job)
+            active = [info for info in self._processes.values() if info.job_id == job_id]
+            usage["active"] = len(active)
+            for info in active:
+                usage["cpu_time"] += info.cpu_time
+                usage["peak_rss_mb"] = max(usage["peak_rss_mb"], info.peak_rss_mb)
+                usage["read_bytes"] += info.read_bytes
+                usage["write_bytes"] += info.write_bytes
+            return usage
+
+
+# Shared registry for everything running in this interpreter
+default_registry = ProcessRegistry()
@@ -0,0 +1,425 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import subprocess
+import importlib.util
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Deque, Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+from plugin_engine import PluginEngine
+from plugin_registry import PluginRegistry, reporter
+from process_registry import default_registry as process_registry
+
+logger = logging.getLogger("prompt_screen")
+
+PLUGIN_DIR = Path(__file__).parent / "strategy_plugins"
+DEFAULT_CHAIN = ["handle_paradox"]
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"}
+
+# (id, prompt, error): exactly one of prompt and error is set
+BatchItem = Tuple[Any, Optional[str], Optional[str]]
+Chain = List[Tuple[str, Callable[[str], Dict[str, Any]]]]
+# (plugin, status, elapsed seconds, detected) for one plugin call
+Call = Tuple[str, str, float, bool]
+
+
+class _InvalidLine:
+    def __init__(self, error: str):
+        self.error = error
+
+
+def load_chain(names: Iterable[str], plugin_dir: Path = PLUGIN_DIR) -> Chain:
+    """
+    Load the named strategy plugins, in chain order.
+
+    Args:
+        names: Plugin module names (files in `plugin_dir`)
+        plugin_dir: Directory holding the plugins
+
+    Returns:
+        List of (name, report function) pairs
+    """
+    chain = []
+    for name in names:
+        path = Path(plugin_dir) / f"{name}.py"
+        spec = importlib.util.spec_from_file_location(name, path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Cannot load plugin {name} from {path}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        chain.append((name, reporter(module)))
+    return chain
+
+
+def screen(chain: Chain, prompt: str, calls: Optional[List[Call]] = None) -> Dict[str, Any]:
+    """
+    Run one prompt through the chain; the first plugin that reports a message decides.
+
+    Args:
+        chain: Plugins to try, in order
+        prompt: Text to screen
+        calls: If given, each plugin call is appended to it as a `Call`
+    """
+    for name, report in chain:
+        started = time.perf_counter()
+        try:
+            result = report(prompt)
+        except Exception:
+            if calls is not None:
+                calls.append((name, "error", time.perf_counter() - started, False))
+            raise
+        detected = bool(result.get("message"))
+        if calls is not None:
+            calls.append((name, "ok", time.perf_counter() - started, detected))
+        if detected:
+            return {"paradox_detected": True, "plugin": name, **result}
+    return {"paradox_detected": False, "plugin": None, "category": None, "message": None, "matches": []}
+
+
+def _screen_all(chain: Chain, prompts: List[str]) -> Tuple[List[Dict[str, Any]], List[Call]]:
+    results = []
+    calls: List[Call] = []
+    for prompt in prompts:
+        try:
+            results.append(screen(chain, prompt, calls))
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results, calls
+
+
+class ScreenWorkerError(RuntimeError):
+    """Raised when a screening worker process dies or cannot be started."""
+
+
+def worker_main(names: List[str], plugin_dir: Path, use_registry: bool) -> None:
+    """
+    Entry point of a screening worker: load the chain, then screen chunks read from stdin.
+
+    Each request line is {"prompts": [...], "generation": ...}; a changed
+    generation (the server's registry reloaded a plugin) makes the worker
+    refresh its own registry first. Each reply line is {"results", "calls"}.
+    """
+    registry = PluginRegistry(plugin_dir) if use_registry else None
+    chain = [(name, registry.reporter(name)) for name in names] if registry else load_chain(names, plugin_dir)
+    generation = None
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if registry is not None and request.get("generation") != generation:
+            if generation is not None:
+                registry.refresh()
+                chain = [(name, registry.reporter(name)) for name in names]
+            generation = request.get("generation")
+        results, calls = _screen_all(chain, request["prompts"])
+        sys.stdout.write(json.dumps({"results": results, "calls": calls}) + "\n")
+        sys.stdout.flush()
+
+
+class _ScreenWorker:
+    """Handle to one screening worker process."""
+
+    def __init__(self, names: List[str], plugin_dir: Path, use_registry: bool):
+        command = [sys.executable, os.path.abspath(__file__), "--worker",
+                   "--chain", ",".join(names), "--plugin-dir", str(plugin_dir)]
+        if use_registry:
+            command.append("--registry")
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            text=True, bufsize=1)
+        except OSError as e:
+            raise ScreenWorkerError(f"Cannot start screening worker: {e}") from e
+        process_registry.register(self.process.pid, "screen_worker", label="prompt_screen")
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def screen(self, prompts: List[str], generation: Optional[int]) -> Tuple[List[Dict[str, Any]], List[Call]]:
+        try:
+            self.process.stdin.write(json.dumps({"prompts": prompts, "generation": generation}) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except (OSError, ValueError) as e:
+            raise ScreenWorkerError(f"Screening worker is not accepting chunks: {e}") from e
+        if not line:
+            raise ScreenWorkerError(f"Screening worker exited with code {self.process.wait()}")
+        reply = json.loads(line)
+        return reply["results"], [tuple(call) for call in reply["calls"]]
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        process_registry.unregister(self.process.pid)
+
+
+@dataclass
+class _ChunkJob:
+    chunk: List[BatchItem]
+    future: Optional[Future] = None
+    resets: int = 0  # pool resets before submission (thread mode)
+    worker: Optional[_ScreenWorker] = None  # worker process screening the chunk right now
+
+
+def ndjson_records(lines: Iterable[bytes]) -> Iterator[Any]:
+    """Decode NDJSON lines as they arrive, skipping blank lines; undecodable lines become error items."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield _InvalidLine(f"Invalid JSON: {e}")
+
+
+def batch_items(records: Iterable[Any]) -> Iterator[BatchItem]:
+    """
+    Turn decoded batch records into (id, prompt, error) items.
+
+    A record is either a prompt string or an object with "prompt" and an
+    optional "id"; items without an id are numbered by their position.
+    """
+    for index, record in enumerate(records):
+        if isinstance(record, _InvalidLine):
+            yield index, None, record.error
+        elif isinstance(record, str):
+            yield (index, record, None) if record else (index, None, "No prompt provided")
+        elif isinstance(record, dict):
+            item_id = record.get("id", index)
+            prompt = record.get("prompt")
+            if isinstance(prompt, str) and prompt:
+                yield item_id, prompt, None
+            else:
+                yield item_id, None, "No prompt provided"
+        else:
+            yield index, None, "Item must be a prompt string or an object with a 'prompt'"
+
+
+class BatchScreener:
+    """
+    Screens batches of prompts through the plugin chain in a worker pool.
+
+    Items are grouped into chunks of `chunk_size` prompts, so each worker is
+    sent one task per chunk rather than per prompt. At most `max_pending`
+    chunks are in flight; results are yielded in input order as soon as the
+    oldest chunk finishes, so a streamed batch is screened while it is still
+    being read and memory stays bounded however long it is.
+
+    The plugins are CPU-bound regex work that threads would serialize on
+    the GIL, so by default each chunk is sent to a worker process: a fresh
+    interpreter running this module with `--worker`, talking JSON lines
+    over pipes (as the sandbox pool does). Workers are started with
+    subprocess (fork and exec) rather than multiprocessing's fork: the
+    daemon is multithreaded, and a forked copy of it could inherit a lock
+    (a logging handler's, the log queue's) held by another thread and
+    deadlock. Nor do they go through spawn or forkserver, which re-import
+    the daemon's main module in every worker. With `processes=False` the
+    chain runs on threads instead.
+
+    With a `registry`, the chain comes from the registry's plugins. Worker
+    processes keep a registry of their own and refresh it when the
+    server's registry generation changes.
+
+    A chunk gets `deadline` seconds per prompt. One that overruns is
+    abandoned: its worker process is killed (a stuck thread is left to
+    finish in the background and the thread pool replaced) and the chunk
+    is screened again through the `engine`, whose per-plugin deadlines and
+    overdue limits single out the hanging plugin. Every plugin call a
+    worker makes is recorded in the engine's per-plugin metrics.
+    """
+
+    def __init__(self, chain: Optional[List[str]] = None, plugin_dir: Path = PLUGIN_DIR,
+                 workers: int = 2, chunk_size: int = 64, max_pending: Optional[int] = None,
+                 processes: bool = True, registry: Optional[PluginRegistry] = None,
+                 deadline: Optional[float] = 1.0, engine: Optional[PluginEngine] = None):
+        """
+        Create the screener; the pool starts on first use.
+
+        Args:
+            chain: Plugin names in the order they are tried (default: paradox plugin only)
+            plugin_dir: Directory holding the plugins
+            workers: Pool size
+            chunk_size: Prompts per pool task
+            max_pending: Chunks in flight at once (default: twice the pool size)
+            processes: Screen in worker processes (default) rather than threads
+            registry: Plugin registry to take the chain from (default: load
+                the plugin files directly)
+            deadline: Seconds each prompt may take before its chunk is
+                abandoned (None waits indefinitely)
+            engine: Plugin engine that records per-plugin metrics and
+                re-screens abandoned chunks (default: they fail with an error)
+        """
+        self.names = list(chain or DEFAULT_CHAIN)
+        self.plugin_dir = Path(registry.plugin_dir if registry is not None else plugin_dir)
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.max_pending = max_pending or 2 * self.workers
+        self.processes = processes
+        self.registry = registry
+        self.deadline = deadline
+        self.engine = engine
+        self._chain: Chain = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._generation: Optional[int] = None
+        self._resets = 0  # bumped whenever the thread pool is replaced under submitted chunks
+        # Idle worker processes, plus None for each slot whose process has not been started yet
+        self._idle: "queue.Queue[Optional[_ScreenWorker]]" = queue.Queue()
+        for _ in range(self.workers):
+            self._idle.put(None)
+        self._lock = threading.Lock()
+
+    def _load_chain(self) -> Chain:
+        if self.registry is None:
+            return load_chain(self.names, self.plugin_dir)
+        return [(name, self.registry.reporter(name)) for name in self.names]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            generation = self.registry.generation if self.registry is not None else None
+            if self._executor is None or generation != self._generation:
+                # Loading here in both modes surfaces a broken plugin as an error on this request
+                self._chain = self._load_chain()
+                self._generation = generation
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="screen")
+                logger.info(f"Started {'process' if self.processes else 'thread'} pool of {self.workers} "
+                            f"for plugin chain {self.names}")
+            return self._executor
+
+    def _screen_in_worker(self, job: _ChunkJob, prompts: List[str],
+                          generation: Optional[int]) -> Tuple[List[Dict[str, Any]], List[Call]]:
+        """Runs on a pool thread: screen a chunk in an idle worker process (started if needed)."""
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.alive:
+                if worker is not None:
+                    worker.kill()
+                worker = _ScreenWorker(self.names, self.plugin_dir, self.registry is not None)
+            job.worker = worker
+            output = worker.screen(prompts, generation)
+        except Exception:
+            if worker is not None:
+                worker.kill()
+            self._idle.put(None)
+            raise
+        finally:
+            job.worker = None
+        self._idle.put(worker)
+        return output
+
+    def _submit(self, chunk: List[BatchItem]) -> _ChunkJob:
+        """Start screening `chunk`."""
+        prompts = [prompt for _, prompt, error in chunk if error is None]
+        job = _ChunkJob(chunk, resets=self._resets)
+        if not prompts:
+            return job
+        pool = self._pool()
+        if self.processes:
+            job.future = pool.submit(self._screen_in_worker, job, prompts, self._generation)
+        else:
+            job.future = pool.submit(_screen_all, self._chain, prompts)
+        return job
+
+    def _wait(self, job: _ChunkJob) -> List[Dict[str, Any]]:
+        prompts = [prompt for _, prompt, error in job.chunk if error is None]
+        timeout = self.deadline * len(prompts) if self.deadline else None
+        try:
+            results, calls = job.future.result(timeout=timeout)
+        except FutureTimeout:
+            logger.warning(f"Screening chunk of {len(prompts)} prompts overran {timeout:g}s")
+            worker = job.worker
+            if worker is not None:
+                worker.kill()  # its pool thread sees the pipe close and frees the slot
+            elif not self.processes:
+                self._reset()  # the stuck thread cannot be stopped; later chunks get a fresh pool
+            if self.engine is None:
+                return [{"error": f"Screening timed out after {timeout:g}s"}] * len(prompts)
+            return [self.engine.run(prompt).to_dict() for prompt in prompts]
+        except Exception as e:
+            if job.resets != self._resets and job.future.cancelled():
+                # The pool was replaced under this chunk because of another one; run it again
+                return self._wait(self._submit(job.chunk))
+            # e.g. a plugin crashed the worker interpreter; it is replaced on the next chunk
+            logger.error(f"Screening chunk failed: {e}")
+            return [{"error": f"{type(e).__name__}: {e}"}] * len(prompts)
+        if self.engine is not None:
+            for call in calls:
+                self.engine.record(*call)
+        return results
+
+    def _collect(self, job: _ChunkJob) -> List[Dict[str, Any]]:
+        results = self._wait(job) if job.future is not None else []
+        pending = iter(results)
+        return [{"id": item_id, **(next(pending) if error is None else {"error": error})}
+                for item_id, _, error in job.chunk]
+
+    def screen_chunks(self, items: Iterable[BatchItem]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Screen `items`, yielding the results chunk by chunk in input order.
+
+        Each result is {"id", "paradox_detected", "plugin", "category",
+        "message", "matches"}, or {"id", "error"} for an invalid item.
+        Results re-screened by the engine after a chunk overran also carry
+        its per-plugin "plugins" outcomes.
+        """
+        pending: Deque[_ChunkJob] = deque()
+        chunk: List[BatchItem] = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) < self.chunk_size:
+                continue
+            pending.append(self._submit(chunk))
+            chunk = []
+            if len(pending) >= self.max_pending:
+                yield self._collect(pending.popleft())
+        if chunk:
+            pending.append(self._submit(chunk))
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def screen(self, items: Iterable[BatchItem]) -> Iterator[Dict[str, Any]]:
+        """Like `screen_chunks`, one result at a time."""
+        for results in self.screen_chunks(items):
+            yield from results
+
+    def _reset(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if executor is not None:
+                self._resets += 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        """Stop the pool and its worker processes (they are restarted if the screener is used again)."""
+        self._reset()
+        for _ in range(self.workers):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.kill()
+            self._idle.put(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt screening worker")
+    parser.add_argument("--worker", action="store_true")
+    parser.add_argument("--chain", default=",".join(DEFAULT_CHAIN))
+    parser.add_argument("--plugin-dir", default=str(PLUGIN_DIR))
+    parser.add_argument("--registry", action="store_true")
+    args = parser.parse_args()
+    if args.worker:
+        worker_main([name for name in args.chain.split(",") if name], Path(args.plugin_dir), args.registry)
@@ -1,5 +1,6 @@
 # Placeholder for recursive_ai_venv_daemon.py
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, Response
+from flask import (Flask, render_template, jsonify, request, redirect, url_for, flash, get_flashed_messages,
+                   Response, stream_with_context)
 import os
 import sys
 import json
@@ -7,14 +8,31 @@ import time
 import logging
 import subprocess
 import threading
-import queue
 import datetime
 import socket
+import hashlib
+import itertools
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from functools import wraps
 import traceback
+import atexit
+
+from broadcast import BroadcastRing
+from log_sink import RingLogHandler, attach as attach_log_handler
+from evolution_scheduler import EvolutionScheduler, SchedulerBusy
+from metrics_store import MetricsStore
+from metrics_timeseries import MetricsTimeSeries
+from process_registry import default_registry as process_registry
+from log_pipeline import configure_logging
+from plugin_engine import PluginEngine
+from strategy_index import StrategyIndex, DEFAULT_LIBRARY
+from prompt_screen import BatchScreener, DEFAULT_CHAIN, NDJSON_MIMETYPES, batch_items, ndjson_records
+
+# Configure logging (JSON lines, written by a background thread, rotated by size and age).
+# This runs before self_modify is imported so the server's log file takes precedence.
+configure_logging("ai_server.log")
 
 # Import the SelfModifyingAI class from the main module
 # This assumes that both files are in the same directory
@@ -47,15 +65,6 @@ except ImportError as e:
             logger.warning("Using placeholder SelfModifyingAI class - version history not available")
             return []
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("ai_server.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger("ai_flask_server")
 
 # Flask application setup
@@ -71,8 +80,9 @@ app.config.update(
     AI_MAIN_SCRIPT=os.environ.get("AI_MAIN_SCRIPT", "AI_Main.py"),
     BACKUP_DIR=os.environ.get("BACKUP_DIR", "ai_backups"),
     MODEL_NAME=os.environ.get("MODEL_NAME", "default_model"),
-    MAX_VERSIONS=int(os.environ.get("MAX_VERSIONS", "10")),
+    MAX_VERSIONS=int(os.environ.get("MAX_VERSIONS", "100000")),
     LOG_DIR=os.environ.get("LOG_DIR", "logs"),
+    METRICS_DIR=os.environ.get("METRICS_DIR", "metrics"),
     DEBUG=os.environ.get("FLASK_DEBUG", "False").lower() in ("true", "1", "t"),
     AUTH_ENABLED=os.environ.get("AUTH_ENABLED", "False").lower() in ("true", "1", "t"),
     AUTH_USERNAME=os.environ.get("AUTH_USERNAME", "admin"),
@@ -99,6 +109,57 @@ ai_system = SelfModifyingAI(
     max_versions=app.config["MAX_VERSIONS"]
 )
 
+# Background evolution pipeline; routes queue jobs instead of evolving inline
+evolution_scheduler = None
+if isinstance(getattr(ai_system, 'config', None), dict):
+    evolution_scheduler = EvolutionScheduler(ai_system).start()
+    atexit.register(evolution_scheduler.shutdown)
+
+screen_config = ai_system.config if isinstance(getattr(ai_system, 'config', None), dict) else {}
+
+# Reload strategy plugins when their files change
+plugin_registry = getattr(ai_system, 'plugin_registry', None)
+if plugin_registry is not None and screen_config.get("plugin_poll_interval", 2.0):
+    plugin_registry.watch(screen_config.get("plugin_poll_interval", 2.0))
+    atexit.register(plugin_registry.stop)
+
+# Runs /api/check_paradox through the plugin chain with deadlines and per-plugin metrics
+plugin_engine = None
+if plugin_registry is not None:
+    plugin_engine = PluginEngine(
+        plugin_registry,
+        chain=screen_config.get("screen_chain", DEFAULT_CHAIN),
+        mode=screen_config.get("plugin_chain_mode", "ordered"),
+        deadline=screen_config.get("plugin_deadline", 1.0),
+        deadlines=screen_config.get("plugin_deadlines"),
+        isolated=screen_config.get("plugin_isolated", []),
+        workers=screen_config.get("plugin_engine_workers", 8),
+        max_overdue=screen_config.get("plugin_max_overdue", 2),
+        process_workers=screen_config.get("plugin_process_workers", 2)
+    )
+    atexit.register(plugin_engine.close)
+
+# Resolution strategies attached to each detection
+strategy_index = StrategyIndex(screen_config.get("strategy_library") or DEFAULT_LIBRARY)
+STRATEGY_RESULTS = screen_config.get("strategy_results", 3)
+STRATEGY_METHOD = screen_config.get("strategy_method", "bm25")
+
+# Worker pool for /api/check_paradox/batch, started on the first batch; overrunning
+# chunks are re-screened through the plugin engine, which also records their metrics
+batch_screener = BatchScreener(
+    chain=screen_config.get("screen_chain", DEFAULT_CHAIN),
+    workers=screen_config.get("screen_workers", 2),
+    chunk_size=screen_config.get("screen_chunk_size", 64),
+    processes=screen_config.get("screen_processes", True),
+    registry=plugin_registry,
+    deadline=screen_config.get("screen_deadline", 1.0),
+    engine=plugin_engine
+)
+atexit.register(batch_screener.close)
+
+# Track this server alongside the sandbox, training and model-service processes it starts
+process_registry.register(os.getpid(), "server", label="recursive_ai_venv_daemon")
+
 # Global variables for system monitoring
 system_status = {
     "last_modification": None,
@@ -107,12 +168,38 @@ system_status = {
     "is_healthy": True,
     "cpu_usage": 0.0,
     "memory_usage": 0.0,
-    "uptime": 0
+    "uptime": 0,
+    "boot_time": time.time()
 }
+# Sampled every few seconds and pushed to open dashboards over /api/stream,
+# so they are left out of the cached dashboard state
+VOLATILE_STATUS_KEYS = {"cpu_usage", "memory_usage", "uptime"}
+# Fresh value on every other system_status change (see update_system_status)
+_status_generations = itertools.count(1)
+status_generation = 0
+
+def update_system_status(**changes) -> None:
+    """Update system_status, marking cached dashboard state stale if a non-volatile field changed."""
+    global status_generation
+    stale = any(system_status.get(k) != v for k, v in changes.items() if k not in VOLATILE_STATUS_KEYS)
+    system_status.update(changes)
+    if stale:
+        status_generation = next(_status_generations)
 
-# Queue for real-time log streaming
-log_queue = queue.Queue(maxsize=1000)  # Limit queue size to prevent memory issues
+# Live log and metrics events for /logs and /api/stream; each subscriber keeps
+# its own cursor, so slow clients drop old events instead of blocking publishers
+event_bus = BroadcastRing(capacity=2048)
 log_handler = None
+STREAM_HEARTBEAT = 15  # seconds between keep-alive comments on idle streams
+
+def publish_event(topic: str, data: Dict[str, Any]) -> int:
+    """Publish an event to stream subscribers; the payload is serialized once, here."""
+    return event_bus.publish((topic, json.dumps(data, default=str)))
+
+# Loop detections on the model response path show up live on open dashboards
+loop_monitor = getattr(ai_system, 'loop_monitor', None)
+if loop_monitor is not None:
+    loop_monitor.on_detect = lambda detection: publish_event("loop", detection.to_dict())
 
 @dataclass
 class SystemMetrics:
@@ -125,51 +212,33 @@ class SystemMetrics:
     network_bytes_recv: int
     temperature: Optional[float] = None  # Some systems may not have temperature sensors
 
-# Store metrics history
-metrics_history: List[SystemMetrics] = []
-MAX_METRICS_HISTORY = 1000  # Limit to prevent memory issues
+# Store metrics history in fixed-size ring buffers with 1 min / 1 h rollups,
+# persisted to memory-mapped segment files so it survives restarts
+metrics_store = MetricsStore()
+metrics_series = MetricsTimeSeries(app.config["METRICS_DIR"])
+atexit.register(metrics_series.close)
+
+def restore_metrics_history(window: float = 86400):
+    """Reload the last `window` seconds of persisted samples into the in-memory store."""
+    history = metrics_series.query(start=time.time() - window)
+    names = [name for name in history if name != "timestamp"]
+    for i, timestamp in enumerate(history["timestamp"]):
+        metrics_store.append({"timestamp": timestamp, **{name: history[name][i] for name in names}})
+    if history["timestamp"]:
+        logger.info(f"Restored {len(history['timestamp'])} metrics samples from {app.config['METRICS_DIR']}")
+
+restore_metrics_history()
 
 def setup_log_handler():
-    """Set up a special log handler that also puts logs in our queue for streaming."""
+    """Capture log records in the event bus for the logs page and live streaming."""
     global log_handler
     
-    class QueueHandler(logging.Handler):
-        def emit(self, record):
-            try:
-                # Format the log message
-                msg = self.format(record)
-                # Put in queue, don't block if queue is full
-                try:
-                    log_queue.put_nowait({
-                        "timestamp": datetime.datetime.now().isoformat(),
-                        "level": record.levelname,
-                        "message": msg
-                    })
-                except queue.Full:
-                    # If queue is full, remove oldest item and try again
-                    try:
-                        log_queue.get_nowait()
-                        log_queue.put_nowait({
-                            "timestamp": datetime.datetime.now().isoformat(),
-                            "level": record.levelname,
-                            "message": msg
-                        })
-                    except (queue.Empty, queue.Full):
-                        pass  # Give up if still having issues
-            except Exception:
-                self.handleError(record)
-    
-    # Create and add the handler to both loggers
-    log_handler = QueueHandler()
-    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    
-    # Add to root logger to catch all logs
-    root_logger = logging.getLogger()
-    root_logger.addHandler(log_handler)
-    
-    # Add to our specific loggers
-    logging.getLogger("ai_flask_server").addHandler(log_handler)
-    logging.getLogger("self_modifying_ai").addHandler(log_handler)
+    # Records are stored unformatted and formatted once, when first read
+    handler = RingLogHandler(event_bus)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    
+    # Attach to the root logger only; named loggers propagate to it
+    log_handler = attach_log_handler(handler)
 
 # Call this during initialization
 setup_log_handler()
@@ -214,9 +283,10 @@ def update_system_metrics():
                         temperature = sum(temp.current for temp in temps["coretemp"]) / len(temps["coretemp"])
                 
                 # Update current status
-                system_status["cpu_usage"] = cpu_percent
-                system_status["memory_usage"] = memory.percent
-                system_status["uptime"] = time.time() - psutil.boot_time()
+                update_system_status(cpu_usage=cpu_percent,
+                                     memory_usage=memory.percent,
+                                     uptime=time.time() - psutil.boot_time(),
+                                     boot_time=psutil.boot_time())
                 
                 # Create metrics record
                 metrics = SystemMetrics(
@@ -229,10 +299,11 @@ def update_system_metrics():
                     temperature=temperature
                 )
                 
-                # Add to history, maintaining max size
-                metrics_history.append(metrics)
-                if len(metrics_history) > MAX_METRICS_HISTORY:
-                    metrics_history.pop(0)
+                # Add to history; the ring buffers overwrite the oldest samples
+                metrics_store.append(metrics)
+                metrics_series.append(metrics)
+                process_registry.sample()
+                publish_event("metrics", asdict(metrics))
                 
                 # Wait before next update
                 time.sleep(5)
@@ -245,8 +316,10 @@ def update_system_metrics():
         logger.warning("psutil not installed. System metrics will not be available.")
         # Just update uptime without other metrics
         start_time = time.time()
+        update_system_status(boot_time=start_time)
         while True:
-            system_status["uptime"] = time.time() - start_time
+            update_system_status(uptime=time.time() - start_time)
+            process_registry.sample()  # falls back to /proc without psutil
             time.sleep(10)
 
 # Start metrics collection in a background thread
@@ -300,109 +373,350 @@ base_template = """
 </html>
     """
     
-dashboard_template = """
-{% extends "base.html" %}
-
-{% block title %}AI Control Panel - Dashboard{% endblock %}
-
-{% block content %}
-<div class="dashboard">
-    <div class="dashboard-header">
-        <h2>System Dashboard</h2>
-        <div class="system-status">
-            <span class="status-label">Status:</span>
-            <span class="status-value {% if system_status.is_healthy %}status-healthy{% else %}status-unhealthy{% endif %}">
-                {{ "Healthy" if system_status.is_healthy else "Unhealthy" }}
-            </span>
+# Static dashboard shell: no template rendering per request; the state is
+# filled in from /api/dashboard, /api/flashes and /api/stream
+dashboard_shell = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AI Control Panel - Dashboard</title>
+    <link rel="stylesheet" href="/static/styles.css">
+</head>
+<body>
+    <nav class="navbar">
+        <div class="navbar-brand">
+            <h1>AI Control Panel</h1>
         </div>
-    </div>
+        <ul class="navbar-menu">
+            <li><a href="/">Dashboard</a></li>
+            <li><a href="/code_view">Code Editor</a></li>
+            <li><a href="/logs">Logs</a></li>
+            <li><a href="/metrics">System Metrics</a></li>
+            <li><a href="/config">Configuration</a></li>
+        </ul>
+    </nav>
     
-    <div class="dashboard-grid">
-        <div class="dashboard-card">
-            <h3>AI Version</h3>
-            <div class="version-info">
-                <p>Current Version: <span class="highlight">{{ system_status.current_version }}</span></p>
-                <p>Last Modified: <span>{{ system_status.last_modification or "Never" }}</span></p>
-            </div>
-            <div class="card-actions">
-                <button class="btn btn-primary" onclick="location.href='{{ url_for('trigger_evolution') }}'">
-                    Trigger Evolution
-                </button>
-            </div>
-        </div>
+    <div class="container">
+        <div id="flashes"></div>
         
-        <div class="dashboard-card">
-            <h3>System Resources</h3>
-            <div class="resource-meters">
-                <div class="meter">
-                    <label>CPU Usage</label>
-                    <div class="meter-bar">
-                        <div class="meter-fill" style="width: {{ system_status.cpu_usage }}%"></div>
+        <div class="dashboard">
+            <div class="dashboard-header">
+                <h2>System Dashboard</h2>
+                <div class="system-status">
+                    <span class="status-label">Status:</span>
+                    <span class="status-value" id="status-value">...</span>
+                </div>
+            </div>
+    
+            <div class="dashboard-grid">
+                <div class="dashboard-card">
+                    <h3>AI Version</h3>
+                    <div class="version-info">
+                        <p>Current Version: <span class="highlight" id="current-version"></span></p>
+                        <p>Last Modified: <span id="last-modification"></span></p>
+                    </div>
+                    <div class="card-actions">
+                        <button class="btn btn-primary" onclick="location.href='/trigger_evolution'">
+                            Trigger Evolution
+                        </button>
                     </div>
-                    <span class="meter-value">{{ "%.1f"|format(system_status.cpu_usage) }}%</span>
                 </div>
-                <div class="meter">
-                    <label>Memory Usage</label>
-                    <div class="meter-bar">
-                        <div class="meter-fill" style="width: {{ system_status.memory_usage }}%"></div>
+        
+                <div class="dashboard-card">
+                    <h3>System Resources</h3>
+                    <div class="resource-meters">
+                        <div class="meter">
+                            <label>CPU Usage</label>
+                            <div class="meter-bar">
+                                <div class="meter-fill" id="cpu-fill" style="width: 0%"></div>
+                            </div>
+                            <span class="meter-value" id="cpu-value"></span>
+                        </div>
+                        <div class="meter">
+                            <label>Memory Usage</label>
+                            <div class="meter-bar">
+                                <div class="meter-fill" id="memory-fill" style="width: 0%"></div>
+                            </div>
+                            <span class="meter-value" id="memory-value"></span>
+                        </div>
                     </div>
-                    <span class="meter-value">{{ "%.1f"|format(system_status.memory_usage) }}%</span>
+                    <p>System Uptime: <span id="uptime"></span></p>
+                </div>
+        
+                <div class="dashboard-card">
+                    <h3>Evaluation Cache</h3>
+                    <div id="eval-cache"></div>
+                </div>
+        
+                <div class="dashboard-card">
+                    <h3>Evolution Jobs</h3>
+                    <div id="evolution-jobs"></div>
+                </div>
+            </div>
+    
+            <div class="dashboard-card full-width">
+                <h3>Live Log</h3>
+                <pre id="live-log" class="live-log"></pre>
+            </div>
+    
+            <div class="dashboard-card full-width">
+                <h3>Last Execution Result</h3>
+                <div class="execution-result" id="execution-result"></div>
+            </div>
+    
+            <div class="dashboard-card full-width">
+                <h3>Version History</h3>
+                <div class="version-history">
+                    <table>
+                        <thead>
+                            <tr>
+                                <th>Version</th>
+                                <th>Created</th>
+                                <th>Actions</th>
+                            </tr>
+                        </thead>
+                        <tbody id="version-history"></tbody>
+                    </table>
                 </div>
             </div>
-            <p>System Uptime: {{ format_uptime(system_status.uptime) }}</p>
         </div>
     </div>
     
+    <footer>
+        <p>Self-Modifying AI System - Running Locally</p>
+    </footer>
+    
+        <script>
+            (function() {
+                var POLL_INTERVAL = 30000;
+        
+                function el(tag, text, attrs) {
+                    var node = document.createElement(tag);
+                    if (text !== undefined && text !== null) node.textContent = text;
+                    for (var key in (attrs || {})) node.setAttribute(key, attrs[key]);
+                    return node;
+                }
+        
+                function fill(id, nodes) {
+                    var target = document.getElementById(id);
+                    target.replaceChildren.apply(target, nodes);
+                }
+        
+                function setMeter(name, value) {
+                    document.getElementById(name + "-fill").style.width = value + "%";
+                    document.getElementById(name + "-value").textContent = value.toFixed(1) + "%";
+                }
+        
+                function formatUptime(seconds) {
+                    var d = Math.floor(seconds / 86400), h = Math.floor(seconds % 86400 / 3600),
+                        m = Math.floor(seconds % 3600 / 60), s = Math.floor(seconds % 60);
+                    if (d > 0) return d + "d " + h + "h " + m + "m";
+                    if (h > 0) return h + "h " + m + "m " + s + "s";
+                    if (m > 0) return m + "m " + s + "s";
+                    return s + "s";
+                }
+        
+                var bootTime = null;
+                function showUptime() {
+                    if (bootTime !== null) {
+                        document.getElementById("uptime").textContent = formatUptime(Date.now() / 1000 - bootTime);
+                    }
+                }
+                setInterval(showUptime, 1000);
+        
+                function render(state) {
+                    var status = state.system_status;
+                    var statusValue = document.getElementById("status-value");
+                    statusValue.textContent = status.is_healthy ? "Healthy" : "Unhealthy";
+                    statusValue.className = "status-value " + (status.is_healthy ? "status-healthy" : "status-unhealthy");
+                    document.getElementById("current-version").textContent = status.current_version;
+                    document.getElementById("last-modification").textContent = status.last_modification || "Never";
+                    bootTime = status.boot_time;
+                    showUptime();
+            
+                    var cache = state.eval_cache_stats;
+                    fill("eval-cache", cache ? [
+                        el("p", "Hits: " + cache.hits),
+                        el("p", "Misses: " + cache.misses),
+                        el("p", "Hit Rate: " + (cache.hit_rate * 100).toFixed(1) + "%"),
+                        el("p", "Cached Evaluations: " + cache.entries)
+                    ] : [el("p", "Evaluation cache disabled.")]);
+            
+                    fill("evolution-jobs", state.evolution_jobs.length ? state.evolution_jobs.map(function(job) {
+                        var line = el("p");
+                        line.appendChild(el("a", job.id, {href: "/api/jobs/" + job.id}));
+                        line.appendChild(document.createTextNode(": " + job.status +
+                            (job.status === "running" ? " (" + job.stage + ")" : "")));
+                        return line;
+                    }) : [el("p", "No evolution jobs yet.")]);
+            
+                    fill("execution-result", status.last_execution_result ?
+                        [el("pre", JSON.stringify(status.last_execution_result, null, 2))] :
+                        [el("p", "No execution results available yet.")]);
+            
+                    fill("version-history", state.version_history.map(function(version) {
+                        var row = el("tr"), actions = el("td");
+                        row.appendChild(el("td", version.number));
+                        row.appendChild(el("td", version.timestamp));
+                        actions.appendChild(el("a", "View", {href: "/view_version/" + version.number}));
+                        actions.appendChild(document.createTextNode(" "));
+                        actions.appendChild(el("a", "Rollback", {href: "/rollback/" + version.number}));
+                        row.appendChild(actions);
+                        return row;
+                    }));
+                }
+        
+                // "no-cache" makes the browser revalidate with If-None-Match; an
+                // unchanged state comes back as 304 and is served from its cache
+                function poll() {
+                    fetch("/api/dashboard", {cache: "no-cache"})
+                        .then(function(r) { return r.json(); })
+                        .then(render)
+                        .catch(function() {})
+                        .then(function() { setTimeout(poll, POLL_INTERVAL); });
+                }
+                poll();
+        
+                // Messages flashed by the action that redirected here
+                fetch("/api/flashes", {cache: "no-store"})
+                    .then(function(r) { return r.json(); })
+                    .then(function(messages) {
+                        fill("flashes", messages.map(function(m) {
+                            return el("div", m[1], {"class": "alert alert-" + m[0]});
+                        }));
+                    })
+                    .catch(function() {});
+        
+                // Live updates over Server-Sent Events; EventSource reconnects on its own
+                // and resumes from the last event id it received
+                var stream = new EventSource("/api/stream?topics=logs,metrics");
+                var liveLog = document.getElementById("live-log");
+                var maxLines = 200;
+        
+                function appendLine(text) {
+                    liveLog.appendChild(document.createTextNode(text + "\\n"));
+                    while (liveLog.childNodes.length > maxLines) {
+                        liveLog.removeChild(liveLog.firstChild);
+                    }
+                    liveLog.scrollTop = liveLog.scrollHeight;
+                }
+        
+                stream.addEventListener("metrics", function(e) {
+                    var m = JSON.parse(e.data);
+                    setMeter("cpu", m.cpu_percent);
+                    setMeter("memory", m.memory_percent);
+                });
+                stream.addEventListener("log", function(e) {
+                    appendLine(JSON.parse(e.data).message);
+                });
+                stream.addEventListener("dropped", function(e) {
+                    appendLine("... " + e.data + " events skipped ...");
+                });
+            })();
+        </script>
+</body>
+</html>
+    """
+
+metrics_template = """
+{% extends "base.html" %}
+{% block title %}AI Control Panel - System Metrics{% endblock %}
+{% block content %}
+<div class="dashboard">
+    <div class="dashboard-header">
+        <h2>System Metrics</h2>
+    </div>
+
     <div class="dashboard-card full-width">
-        <h3>Last Execution Result</h3>
-        <div class="execution-result">
-            {% if system_status.last_execution_result %}
-                <pre>{{ system_status.last_execution_result|tojson(indent=2) }}</pre>
-            {% else %}
-                <p>No execution results available yet.</p>
-            {% endif %}
-        </div>
+        <h3>Current</h3>
+        {% if current_metrics %}
+        <table>
+            <tbody>
+                {% for name, value in current_metrics|dictsort %}
+                <tr><th>{{ name }}</th><td>{{ value }}</td></tr>
+                {% endfor %}
+            </tbody>
+        </table>
+        {% else %}
+        <p>No metrics collected yet.</p>
+        {% endif %}
     </div>
-    
+
+    <div class="dashboard-card full-width">
+        <h3>CPU and Memory</h3>
+        <canvas id="resource-chart"></canvas>
+    </div>
+
     <div class="dashboard-card full-width">
-        <h3>Version History</h3>
-        <div class="version-history">
-            <table>
-                <thead>
-                    <tr>
-                        <th>Version</th>
-                        <th>Created</th>
-                        <th>Actions</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {% for version in version_history %}
-                    <tr>
-                        <td>{{ version.number }}</td>
-                        <td>{{ version.timestamp }}</td>
-                        <td>
-                            <a href="{{ url_for('view_version', version=version.number) }}">View</a>
-                            <a href="{{ url_for('rollback', version=version.number) }}">Rollback</a>
-                        </td>
-                    </tr>
+        <h3>Plugin Latency</h3>
+        {% if plugin_metrics %}
+        <table>
+            <thead>
+                <tr>
+                    <th>Plugin</th><th>Calls</th><th>Errors</th><th>Timeouts</th><th>Skipped</th>
+                    <th>Detections</th><th>Overdue</th><th>Mean</th><th>p50</th><th>p95</th><th>p99</th><th>Max</th>
+                </tr>
+            </thead>
+            <tbody>
+                {% for name, stats in plugin_metrics.items() %}
+                <tr>
+                    <td>{{ name }}</td>
+                    <td>{{ stats.calls }}</td>
+                    <td>{{ stats.errors }}</td>
+                    <td>{{ stats.timeouts }}</td>
+                    <td>{{ stats.skipped }}</td>
+                    <td>{{ stats.detections }}</td>
+                    <td>{{ stats.overdue }}</td>
+                    {% for key in ["mean", "p50", "p95", "p99", "max"] %}
+                    <td>{% if stats.latency[key] is not none %}{{ "%.2f"|format(stats.latency[key] * 1000) }} ms{% else %}-{% endif %}</td>
                     {% endfor %}
-                </tbody>
-            </table>
-        </div>
+                </tr>
+                {% endfor %}
+            </tbody>
+        </table>
+        {% for name in plugin_metrics %}
+        <h4>{{ name }}</h4>
+        <canvas id="latency-{{ loop.index }}"></canvas>
+        {% endfor %}
+        {% else %}
+        <p>No plugin calls recorded yet.</p>
+        {% endif %}
     </div>
 </div>
 {% endblock %}
-
 {% block scripts %}
 <script>
-    // Auto-refresh the dashboard every 30 seconds
-    setTimeout(function() {
-        location.reload();
-    }, 30000);
+    new Chart(document.getElementById("resource-chart"), {
+        type: "line",
+        data: {
+            labels: {{ timestamps|tojson }}.map(function(t) { return new Date(t * 1000).toLocaleTimeString(); }),
+            datasets: [
+                {label: "CPU %", data: {{ cpu_data|tojson }}, borderColor: "#3498db", pointRadius: 0},
+                {label: "Memory %", data: {{ memory_data|tojson }}, borderColor: "#2ecc71", pointRadius: 0}
+            ]
+        },
+        options: {animation: false, scales: {y: {min: 0, max: 100}}}
+    });
+
+    // Buckets are cumulative counts per upper bound; plot the count in each bucket
+    {{ plugin_metrics.values()|map(attribute="latency")|list|tojson }}.forEach(function(latency, i) {
+        var buckets = latency.buckets;
+        new Chart(document.getElementById("latency-" + (i + 1)), {
+            type: "bar",
+            data: {
+                labels: buckets.map(function(b) { return b[0] === "+Inf" ? "> " + buckets[buckets.length - 2][0] * 1000 + " ms" : "<= " + b[0] * 1000 + " ms"; }),
+                datasets: [{label: "Calls", backgroundColor: "#3498db",
+                            data: buckets.map(function(b, j) { return b[1] - (j ? buckets[j - 1][1] : 0); })}]
+            },
+            options: {animation: false}
+        });
+    });
 </script>
 {% endblock %}
     """
-    
+
 css_content = """
    :root {
     --primary-color: #2c3e50;
@@ -431,34 +745,97 @@ def format_uptime(seconds):
     else:
         return f"{int(seconds)}s"
 
-# Create default template files if they don't exist
+# Bump when a generated template or static file changes, so existing copies are replaced
+GENERATED_FILES_VERSION = 3
+
 def ensure_template_files_exist():
-    """Ensure that all necessary template files exist."""
-    templates = {
-        "base.html": base_template,
-        "dashboard.html": dashboard_template,
-        # Add other templates as needed
-    }
+    """
+    Write the generated templates and static files.
     
-    for filename, content in templates.items():
-        template_path = template_dir / filename
-        if not template_path.exists():
-            with open(template_path, 'w') as f:
-                f.write(content)
-            logger.info(f"Created template file: {template_path}")
+    Each file starts with a marker comment naming GENERATED_FILES_VERSION;
+    files without the current marker (missing, older or unmarked) are
+    (re)written, so changes to the generated pages reach existing installs.
+    """
+    files = {
+        template_dir / "base.html": ("{# %s #}", base_template),
+        template_dir / "metrics.html": ("{# %s #}", metrics_template),
+        static_dir / "dashboard.html": ("<!-- %s -->", dashboard_shell),
+        static_dir / "styles.css": ("/* %s */", css_content),
+    }
     
-    # Create CSS file
-    css_path = static_dir / "styles.css"
-    if not css_path.exists():
-        with open(css_path, 'w') as f:
-            f.write(css_content)
-        logger.info(f"Created CSS file: {css_path}")
+    for path, (comment, content) in files.items():
+        marker = comment % f"generated by recursive_ai_venv_daemon v{GENERATED_FILES_VERSION}"
+        try:
+            existing = path.read_text()
+        except OSError:
+            existing = None
+        if existing is not None and existing.startswith(marker):
+            continue
+        path.write_text(marker + "\n" + content.lstrip("\n"))
+        logger.info(f"{'Updated' if existing is not None else 'Created'} generated file: {path}")
 
 ensure_template_files_exist()
 
+# (state key, ETag, JSON body) of the last dashboard state that was built
+_dashboard_cache: Tuple[Any, str, str] = (None, "", "")
+
+def _dashboard_state_key() -> Tuple[Any, ...]:
+    """Cheap fingerprint of everything in the dashboard state; it changes whenever the state does."""
+    version_store = getattr(ai_system, 'version_store', None)
+    eval_cache = getattr(ai_system, 'eval_cache', None)
+    return (
+        status_generation,
+        version_store.generation if version_store is not None else None,
+        evolution_scheduler.generation if evolution_scheduler else None,
+        (eval_cache.generation, eval_cache.hits, eval_cache.misses) if eval_cache is not None else None
+    )
+
+def dashboard_state() -> Tuple[str, str]:
+    """
+    Return the ETag and JSON body of the dashboard state, rebuilding it only when its key changed.
+    
+    Returns:
+        Tuple of (etag, json_body)
+    """
+    global _dashboard_cache
+    key = _dashboard_state_key()
+    cached_key, etag, body = _dashboard_cache
+    if key == cached_key:
+        return etag, body
+    
+    eval_cache = getattr(ai_system, 'eval_cache', None)
+    state = {
+        "system_status": {k: v for k, v in system_status.items() if k not in VOLATILE_STATUS_KEYS},
+        "version_history": ai_system.get_version_history() if hasattr(ai_system, 'get_version_history') else [],
+        "eval_cache_stats": eval_cache.stats() if eval_cache is not None else None,
+        "evolution_jobs": [job.to_dict() for job in evolution_scheduler.jobs()[:5]] if evolution_scheduler else []
+    }
+    body = json.dumps(state, default=str)
+    etag = hashlib.md5(body.encode()).hexdigest()
+    # Concurrent rebuilds are harmless; the tuple is swapped in one assignment
+    _dashboard_cache = (key, etag, body)
+    return etag, body
+
 @app.route('/')
 def home():
-    return render_template('dashboard.html', system_status=system_status)
+    """Static dashboard shell; its data is loaded from /api/dashboard, /api/flashes and the live stream."""
+    response = app.send_static_file('dashboard.html')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/flashes')
+def flashes_api():
+    """Messages flashed for this session (e.g. by /trigger_evolution), as [category, message] pairs."""
+    return jsonify(get_flashed_messages(with_categories=True))
+
+@app.route('/api/dashboard')
+def dashboard_api():
+    """Dashboard state as JSON, cached between changes; unchanged polls get 304 Not Modified."""
+    etag, body = dashboard_state()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/code_view')
 def code_view():
@@ -470,22 +847,109 @@ def code_view():
 def logs():
     """View system logs."""
     # Get the last 100 log entries
-    log_entries = list(log_queue.queue)[-100:] if not log_queue.empty() else []
-    return render_template('logs.html', logs=log_entries)
+    log_entries = log_handler.entries(limit=100)
+    return render_template('logs.html', logs=log_entries, dropped=log_handler.dropped)
 
 @app.route('/metrics')
 def metrics():
     """View system metrics."""
-    # Convert metrics history to a format suitable for charting
-    timestamps = [m.timestamp for m in metrics_history]
-    cpu_data = [m.cpu_percent for m in metrics_history]
-    memory_data = [m.memory_percent for m in metrics_history]
+    # Query only the requested window (default: last hour) from the metrics store
+    window = request.args.get('window', 3600, type=float)
+    history = metrics_store.query(start=time.time() - window, fields=["cpu_percent", "memory_percent"])
     
     return render_template('metrics.html', 
-                          timestamps=timestamps,
-                          cpu_data=cpu_data,
-                          memory_data=memory_data,
-                          current_metrics=metrics_history[-1] if metrics_history else None)
+                          timestamps=history["timestamp"],
+                          cpu_data=history["cpu_percent"],
+                          memory_data=history["memory_percent"],
+                          current_metrics=metrics_store.latest(),
+                          plugin_metrics=plugin_engine.metrics() if plugin_engine else {})
+
+@app.route('/api/metrics')
+def metrics_api():
+    """
+    Return persisted metrics between `from` and `to` (Unix seconds), averaged per `step` seconds.
+    
+    Without `step` the range is downsampled to at most `max_points` buckets
+    (raw samples if they already fit).
+    """
+    now = time.time()
+    start = request.args.get('from', now - 3600, type=float)
+    end = request.args.get('to', now, type=float)
+    step = request.args.get('step', type=float)
+    max_points = request.args.get('max_points', 1000, type=int)
+    fields = [f for f in request.args.get('fields', '').split(',') if f] or None
+    if end < start:
+        return jsonify({"error": "'to' must not be earlier than 'from'"}), 400
+    if step is None:
+        step = (end - start) / max_points if max_points > 0 and (end - start) / 5 > max_points else 0
+    if step < 0:
+        return jsonify({"error": "'step' must be positive"}), 400
+    
+    data = metrics_series.query(start=start, end=end, step=step or None, fields=fields)
+    return jsonify({"from": start, "to": end, "step": step or None, **data})
+
+@app.route('/api/plugins/metrics')
+def plugin_metrics_api():
+    """Per-plugin call, error, timeout and detection counts with latency histograms."""
+    return jsonify(plugin_engine.metrics() if plugin_engine else {})
+
+@app.route('/api/loop_monitor')
+def loop_monitor_api():
+    """Responses checked by the loop monitor, detections by kind and the last detection."""
+    return jsonify(loop_monitor.stats() if loop_monitor else {})
+
+@app.route('/api/stream')
+def event_stream():
+    """
+    Stream live log, metrics and loop-detection events as Server-Sent Events.
+    
+    Query parameters:
+        topics: Comma-separated subset of "logs,metrics,loop" (default: logs,metrics)
+        replay: If set, start with the events still buffered instead of only new ones
+    
+    Reconnecting clients send Last-Event-ID and resume after that event. A
+    client that falls further behind than the buffer holds gets a "dropped"
+    event with the number of events it missed.
+    """
+    aliases = {"logs": "log", "log": "log", "metrics": "metrics", "loop": "loop"}
+    requested = request.args.get('topics', 'logs,metrics').split(',')
+    topics = {aliases[t.strip()] for t in requested if t.strip() in aliases}
+    
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if last_event_id.isdigit():
+        cursor = int(last_event_id) + 1
+    elif request.args.get('replay'):
+        cursor = event_bus.oldest_seq
+    else:
+        cursor = event_bus.next_seq
+    
+    def generate(cursor: int):
+        yield "retry: 3000\n\n"
+        while True:
+            events, cursor, dropped = event_bus.read(cursor, timeout=STREAM_HEARTBEAT)
+            if dropped:
+                yield f"event: dropped\ndata: {dropped}\n\n"
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            # Metrics are published pre-serialized; log entries serialize (once) on first read
+            chunk = [f"id: {seq}\nevent: {topic}\ndata: {data if isinstance(data, str) else data.json}\n\n"
+                     for seq, (topic, data) in events if topic in topics]
+            if chunk:
+                yield "".join(chunk)
+    
+    return Response(generate(cursor), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/processes')
+def processes_api():
+    """Per-process CPU, RSS, IO and thread counts for tracked processes, optionally filtered."""
+    kind = request.args.get('kind')
+    job_id = request.args.get('job')
+    data = {"processes": process_registry.processes(kind=kind, job_id=job_id)}
+    if job_id:
+        data["job_usage"] = process_registry.job_usage(job_id)
+    return jsonify(data)
 
 @app.route('/config')
 def config():
@@ -497,17 +961,70 @@ def config():
 @app.route('/trigger_evolution')
 def trigger_evolution():
     """Trigger AI evolution process."""
+    if evolution_scheduler is None:
+        flash("Evolution is not available", "error")
+        return redirect(url_for('home'))
     try:
-        success, message = ai_system.self_modify()
-        if success:
-            flash(f"Evolution successful: {message}", "success")
-        else:
-            flash(f"Evolution failed: {message}", "error")
+        job = evolution_scheduler.submit()
+        flash(f"Evolution queued as job {job.id}", "success")
+    except SchedulerBusy as e:
+        flash(f"Evolution not queued: {str(e)}", "error")
     except Exception as e:
         flash(f"Error during evolution: {str(e)}", "error")
     
     return redirect(url_for('home'))
 
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def jobs_api():
+    """List evolution jobs, or queue a new one and return its id immediately."""
+    if evolution_scheduler is None:
+        return jsonify({"error": "Evolution scheduler not available"}), 503
+    
+    if request.method == 'GET':
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify({
+            "scheduler": evolution_scheduler.status(),
+            "jobs": [job.to_dict(registry=process_registry) for job in evolution_scheduler.jobs()[:limit]]
+        })
+    
+    data = request.get_json(silent=True) or {}
+    num_candidates = data.get('num_candidates')
+    if num_candidates is not None and (not isinstance(num_candidates, int) or num_candidates < 1):
+        return jsonify({"error": "num_candidates must be a positive integer"}), 400
+    try:
+        job = evolution_scheduler.submit(num_candidates)
+    except SchedulerBusy as e:
+        response = jsonify({"error": str(e), "retry_after": round(e.retry_after, 1)})
+        response.headers['Retry-After'] = str(max(1, int(e.retry_after)))
+        return response, 429
+    
+    return jsonify({"job_id": job.id, "status": job.status,
+                    "status_url": url_for('job_status', job_id=job.id)}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    """Return a job's status and candidate results; DELETE cancels it."""
+    if request.method == 'DELETE':
+        return _cancel_job(job_id)
+    
+    job = evolution_scheduler.get(job_id) if evolution_scheduler is not None else None
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(job.to_dict(include_results=True, registry=process_registry))
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job (alias for DELETE /api/jobs/<id>)."""
+    return _cancel_job(job_id)
+
+def _cancel_job(job_id):
+    job = evolution_scheduler.get(job_id) if evolution_scheduler is not None else None
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    if not evolution_scheduler.cancel(job_id):
+        return jsonify({"error": f"Job {job_id} already finished", "job": job.to_dict()}), 409
+    return jsonify(job.to_dict()), 202
+
 @app.route('/rollback/<int:version>')
 def rollback(version):
     """Rollback to a specific version."""
@@ -525,12 +1042,9 @@ def rollback(version):
 def view_version(version):
     """View a specific version of the AI code."""
     try:
-        # This is a placeholder implementation
-        backup_file = Path(app.config["BACKUP_DIR"]) / f"{Path(app.config['AI_MAIN_SCRIPT']).stem}_v{version}.py"
-        if backup_file.exists():
-            with open(backup_file, 'r') as f:
-                code = f.read()
-            created_at = backup_file.stat().st_mtime
+        code = ai_system.get_version_code(version) if hasattr(ai_system, 'get_version_code') else None
+        if code is not None:
+            created_at = ai_system.version_store.record(version).timestamp
             created_at_str = datetime.datetime.fromtimestamp(created_at).strftime('%Y-%m-%d %H:%M:%S')
         else:
             code = f"# Version {version} not found"
@@ -547,6 +1061,35 @@ def view_version(version):
 
 # Add this route to your Flask app
 
+def attach_strategies(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the best-matching strategies from the strategy library to a detection result."""
+    if result.get("paradox_detected"):
+        query = " ".join([result.get("message") or ""] + [m["phrase"] for m in result.get("matches", [])])
+        search = strategy_index.search_similar if STRATEGY_METHOD == "similar" else strategy_index.search
+        result["strategies"] = [m.to_dict() for m in search(query, STRATEGY_RESULTS)]
+    return result
+
+@app.route('/api/strategies')
+def strategies_api():
+    """
+    Search the strategy library.
+    
+    Query parameters:
+        q: Prompt or contradiction description
+        k: Number of results
+        method: "bm25" (keyword relevance) or "similar" (character n-gram
+            similarity, which also matches paraphrases)
+    """
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    k = request.args.get('k', STRATEGY_RESULTS, type=int)
+    method = request.args.get('method', 'bm25')
+    if method not in ("bm25", "similar"):
+        return jsonify({"error": "'method' must be 'bm25' or 'similar'"}), 400
+    search = strategy_index.search_similar if method == "similar" else strategy_index.search
+    return jsonify({"query": query, "method": method, "strategies": [m.to_dict() for m in search(query, k)]})
+
 @app.route('/api/check_paradox', methods=['POST'])
 def check_paradox():
     """Check if input contains paradoxical statements."""
@@ -559,10 +1102,43 @@ def check_paradox():
     if not prompt:
         return jsonify({"error": "No prompt provided"}), 400
     
+    # Run the plugin chain with per-plugin deadlines; plugins with scan() also
+    # report categories and matched spans
+    if plugin_engine is not None:
+        return jsonify(attach_strategies(plugin_engine.run(prompt).to_dict()))
+    
     # Call paradox detection plugin if available
     if hasattr(ai_system, 'plugins') and 'handle_paradox' in ai_system.plugins:
         result = ai_system.plugins['handle_paradox'](prompt)
         if result:
             return jsonify({"paradox_detected": True, "message": result})
     
-    return jsonify({"paradox_detected": False})
\ No newline at end of file
+    return jsonify({"paradox_detected": False})
+
+@app.route('/api/check_paradox/batch', methods=['POST'])
+def check_paradox_batch():
+    """
+    Screen many prompts in one request through the plugin chain.
+    
+    The body is a JSON array or NDJSON (one item per line, screened while it
+    is still being received). Items are prompt strings or {"id", "prompt"}
+    objects; items without an id are numbered by position. Results stream
+    back as NDJSON in input order, one line per item: {"id",
+    "paradox_detected", "plugin", "category", "message", "matches"}, or
+    {"id", "error"} for an invalid item.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = ndjson_records(request.stream)
+    elif request.is_json:
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            return jsonify({"error": "Request body must be a JSON array of prompts"}), 400
+    else:
+        return jsonify({"error": "Request must be a JSON array or NDJSON"}), 400
+    
+    def generate():
+        for results in batch_screener.screen_chunks(batch_items(records)):
+            yield "".join(json.dumps(attach_strategies(result)) + "\n" for result in results)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
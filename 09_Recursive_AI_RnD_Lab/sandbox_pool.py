@@ -0,0 +1,492 @@
+import os
+import sys
+import json
+import time
+import queue
+import select
+import signal
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import importlib
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from process_registry import default_registry
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger("sandbox_pool")
+
+DEFAULT_PRELOAD = ["json", "logging", "platform", "time", "datetime", "random", "math", "re", "collections"]
+
+
+class SandboxPoolError(RuntimeError):
+    """Raised when the pool cannot run a job (as opposed to the job itself failing)."""
+
+
+@dataclass
+class ResourceLimits:
+    """Per-run limits applied to a sandboxed script; None leaves a limit unset."""
+    address_space_mb: Optional[int] = 1024
+    cpu_seconds: Optional[int] = 30
+    open_files: Optional[int] = 256
+    output_bytes: Optional[int] = 1024 * 1024
+    nice: int = 10
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "ResourceLimits":
+        data = data or {}
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+    def apply(self) -> None:
+        """Apply the limits to the current process (call in the child before running the script)."""
+        if self.nice:
+            os.nice(self.nice)
+        if resource is None:
+            return
+        limits = [
+            (resource.RLIMIT_AS, self.address_space_mb and self.address_space_mb * 1024 * 1024),
+            (resource.RLIMIT_CPU, self.cpu_seconds),
+            (resource.RLIMIT_NOFILE, self.open_files),
+            (resource.RLIMIT_FSIZE, self.output_bytes),
+        ]
+        for which, value in limits:
+            if value:
+                _, hard = resource.getrlimit(which)
+                if hard != resource.RLIM_INFINITY:
+                    value = min(value, hard)
+                resource.setrlimit(which, (value, value))
+        if self.output_bytes:
+            # Let writes past the output limit fail with EFBIG instead of killing the process
+            signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+
+
+def _rusage_summary(rusage: Any, wall_time: float, output_bytes: int, limits: ResourceLimits) -> Dict[str, Any]:
+    """Turn a struct_rusage from wait4() into the resource figures reported per run."""
+    peak_rss_kb = rusage.ru_maxrss / 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return {
+        "wall_time": wall_time,
+        "cpu_time": rusage.ru_utime + rusage.ru_stime,
+        "cpu_user": rusage.ru_utime,
+        "cpu_system": rusage.ru_stime,
+        "peak_rss_mb": peak_rss_kb / 1024,
+        "output_bytes": output_bytes,
+        "output_truncated": bool(limits.output_bytes) and output_bytes >= limits.output_bytes
+    }
+
+
+def _wait_child(pid: int, timeout: float) -> Tuple[Optional[int], Any]:
+    """
+    Wait for a child to exit; kill its process group on timeout.
+
+    Returns:
+        Tuple of (exit_code or None on timeout, struct_rusage)
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        waited, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            return os.waitstatus_to_exitcode(status), rusage
+        if time.monotonic() >= deadline:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, _, rusage = os.wait4(pid, 0)
+            return None, rusage
+        time.sleep(delay)
+        delay = min(delay * 2, 0.02)
+
+
+def _read_text(path: str, limit: Optional[int] = None) -> str:
+    with open(path, "rb") as f:
+        return f.read(limit if limit else -1).decode("utf-8", "replace")
+
+
+def run_limited(cmd: List[str],
+                cwd: Optional[str] = None,
+                timeout: float = 30,
+                limits: Optional[ResourceLimits] = None) -> subprocess.CompletedProcess:
+    """
+    Run a command in a fresh process with resource limits and accounting.
+
+    Output goes to temporary files so the output-size limit applies to it.
+
+    Returns:
+        CompletedProcess whose `usage` attribute holds the resource figures
+
+    Raises:
+        subprocess.TimeoutExpired: If the command ran longer than `timeout`
+            (the exception also carries `usage`)
+    """
+    limits = limits or ResourceLimits()
+    with tempfile.TemporaryFile() as out_file, tempfile.TemporaryFile() as err_file:
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=out_file, stderr=err_file,
+                                   start_new_session=True, preexec_fn=limits.apply)
+        default_registry.register(process.pid, "sandbox", label=os.path.basename(cmd[1] if len(cmd) > 1 else cmd[0]))
+        returncode, rusage = _wait_child(process.pid, timeout)
+        process.returncode = returncode if returncode is not None else -signal.SIGKILL
+        wall_time = time.perf_counter() - start
+
+        output_bytes = out_file.tell() + err_file.tell()
+        out_file.seek(0)
+        err_file.seek(0)
+        stdout = out_file.read(limits.output_bytes or -1).decode("utf-8", "replace")
+        stderr = err_file.read(limits.output_bytes or -1).decode("utf-8", "replace")
+
+    usage = _rusage_summary(rusage, wall_time, output_bytes, limits)
+    default_registry.unregister(process.pid, usage=usage)
+    if returncode is None:
+        exc = subprocess.TimeoutExpired(cmd, timeout, output=stdout, stderr=stderr)
+        exc.usage = usage
+        raise exc
+    result = subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+    result.usage = usage
+    return result
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+
+def _run_child(script: str, argv: List[str], cwd: str, stdout_path: str, stderr_path: str,
+               limits: ResourceLimits) -> None:
+    """Body of the forked child: run one script as __main__ and exit."""
+    import runpy
+    import traceback
+
+    code = 0
+    try:
+        os.setpgid(0, 0)
+        os.chdir(cwd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(os.open(stdout_path, os.O_WRONLY | os.O_TRUNC), 1)
+        os.dup2(os.open(stderr_path, os.O_WRONLY | os.O_TRUNC), 2)
+        limits.apply()
+        sys.argv = argv
+        sys.path[0] = os.path.dirname(script)
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _handle_job(job: Dict[str, Any], notify: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    fd_out, stdout_path = tempfile.mkstemp(prefix="sandbox_out_")
+    fd_err, stderr_path = tempfile.mkstemp(prefix="sandbox_err_")
+    os.close(fd_out)
+    os.close(fd_err)
+    limits = ResourceLimits.from_dict(job.get("limits"))
+    try:
+        sys.stdout.flush()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            _run_child(job["script"], job.get("argv") or [job["script"]], job["cwd"],
+                       stdout_path, stderr_path, limits)
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass  # the child already did it, or has exited
+        notify({"started": pid})
+        returncode, rusage = _wait_child(pid, job["timeout"])
+        wall_time = time.perf_counter() - start
+        output_bytes = os.path.getsize(stdout_path) + os.path.getsize(stderr_path)
+        return {
+            "returncode": returncode,
+            "timed_out": returncode is None,
+            "stdout": _read_text(stdout_path, limits.output_bytes),
+            "stderr": _read_text(stderr_path, limits.output_bytes),
+            "usage": _rusage_summary(rusage, wall_time, output_bytes, limits)
+        }
+    finally:
+        os.unlink(stdout_path)
+        os.unlink(stderr_path)
+
+
+def worker_main(preload: List[str]) -> None:
+    """Entry point of a pool worker: import modules once, then fork a child per job."""
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    protocol_out = sys.stdout
+
+    def notify(message: Dict[str, Any]) -> None:
+        protocol_out.write(json.dumps(message) + "\n")
+        protocol_out.flush()
+
+    notify({"ready": True, "pid": os.getpid()})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if job.get("op") == "shutdown":
+            break
+        protocol_out.write(json.dumps(_handle_job(job, notify)) + "\n")
+        protocol_out.flush()
+
+
+# ----------------------------------------------------------------------
+# Pool side
+# ----------------------------------------------------------------------
+
+class _MessageReader:
+    """
+    Reads newline-delimited JSON messages from a pipe with a timeout.
+
+    The pipe is read with `os.read` into our own buffer: a buffered
+    `readline()` can pull several messages out of the pipe at once, after
+    which `select()` sees an empty pipe and waits although a message is
+    already buffered.
+    """
+
+    def __init__(self, fd: int):
+        self.fd = fd
+        self._buffer = b""
+
+    def read(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return the next message, or None on timeout or end of stream."""
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            readable, _, _ = select.select([self.fd], [], [], max(0.0, deadline - time.monotonic()))
+            if not readable:
+                return None
+            data = os.read(self.fd, 65536)
+            if not data:
+                return None
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+
+class _Worker:
+    """Handle to one warm worker process."""
+
+    def __init__(self, preload: List[str], startup_timeout: float):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--preload", ",".join(preload)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        self.runs = 0
+        # stdout is only ever read through this reader, never through the text wrapper
+        self._reader = _MessageReader(self.process.stdout.fileno())
+        ready = self._read_message(startup_timeout)
+        if not ready or not ready.get("ready"):
+            self.kill()
+            raise SandboxPoolError("Sandbox worker failed to start")
+        default_registry.register(self.process.pid, "sandbox_worker", job_id=None)
+
+    def _read_message(self, timeout: float) -> Optional[Dict[str, Any]]:
+        return self._reader.read(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, script: str, cwd: str, timeout: float, limits: ResourceLimits,
+            argv: Optional[List[str]] = None) -> Dict[str, Any]:
+        job = {"script": script, "argv": argv, "cwd": cwd, "timeout": timeout, "limits": asdict(limits)}
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise SandboxPoolError(f"Sandbox worker is not accepting jobs: {e}") from e
+        # Allow the worker a grace period beyond the job timeout to kill and reap the child
+        deadline = time.monotonic() + timeout + 5
+        child = None
+        while True:
+            response = self._read_message(max(0.0, deadline - time.monotonic()))
+            if response is None or "started" not in response:
+                break
+            child = response["started"]
+            default_registry.register(child, "sandbox", label=os.path.basename(script))
+        self.runs += 1
+        if child is not None:
+            default_registry.unregister(child, usage=response.get("usage") if response else None)
+        if response is None:
+            raise SandboxPoolError("Sandbox worker stopped responding")
+        return response
+
+    def stop(self) -> None:
+        try:
+            self.process.stdin.write(json.dumps({"op": "shutdown"}) + "\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+            default_registry.unregister(self.process.pid)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        default_registry.unregister(self.process.pid)
+
+
+class SandboxPool:
+    """
+    Pool of warm sandbox workers for executing candidate scripts.
+
+    Each worker is a long-lived interpreter that has already imported the
+    modules generated scripts commonly use. For every job it forks an isolated
+    child, which runs the script as `__main__` in the requested directory and is
+    killed (with its whole process group) if it exceeds the timeout. Workers
+    are recycled after `max_runs` jobs or as soon as they misbehave.
+    """
+
+    def __init__(self,
+                 size: int = 2,
+                 max_runs: int = 50,
+                 preload: Optional[List[str]] = None,
+                 startup_timeout: float = 10,
+                 limits: Optional[ResourceLimits] = None):
+        """
+        Initialize the pool and start its workers.
+
+        Args:
+            size: Number of worker processes
+            max_runs: Jobs a worker runs before it is replaced
+            preload: Modules each worker imports before forking children
+            startup_timeout: Seconds to wait for a worker to become ready
+            limits: Default resource limits applied to every job
+        """
+        if not hasattr(os, "fork"):
+            raise SandboxPoolError("Sandbox pool requires os.fork()")
+        self.size = max(1, size)
+        self.max_runs = max(1, max_runs)
+        self.preload = DEFAULT_PRELOAD if preload is None else preload
+        self.startup_timeout = startup_timeout
+        self.limits = limits or ResourceLimits()
+        self.stats = {"runs": 0, "timeouts": 0, "workers_started": 0, "workers_recycled": 0}
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self.preload, self.startup_timeout)
+        with self._lock:
+            self.stats["workers_started"] += 1
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self.stats["workers_recycled"] += 1
+        if self._closed:
+            return
+        try:
+            self._idle.put(self._start_worker())
+        except SandboxPoolError as e:
+            logger.error(f"Failed to replace sandbox worker: {e}")
+
+    def run(self,
+            script: str,
+            cwd: Optional[str] = None,
+            timeout: float = 30,
+            limits: Optional[ResourceLimits] = None,
+            argv: Optional[List[str]] = None) -> subprocess.CompletedProcess:
+        """
+        Run a script in a forked child of a warm worker.
+
+        Args:
+            script: Script to run as __main__
+            cwd: Working directory for the script
+            timeout: Seconds before the script is killed
+            limits: Resource limits (defaults to the pool's limits)
+            argv: sys.argv for the script (defaults to [script])
+
+        Returns:
+            CompletedProcess with returncode, stdout and stderr, like subprocess.run,
+            plus a `usage` attribute holding the run's resource figures
+
+        Raises:
+            subprocess.TimeoutExpired: If the script ran longer than `timeout`
+                (the exception also carries `usage`)
+            SandboxPoolError: If no worker could run the job
+        """
+        if self._closed:
+            raise SandboxPoolError("Sandbox pool is closed")
+        script = os.path.abspath(script)
+        cwd = os.path.abspath(cwd or os.getcwd())
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise SandboxPoolError("No sandbox worker available")
+
+        try:
+            response = worker.run(script, cwd, timeout, limits or self.limits, argv)
+        except SandboxPoolError:
+            self._replace(worker)
+            raise
+
+        crashed = response["returncode"] is not None and response["returncode"] < 0
+        if worker.runs >= self.max_runs or crashed or not worker.alive:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+
+        with self._lock:
+            self.stats["runs"] += 1
+            if response["timed_out"]:
+                self.stats["timeouts"] += 1
+        if response["timed_out"]:
+            exc = subprocess.TimeoutExpired([script], timeout, output=response["stdout"], stderr=response["stderr"])
+            exc.usage = response["usage"]
+            raise exc
+        result = subprocess.CompletedProcess([script], response["returncode"], response["stdout"], response["stderr"])
+        result.usage = response["usage"]
+        return result
+
+    @property
+    def saturated(self) -> bool:
+        """True when every worker is busy running a job."""
+        return self._idle.empty()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sandbox pool worker")
+    parser.add_argument("--worker", action="store_true")
+    parser.add_argument("--preload", default="")
+    args = parser.parse_args()
+    if args.worker:
+        worker_main([m for m in args.preload.split(",") if m])
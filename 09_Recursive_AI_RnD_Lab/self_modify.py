@@ -3,22 +3,28 @@ import sys
 import json
 import time
 import logging
+import shutil
 import hashlib
+import tempfile
+import threading
 import subprocess
-import importlib.util
-from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from flask import Flask, render_template
+from model_client import (ModelClient, ModelClientError, ModelLoopError, SubprocessModelClient, GenerationStats,
+                          create_model_client, stream_until_code_block)
+from loop_monitor import LoopMonitor
+from version_store import VersionStore
+from eval_cache import EvaluationCache
+from sandbox_pool import SandboxPool, SandboxPoolError, ResourceLimits, run_limited
+from benchmark_harness import BenchmarkHarness, BenchmarkResult, check_regression
+from log_pipeline import configure_logging
+from plugin_registry import PluginRegistry
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("ai_system.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging (JSON lines, written by a background thread, rotated by size and age)
+configure_logging("ai_system.log")
 logger = logging.getLogger("self_modifying_ai")
 
 app = Flask(__name__)
@@ -40,6 +46,36 @@ def format_uptime(seconds):
     else:
         return f"{int(seconds)}s"
 
+@dataclass
+class CandidateResult:
+    """Outcome of generating, validating and executing one candidate version."""
+    index: int
+    code: str
+    code_hash: str
+    valid: bool
+    success: bool = False
+    result: Dict[str, Any] = field(default_factory=dict)
+    runtime: float = 0.0
+    score: float = float("-inf")
+    cached: bool = False
+
+def default_candidate_score(candidate: CandidateResult) -> float:
+    """
+    Score a candidate: it must have run successfully, structured JSON results
+    are preferred over raw stdout, and faster runs win ties.
+    """
+    if not candidate.valid or not candidate.success:
+        return float("-inf")
+    score = 1.0
+    if "status" in candidate.result:
+        score += 0.5
+    if "error" in candidate.result or candidate.result.get("stderr"):
+        score -= 0.25
+    resources = candidate.result.get("resources") or {}
+    # Small penalty for memory-hungry candidates (full point at 1 GiB peak RSS)
+    score -= min(resources.get("peak_rss_mb", 0.0), 1024.0) / 1024.0 * 0.25
+    return score - min(candidate.runtime, 30.0) / 30.0
+
 class SelfModifyingAI:
     """
     A self-modifying AI system that can alter its own code and use various models.
@@ -63,7 +99,6 @@ class SelfModifyingAI:
         self.backup_dir = Path(backup_dir)
         self.config_file = config_file
         self.max_versions = max_versions
-        self.version = self._get_current_version()
         
         # Ensure backup directory exists
         self.backup_dir.mkdir(exist_ok=True, parents=True)
@@ -71,6 +106,66 @@ class SelfModifyingAI:
         # Load configuration
         self.config = self._load_config()
         
+        # Content-addressed, delta-compressed store for previous versions
+        self.version_store = VersionStore(self.backup_dir, Path(self.main_script).stem,
+                                          snapshot_interval=self.config.get("version_snapshot_interval", 20))
+        self.version = self._get_current_version()
+        
+        # Persistent cache of validation/execution results keyed by code hash
+        self.eval_cache: Optional[EvaluationCache] = None
+        if self.config.get("eval_cache_enabled", True):
+            self.eval_cache = EvaluationCache(
+                self.config.get("eval_cache_path", str(self.backup_dir / "eval_cache.sqlite3")),
+                max_entries=self.config.get("eval_cache_max_entries", 10000),
+                ttl=self.config.get("eval_cache_ttl", 7 * 24 * 3600)
+            )
+        
+        # rlimits applied to every execution of self-written code
+        self.sandbox_limits = ResourceLimits.from_dict(self.config.get("sandbox_limits"))
+        
+        # Warm sandbox workers; executions fall back to a cold subprocess without them
+        self.sandbox_pool: Optional[SandboxPool] = None
+        if self.config.get("sandbox_pool_size", 0) > 0:
+            try:
+                self.sandbox_pool = SandboxPool(
+                    size=self.config["sandbox_pool_size"],
+                    max_runs=self.config.get("sandbox_max_runs", 50),
+                    preload=self.config.get("sandbox_preload"),
+                    limits=self.sandbox_limits
+                )
+            except SandboxPoolError as e:
+                logger.warning(f"Sandbox pool unavailable, using cold subprocesses: {e}")
+        
+        # Benchmarks gate promotion on not regressing against the parent version
+        self.benchmark_harness: Optional[BenchmarkHarness] = None
+        if self.config.get("benchmark_enabled", False):
+            self.benchmark_harness = BenchmarkHarness(
+                sandbox_pool=self.sandbox_pool,
+                limits=self.sandbox_limits,
+                warmup=self.config.get("benchmark_warmup", 2),
+                iterations=self.config.get("benchmark_iterations", 10),
+                timeout=self.config.get("benchmark_timeout", 60)
+            )
+        self.last_benchmark: Optional[BenchmarkResult] = None
+        
+        # Long-lived model client, with the model service command as a fallback
+        self.model_client = create_model_client(self.config)
+        self.fallback_client = self._create_fallback_client()
+        self.last_generation_stats: Optional[GenerationStats] = None
+        
+        # Aborts responses that cycle or repeat earlier ones instead of waiting out model_timeout
+        self.loop_monitor: Optional[LoopMonitor] = None
+        if self.config.get("loop_monitor_enabled", True):
+            self.loop_monitor = LoopMonitor(
+                window=self.config.get("loop_window", 8),
+                repeats=self.config.get("loop_repeats", 3),
+                similarity=self.config.get("loop_similarity", 0.9),
+                shingle=self.config.get("loop_shingle", 8),
+                cycle_min_tokens=self.config.get("loop_cycle_min_tokens", 64)
+            )
+        self.last_tournament: List[CandidateResult] = []
+        self._promote_lock = threading.Lock()
+        
         # Initialize main script if it doesn't exist
         if not Path(self.main_script).exists():
             self._initialize_main_script()
@@ -88,17 +183,83 @@ class SelfModifyingAI:
         with open(self.config_file, "r") as f:
             return json.load(f)
 
-    def _get_current_version(self) -> int:
-        """Determine the current version by examining backup files or return 1 if none exist."""
-        if not self.backup_dir.exists():
-            return 1
-            
-        backup_files = list(self.backup_dir.glob(f"{Path(self.main_script).stem}_v*.py"))
-        if not backup_files:
-            return 1
+    def _create_fallback_client(self) -> Optional[ModelClient]:
+        """Create a subprocess client for the model service command, if one is configured."""
+        if not self.config.get("model_service") or isinstance(self.model_client, SubprocessModelClient):
+            return None
+        return SubprocessModelClient(
+            self.config["model_service"],
+            self.config.get("model_endpoint", ""),
+            self.config.get("model_timeout", 60)
+        )
+
+    def _call_model(self, prompt: str, parent: Optional[str] = None) -> str:
+        """
+        Send a prompt to the model, falling back to the subprocess client on failure.
+        
+        Args:
+            prompt: Prompt to send to the model
+            parent: Code the response is expected to rewrite (for the loop monitor)
             
-        versions = [int(f.stem.split('_v')[1]) for f in backup_files]
-        return max(versions) + 1 if versions else 1
+        Returns:
+            Raw model response
+        """
+        if self.model_client is None:
+            raise ModelClientError("No model backend configured (set api_url or model_service)")
+        try:
+            return self._invoke_client(self.model_client, prompt, parent)
+        except ModelLoopError:
+            # The fallback runs the same model on the same prompt
+            raise
+        except ModelClientError as e:
+            if self.fallback_client is None:
+                raise
+            logger.warning(f"Model client failed ({e}), falling back to model service command")
+            return self._invoke_client(self.fallback_client, prompt, parent)
+
+    def _invoke_client(self, client: ModelClient, prompt: str, parent: Optional[str] = None) -> str:
+        """
+        Run a prompt through a client, streaming when `model_streaming` is enabled.
+        
+        In streaming mode generation is stopped as soon as the first complete
+        code block has arrived, and timings are kept in `last_generation_stats`.
+        The loop monitor compares only what the response adds to `parent`.
+        
+        Raises:
+            ModelLoopError: The loop monitor fired (mid-stream when streaming)
+        """
+        if not self.config.get("model_streaming", False):
+            response = client.generate(prompt)
+            detection = self.loop_monitor.observe(response, parent) if self.loop_monitor is not None else None
+            if detection is not None:
+                raise ModelLoopError(detection)
+            return response
+        
+        response, stats = stream_until_code_block(client, prompt, self.loop_monitor, parent)
+        self.last_generation_stats = stats
+        if stats.loop is not None:
+            raise ModelLoopError(stats.loop)
+        if stats.time_to_first_token is not None:
+            code_time = f"{stats.time_to_code_complete:.2f}s" if stats.time_to_code_complete is not None else "n/a"
+            logger.info(f"Model stream: first token after {stats.time_to_first_token:.2f}s, "
+                        f"code complete after {code_time}, {stats.chunks} chunks")
+        return response
+
+    def _get_current_version(self) -> int:
+        """
+        Determine the current version from the version store index.
+        
+        Promoted versions are stored as they are written, so the main script
+        is normally the latest stored version. A script that differs from it
+        (e.g. edited by hand) is treated as a new, not yet stored version.
+        """
+        latest = self.version_store.latest_version()
+        record = self.version_store.record(latest)
+        if record is not None and Path(self.main_script).exists():
+            with open(self.main_script, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() == record.hash:
+                    return latest
+        return latest + 1
 
     def _initialize_main_script(self) -> None:
         """Create the initial main script if it doesn't exist."""
@@ -121,43 +282,108 @@ if __name__ == "__main__":
 
     def backup_current_version(self) -> str:
         """
-        Create a backup of the current main script.
+        Store the current main script in the version store.
         
         Returns:
-            Path to the backup file
+            Path to the stored blob for this version
         """
         if not Path(self.main_script).exists():
             logger.warning(f"{self.main_script} does not exist, nothing to backup")
             return ""
         
-        # Create backup filename with version number
-        backup_filename = self.backup_dir / f"{Path(self.main_script).stem}_v{self.version}.py"
-        
-        # Copy current script to backup
         with open(self.main_script, "r") as src:
             current_code = src.read()
-            
-        with open(backup_filename, "w") as dest:
-            dest.write(current_code)
-            
-        logger.info(f"Backed up {self.main_script} to {backup_filename}")
+        
+        parent = self.version - 1 if (self.version - 1) in self.version_store else None
+        record = self.version_store.put(self.version, current_code, parent=parent)
+        logger.info(f"Backed up {self.main_script} as version {self.version} ({record.hash[:12]})")
         
         # Clean up old backups if we exceed max_versions
         self._cleanup_old_backups()
         
-        return str(backup_filename)
+        return self.version_store.location(self.version)
 
     def _cleanup_old_backups(self) -> None:
         """Remove oldest backups if we exceed the maximum number of versions to keep."""
-        backup_files = list(self.backup_dir.glob(f"{Path(self.main_script).stem}_v*.py"))
-        if len(backup_files) <= self.max_versions:
-            return
-            
-        # Sort by version number and remove oldest
-        backup_files.sort(key=lambda f: int(f.stem.split('_v')[1]))
-        for old_file in backup_files[:len(backup_files) - self.max_versions]:
-            os.remove(old_file)
-            logger.info(f"Removed old backup: {old_file}")
+        for version in self.version_store.prune(self.max_versions):
+            logger.info(f"Removed old backup: version {version}")
+
+    def get_version_code(self, version: int) -> Optional[str]:
+        """Return the stored code for a version, or None if it is not stored."""
+        return self.version_store.get(version)
+
+    def get_version_history(self, limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        """List the most recent stored versions, newest first."""
+        return [{
+            "number": record.version,
+            "hash": record.hash,
+            "parent": record.parent,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.timestamp)),
+            "size": record.size,
+            "benchmark": record.metadata.get("benchmark")
+        } for record in self.version_store.history(limit)]
+
+    def benchmark_code(self, code: str) -> BenchmarkResult:
+        """Benchmark a piece of code in a private sandbox directory."""
+        sandbox_root = self.backup_dir / "sandboxes"
+        sandbox_root.mkdir(exist_ok=True, parents=True)
+        sandbox = Path(tempfile.mkdtemp(prefix="benchmark_", dir=sandbox_root))
+        try:
+            script_path = sandbox / Path(self.main_script).name
+            script_path.write_text(code)
+            return self.benchmark_harness.run(str(script_path))
+        finally:
+            shutil.rmtree(sandbox, ignore_errors=True)
+
+    def benchmark_version(self, version: int) -> Optional[BenchmarkResult]:
+        """
+        Return the benchmark stored with a version, running it first if needed.
+        
+        Returns:
+            The benchmark, or None if benchmarking is disabled or the version is not stored
+        """
+        record = self.version_store.record(version)
+        if self.benchmark_harness is None or record is None:
+            return None
+        if "benchmark" in record.metadata:
+            return BenchmarkResult.from_dict(record.metadata["benchmark"])
+        
+        result = self.benchmark_code(self.version_store.get(version))
+        self.version_store.set_metadata(version, "benchmark", result.to_dict())
+        return result
+
+    def _check_performance(self, code: str) -> Tuple[bool, str, Optional[BenchmarkResult]]:
+        """
+        Benchmark a candidate and compare it with the current (parent) version.
+        
+        Returns:
+            Tuple of (acceptable, reason, candidate_benchmark)
+        """
+        if self.benchmark_harness is None:
+            return True, "benchmarking disabled", None
+        
+        baseline = self.benchmark_version(self.version)
+        result = self.benchmark_code(code)
+        acceptable, reason = check_regression(
+            result, baseline,
+            latency_threshold=self.config.get("benchmark_regression_threshold", 0.10),
+            memory_threshold=self.config.get("benchmark_memory_threshold", 0.25),
+            latency_floor=self.config.get("benchmark_latency_floor", 0.001)
+        )
+        return acceptable, reason, result
+
+    def _promote(self, code: str, benchmark: Optional[BenchmarkResult] = None) -> None:
+        """Write new code to the main script as the next version, keeping its benchmark."""
+        with open(self.main_script, "w") as f:
+            f.write(code)
+        self.version += 1
+        self.last_benchmark = benchmark
+        self.version_store.put(self.version, code, parent=self.version - 1)
+        if benchmark is not None:
+            self.version_store.set_metadata(self.version, "benchmark", benchmark.to_dict())
+        if self.loop_monitor is not None:
+            # Earlier responses were edits of the code just replaced
+            self.loop_monitor.reset()
 
     def generate_new_code(self) -> str:
         """
@@ -172,31 +398,18 @@ if __name__ == "__main__":
                 current_code = f.read()
                 
             # Create a prompt for the model
-            prompt = f"""
-            # Current AI code:
-            ```python
-            {current_code}
-            ```
-            
-            # Task: Improve this code by adding new capabilities or optimizing existing ones.
-            # Return only valid Python code for the new version.
-            """
+            prompt = self._build_prompt(current_code)
             
             # Call the model service
-            logger.info(f"Generating new code using model service: {self.config['model_service']}")
-            result = subprocess.run(
-                [self.config['model_service'], self.config['model_endpoint'], prompt],
-                capture_output=True,
-                text=True,
-                timeout=60  # 60 second timeout
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"Model execution failed: {result.stderr}")
+            logger.info(f"Generating new code using {type(self.model_client).__name__}")
+            try:
+                response = self._call_model(prompt, current_code)
+            except ModelClientError as e:
+                logger.error(str(e))
                 return current_code
                 
             # Extract the code from the model's response
-            new_code = self._extract_code_from_response(result.stdout)
+            new_code = self._extract_code_from_response(response)
             
             # Validate that the returned code is valid Python
             if not self._validate_python_code(new_code):
@@ -211,6 +424,42 @@ if __name__ == "__main__":
             # Fall back to a safe modification if the model fails
             return self._create_fallback_modification()
 
+    def _build_prompt(self, current_code: str) -> str:
+        """Create the code-improvement prompt for the model."""
+        return f"""
+            # Current AI code:
+            ```python
+            {current_code}
+            ```
+            
+            # Task: Improve this code by adding new capabilities or optimizing existing ones.
+            # Return only valid Python code for the new version.
+            """
+
+    def generate_candidate(self, current_code: str) -> Optional[str]:
+        """
+        Generate one candidate version without any fallback.
+        
+        Args:
+            current_code: Code the candidate should improve on
+            
+        Returns:
+            Candidate code, or None if the model failed or returned invalid code
+        """
+        new_code = self.draft_candidate(current_code)
+        if new_code is None or not self._validate_python_code(new_code):
+            return None
+        return new_code
+
+    def draft_candidate(self, current_code: str) -> Optional[str]:
+        """Ask the model for a candidate and extract its code, without validating it."""
+        try:
+            response = self._call_model(self._build_prompt(current_code), current_code)
+        except Exception as e:
+            logger.error(f"Candidate generation failed: {str(e)}")
+            return None
+        return self._extract_code_from_response(response)
+
     def _extract_code_from_response(self, response: str) -> str:
         """Extract code from the model's response, handling various formatting."""
         # Look for code blocks
@@ -233,12 +482,22 @@ if __name__ == "__main__":
         Returns:
             True if code is valid Python, False otherwise
         """
+        code_hash = hashlib.md5(code.encode()).hexdigest()
+        if self.eval_cache is not None:
+            cached = self.eval_cache.get(code_hash)
+            if cached is not None:
+                return cached.valid
+        
         try:
             compile(code, '<string>', 'exec')
-            return True
+            valid = True
         except SyntaxError:
             logger.error("Generated code contains syntax errors")
-            return False
+            valid = False
+        
+        if self.eval_cache is not None:
+            self.eval_cache.put(code_hash, valid)
+        return valid
 
     def _create_fallback_modification(self) -> str:
         """Create a simple but safe modification to the existing code."""
@@ -273,13 +532,22 @@ if __name__ == "__main__":
     print(f"Execution complete: {{result}}")
 """
 
-    def self_modify(self) -> Tuple[bool, str]:
+    def self_modify(self, num_candidates: Optional[int] = None) -> Tuple[bool, str]:
         """
         Modify the main AI script with newly generated code.
         
+        Args:
+            num_candidates: Number of candidates to generate; more than one runs a
+                tournament (defaults to `candidates_per_cycle` in the config)
+        
         Returns:
             Tuple of (success_flag, message)
         """
+        if num_candidates is None:
+            num_candidates = self.config.get("candidates_per_cycle", 1)
+        if num_candidates > 1:
+            return self.self_modify_tournament(num_candidates)
+        
         try:
             # First, backup the current version
             backup_path = self.backup_current_version()
@@ -299,9 +567,11 @@ if __name__ == "__main__":
             
             # Only write if the code actually changed
             if original_hash != new_hash:
-                with open(self.main_script, "w") as f:
-                    f.write(new_code)
-                self.version += 1
+                acceptable, reason, benchmark = self._check_performance(new_code)
+                if not acceptable:
+                    logger.warning(f"Rejected new code: {reason}")
+                    return False, f"Rejected: {reason}"
+                self._promote(new_code, benchmark)
                 logger.info(f"Successfully modified {self.main_script} to version {self.version}")
                 return True, f"Modified to version {self.version}"
             else:
@@ -312,48 +582,243 @@ if __name__ == "__main__":
             logger.error(f"Error in self_modify: {str(e)}")
             return False, f"Error: {str(e)}"
 
-    def run_self_written_code(self) -> Tuple[bool, Dict[str, Any]]:
+    def self_modify_tournament(self,
+                               num_candidates: int,
+                               score_fn: Optional[Callable[[CandidateResult], float]] = None) -> Tuple[bool, str]:
+        """
+        Generate several candidates concurrently and promote the best one.
+        
+        Each valid candidate is executed in its own sandbox directory and scored
+        with `score_fn` (defaults to `default_candidate_score`).
+        
+        Args:
+            num_candidates: Number of candidates to generate
+            score_fn: Callable mapping a CandidateResult to a score
+            
+        Returns:
+            Tuple of (success_flag, message)
+        """
+        try:
+            backup_path = self.backup_current_version()
+            if not backup_path:
+                return False, "Failed to create backup"
+            
+            current_code = self.get_current_code()
+            workers = min(num_candidates, self.config.get("candidate_workers", os.cpu_count() or 1))
+            
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="candidate") as pool:
+                codes = list(pool.map(lambda _: self.generate_candidate(current_code), range(num_candidates)))
+                candidates = list(pool.map(self.evaluate_candidate, range(num_candidates), codes))
+            
+            return self.promote_best(candidates, score_fn, parent_hash=hashlib.md5(current_code.encode()).hexdigest())
+        
+        except Exception as e:
+            logger.error(f"Error in self_modify_tournament: {str(e)}")
+            return False, f"Error: {str(e)}"
+
+    def promote_best(self,
+                     candidates: List[CandidateResult],
+                     score_fn: Optional[Callable[[CandidateResult], float]] = None,
+                     parent_hash: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Score evaluated candidates and promote the best one that passes the benchmark gate.
+        
+        Promotions are serialized, and candidates derived from code that is no
+        longer current are not promoted, so concurrent jobs cannot overwrite
+        each other's promotions with children of a stale parent.
+        
+        Args:
+            candidates: Evaluated candidates
+            score_fn: Callable mapping a CandidateResult to a score
+            parent_hash: md5 of the code the candidates were derived from
+            
+        Returns:
+            Tuple of (success_flag, message)
+        """
+        with self._promote_lock:
+            return self._promote_best(candidates, score_fn or default_candidate_score, parent_hash)
+
+    def _promote_best(self,
+                      candidates: List[CandidateResult],
+                      score_fn: Callable[[CandidateResult], float],
+                      parent_hash: Optional[str]) -> Tuple[bool, str]:
+        num_candidates = len(candidates)
+        current_code = self.get_current_code()
+        stale = parent_hash is not None and hashlib.md5(current_code.encode()).hexdigest() != parent_hash
+        # Extracted code is stripped, so compare against the stripped current code
+        current_code = current_code.strip()
+        for candidate in candidates:
+            if candidate.valid:
+                candidate.score = score_fn(candidate)
+                if self.eval_cache is not None and candidate.score != float("-inf"):
+                    self.eval_cache.update_score(candidate.code_hash, candidate.score)
+        
+        ranked = sorted((c for c in candidates if c.success and c.code.strip() != current_code),
+                        key=lambda c: c.score, reverse=True)
+        logger.info(f"Tournament: {sum(c.valid for c in candidates)}/{num_candidates} valid, "
+                    f"{sum(bool(c.success) for c in candidates)} ran successfully")
+        self.last_tournament = candidates
+        if stale:
+            logger.warning(f"Not promoting: version {self.version} replaced the candidates' parent")
+            return False, f"Stale parent: version {self.version} was promoted after these candidates were generated"
+        if not ranked or ranked[0].score == float("-inf"):
+            return False, f"No viable candidate among {num_candidates}"
+        
+        # The parent must be stored before promoting (a no-op if it already is)
+        if not self.backup_current_version():
+            return False, "Failed to create backup"
+        rejected = []
+        for best in ranked:
+            if best.score == float("-inf"):
+                break
+            acceptable, reason, benchmark = self._check_performance(best.code)
+            if not acceptable:
+                logger.warning(f"Candidate {best.index} rejected: {reason}")
+                rejected.append(f"candidate {best.index}: {reason}")
+                continue
+            self._promote(best.code, benchmark)
+            logger.info(f"Promoted candidate {best.index} (score {best.score:.3f}) to version {self.version}")
+            return True, f"Modified to version {self.version} (candidate {best.index} of {num_candidates})"
+        return False, "All candidates regressed: " + "; ".join(rejected)
+
+    def evaluate_candidate(self, index: int, code: Optional[str]) -> CandidateResult:
+        """
+        Execute a candidate in a private sandbox directory and record the outcome.
+        
+        A `code` of None records an invalid candidate without running anything.
+        """
+        if code is None:
+            return CandidateResult(index=index, code="", code_hash="", valid=False)
+        
+        candidate = CandidateResult(index=index, code=code,
+                                    code_hash=hashlib.md5(code.encode()).hexdigest(), valid=True)
+        # Candidates have already been validated, which counted this code's cache lookup
+        cached = (self.eval_cache.get(candidate.code_hash, executed_only=True, count=False)
+                  if self.eval_cache else None)
+        if cached is not None:
+            logger.info(f"Candidate {index} answered from evaluation cache ({candidate.code_hash[:12]})")
+            candidate.success, candidate.result = cached.success, cached.result
+            candidate.runtime, candidate.cached = cached.runtime or 0.0, True
+            return candidate
+        
+        sandbox_root = self.backup_dir / "sandboxes"
+        sandbox_root.mkdir(exist_ok=True, parents=True)
+        sandbox = Path(tempfile.mkdtemp(prefix=f"candidate_{index}_", dir=sandbox_root))
+        try:
+            script_path = sandbox / Path(self.main_script).name
+            script_path.write_text(code)
+            candidate.success, candidate.result, candidate.runtime, cacheable = self._execute_script(
+                str(script_path), cwd=str(sandbox))
+        finally:
+            shutil.rmtree(sandbox, ignore_errors=True)
+        
+        if self.eval_cache is not None and cacheable:
+            self.eval_cache.put(candidate.code_hash, True, candidate.success, candidate.result, candidate.runtime)
+        return candidate
+
+    def run_self_written_code(self,
+                              script_path: Optional[str] = None,
+                              cwd: Optional[str] = None,
+                              use_cache: bool = True) -> Tuple[bool, Dict[str, Any]]:
         """
         Execute the modified AI main script in a controlled environment.
         
+        Code that has already been executed is answered from the evaluation
+        cache without spawning a process.
+        
+        Args:
+            script_path: Script to run (defaults to the main script)
+            cwd: Working directory for the run (defaults to the current one)
+            use_cache: Consult and update the evaluation cache
+        
         Returns:
             Tuple of (success_flag, execution_result)
         """
+        script_path = script_path or self.main_script
+        code_hash = None
+        if use_cache and self.eval_cache is not None:
+            try:
+                with open(script_path, "rb") as f:
+                    code_hash = hashlib.md5(f.read()).hexdigest()
+            except OSError as e:
+                logger.error(f"Error running self-written code: {str(e)}")
+                return False, {"error": str(e)}
+            cached = self.eval_cache.get(code_hash, executed_only=True)
+            if cached is not None:
+                logger.info(f"Using cached execution result for {script_path} ({code_hash[:12]})")
+                return cached.success, cached.result
+        
+        success, execution_result, runtime, cacheable = self._execute_script(script_path, cwd)
+        if code_hash is not None and cacheable:
+            self.eval_cache.put(code_hash, True, success, execution_result, runtime)
+        return success, execution_result
+
+    def _execute_script(self, script_path: str,
+                        cwd: Optional[str] = None) -> Tuple[bool, Dict[str, Any], float, bool]:
+        """
+        Run a script in a warm sandbox worker, or a fresh interpreter if there is no pool.
+        
+        Returns:
+            Tuple of (success_flag, execution_result, runtime_seconds, cacheable);
+            results shaped by the infrastructure (timeouts, spawn errors, a
+            failed sandbox pool) are not cacheable
+        """
+        start = time.perf_counter()
+        success, execution_result, cacheable = self._spawn_script(script_path, cwd)
+        return success, execution_result, time.perf_counter() - start, cacheable
+
+    def _spawn_script(self, script_path: str, cwd: Optional[str] = None) -> Tuple[bool, Dict[str, Any], bool]:
         try:
-            logger.info(f"Executing {self.main_script}")
+            logger.info(f"Executing {script_path}")
             
-            # Run in a subprocess to isolate execution
-            result = subprocess.run(
-                [sys.executable, self.main_script],
-                capture_output=True,
-                text=True,
-                timeout=30  # 30 second timeout to prevent infinite loops
-            )
-            
-            if result.returncode == 0:
-                logger.info(f"Successfully executed {self.main_script}")
-                # Try to parse any JSON output from the script
+            result = None
+            cacheable = True
+            if self.sandbox_pool is not None:
                 try:
-                    # Check if output contains JSON
-                    output = result.stdout.strip()
-                    if output.startswith("{") and output.endswith("}"):
-                        execution_result = json.loads(output)
-                    else:
-                        execution_result = {"stdout": output, "stderr": result.stderr}
-                except json.JSONDecodeError:
-                    execution_result = {"stdout": result.stdout, "stderr": result.stderr}
-                    
-                return True, execution_result
-            else:
-                logger.error(f"Execution failed: {result.stderr}")
-                return False, {"error": result.stderr, "stdout": result.stdout}
+                    result = self.sandbox_pool.run(script_path, cwd=cwd, timeout=30)
+                except SandboxPoolError as e:
+                    logger.warning(f"Sandbox pool failed ({e}), running in a cold subprocess")
+                    cacheable = False
+            
+            if result is None:
+                # Run in a resource-limited subprocess to isolate execution
+                result = run_limited(
+                    [sys.executable, os.path.abspath(script_path)],
+                    cwd=cwd,
+                    timeout=30,  # 30 second timeout to prevent infinite loops
+                    limits=self.sandbox_limits
+                )
+            
+            success, execution_result = self._parse_execution(script_path, result)
+            execution_result["resources"] = result.usage
+            return success, execution_result, cacheable
                 
-        except subprocess.TimeoutExpired:
-            logger.error(f"Execution of {self.main_script} timed out")
-            return False, {"error": "Execution timed out"}
+        except subprocess.TimeoutExpired as e:
+            logger.error(f"Execution of {script_path} timed out")
+            return False, {"error": "Execution timed out", "resources": getattr(e, "usage", {})}, False
         except Exception as e:
             logger.error(f"Error running self-written code: {str(e)}")
-            return False, {"error": str(e)}
+            return False, {"error": str(e)}, False
+
+    def _parse_execution(self, script_path: str, result: subprocess.CompletedProcess) -> Tuple[bool, Dict[str, Any]]:
+        """Turn a finished run into (success_flag, execution_result)."""
+        if result.returncode == 0:
+            logger.info(f"Successfully executed {script_path}")
+            # Try to parse any JSON output from the script
+            try:
+                # Check if output contains JSON
+                output = result.stdout.strip()
+                if output.startswith("{") and output.endswith("}"):
+                    execution_result = json.loads(output)
+                else:
+                    execution_result = {"stdout": output, "stderr": result.stderr}
+            except json.JSONDecodeError:
+                execution_result = {"stdout": result.stdout, "stderr": result.stderr}
+                
+            return True, execution_result
+        else:
+            logger.error(f"Execution failed: {result.stderr}")
+            return False, {"error": result.stderr, "stdout": result.stdout}
 
     def rollback_to_version(self, version: int) -> bool:
         """
@@ -365,15 +830,12 @@ if __name__ == "__main__":
         Returns:
             True if rollback successful, False otherwise
         """
-        backup_file = self.backup_dir / f"{Path(self.main_script).stem}_v{version}.py"
-        if not backup_file.exists():
+        if version not in self.version_store:
             logger.error(f"Version {version} not found in backups")
             return False
             
         try:
-            # Read backup file
-            with open(backup_file, "r") as f:
-                backup_code = f.read()
+            backup_code = self.version_store.get(version)
                 
             # Write to main script
             with open(self.main_script, "w") as f:
@@ -386,50 +848,18 @@ if __name__ == "__main__":
             return False
 
     def load_plugins(self):
-        """Load strategy plugins from the strategy_plugins directory."""
-        self.plugins = {}
-        plugin_dir = Path(__file__).parent / "strategy_plugins"
-        
-        if not plugin_dir.exists():
-            logger.warning(f"Plugin directory {plugin_dir} not found")
-            return
-        
-        logger.info(f"Scanning for plugins in {plugin_dir}")
+        """
+        Index strategy plugins from the strategy_plugins manifest.
         
-        for plugin_path in plugin_dir.glob("*.py"):
-            if plugin_path.name.startswith("__"):
-                continue  # Skip __init__.py and similar files
-            
-            try:
-                plugin_name = plugin_path.stem
-                logger.info(f"Loading plugin: {plugin_name}")
-                
-                # Load the plugin module
-                spec = importlib.util.spec_from_file_location(plugin_name, plugin_path)
-                if spec is None:
-                    logger.warning(f"Failed to create spec for {plugin_path}")
-                    continue
-                    
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Check for handle function
-                if hasattr(module, "handle"):
-                    self.plugins[plugin_name] = module.handle
-                    logger.info(f"Registered plugin {plugin_name} with 'handle' function")
-                # Check for register_plugin function
-                elif hasattr(module, "register_plugin"):
-                    plugin_func = module.register_plugin()
-                    if callable(plugin_func):
-                        self.plugins[plugin_name] = plugin_func
-                        logger.info(f"Registered plugin {plugin_name} via 'register_plugin' function")
-                    else:
-                        logger.warning(f"Plugin {plugin_name} register_plugin() did not return a callable")
-                else:
-                    logger.warning(f"Plugin {plugin_name} has no 'handle' or 'register_plugin' function")
-                    
-            except Exception as e:
-                logger.error(f"Error loading plugin {plugin_path}: {str(e)}")
+        Nothing is imported here: `self.plugins` (name -> callable) and
+        `self.plugin_modules` (name -> module) import each plugin on first
+        use, and `plugin_registry.watch()` reloads plugins whose files change.
+        """
+        plugin_dir = Path(__file__).parent / "strategy_plugins"
+        self.plugin_registry = PluginRegistry(plugin_dir)
+        self.plugins = self.plugin_registry
+        self.plugin_modules = self.plugin_registry.modules
+        logger.info(f"Indexed {len(self.plugin_registry)} plugins in {plugin_dir}")
 
     def get_current_code(self) -> str:
         """Get the current code of the main script."""
@@ -450,7 +880,7 @@ def main():
             main_script="AI_Main.py",
             backup_dir="ai_backups",
             config_file="config.json",
-            max_versions=10
+            max_versions=100000
         )
         
         # Perform self-modification
@@ -0,0 +1,266 @@
+import re
+import math
+import json
+import time
+import heapq
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from ngram_index import NgramIndex
+
+logger = logging.getLogger("strategy_index")
+
+DEFAULT_LIBRARY = Path(__file__).resolve().parent.parent / "03_Recursive_AI_Protocols" / "Recursive_Strategy_Library_v0.1.json"
+
+# Indexed fields and their weights: a query term in the contradiction type
+# says more about the entry than the same term in its example
+FIELD_WEIGHTS: Dict[str, float] = {"contradiction_type": 3.0, "strategy": 1.0, "example_usage": 1.0}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be because but by can do does for from has have how i if in into is it its "
+    "me my not of on one or so such than that the their then there these they this to was we what "
+    "when which while who will with you your".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural endings folded ("loops" -> "loop")."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+@dataclass
+class StrategyMatch:
+    contradiction_type: str
+    strategy: str
+    example_usage: str
+    source_reference: str
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class StrategyIndex:
+    """
+    BM25 search over the recursive strategy library.
+
+    Entries are indexed once into an inverted index (term -> {entry id:
+    weighted term frequency}), with the fields weighted by `FIELD_WEIGHTS`
+    (BM25F-style: weighted frequencies and a weighted document length). A
+    query only touches the postings of its own terms, so lookups stay well
+    under a millisecond for libraries of thousands of entries. Each
+    posting's BM25 contribution is precomputed, so scoring is one addition
+    per posting.
+
+    The library file is re-checked at most every `check_interval` seconds
+    when searching. When its content changes, only added and removed
+    entries are tokenized and (un)indexed; unchanged entries keep their
+    postings and only the collection statistics are recomputed. The
+    n-gram index behind `search_similar` is rebuilt as a whole, since its
+    weights depend on every entry.
+    """
+
+    def __init__(self, path: Path = DEFAULT_LIBRARY, k1: float = 1.2, b: float = 0.75,
+                 check_interval: Optional[float] = 2.0):
+        """
+        Load and index the library.
+
+        Args:
+            path: Strategy library JSON (a list of entries)
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            check_interval: Seconds between checks for library changes (None disables)
+        """
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.check_interval = check_interval
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.idf: Dict[str, float] = {}
+        # term -> {entry id: BM25 contribution}, so a query only sums precomputed weights
+        self._impacts: Dict[str, Dict[int, float]] = {}
+        self._lengths: Dict[int, float] = {}
+        self._avg_length = 0.0
+        self._keys: Dict[str, Optional[int]] = {}  # entry content hash -> entry id (None: nothing to index)
+        # Character n-gram index for paraphrase matching, rebuilt whenever entries change
+        self._similar: Optional[NgramIndex] = None
+        self._similar_ids: List[int] = []
+        self._ids = 0
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> str:
+        return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _add(self, entry: Dict[str, Any]) -> Optional[int]:
+        frequencies: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(str(entry.get(field, ""))):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+                length += weight
+        if not length:
+            # No searchable text (empty or missing fields); it could never match a query
+            return None
+        doc_id = self._ids
+        self._ids += 1
+        for token, tf in frequencies.items():
+            self.postings.setdefault(token, {})[doc_id] = tf
+        self.entries[doc_id] = entry
+        self._lengths[doc_id] = length
+        return doc_id
+
+    def _remove(self, doc_id: int) -> None:
+        entry = self.entries.pop(doc_id)
+        del self._lengths[doc_id]
+        for field in FIELD_WEIGHTS:
+            for token in tokenize(str(entry.get(field, ""))):
+                postings = self.postings.get(token)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[token]
+
+    def _update_statistics(self) -> None:
+        n = len(self.entries)
+        self._avg_length = sum(self._lengths.values()) / n if n else 0.0
+        self.idf = {token: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for token, docs in self.postings.items()}
+        average = self._avg_length or 1.0
+        norms = {doc_id: self.k1 * (1 - self.b + self.b * length / average)
+                 for doc_id, length in self._lengths.items()}
+        self._impacts = {
+            token: {doc_id: self.idf[token] * tf * (self.k1 + 1) / (tf + norms[doc_id])
+                    for doc_id, tf in docs.items()}
+            for token, docs in self.postings.items()
+        }
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Re-index the library if the file changed.
+
+        Returns:
+            True if entries were added or removed
+        """
+        try:
+            st = self.path.stat()
+        except OSError as e:
+            logger.error(f"Strategy library unavailable: {e}")
+            return False
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp and not force:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                library = json.load(f)
+            if not isinstance(library, list):
+                raise ValueError("expected a list of entries")
+        except (OSError, ValueError) as e:
+            # Keep serving the previous version (e.g. the file is mid-write)
+            logger.error(f"Error reading strategy library {self.path}: {e}")
+            return False
+
+        keys = {self._key(entry): entry for entry in library if isinstance(entry, dict)}
+        with self._lock:
+            removed = [key for key in self._keys if key not in keys]
+            added = [key for key in keys if key not in self._keys]
+            for key in removed:
+                doc_id = self._keys.pop(key)
+                if doc_id is not None:
+                    self._remove(doc_id)
+            for key in added:
+                self._keys[key] = self._add(keys[key])
+                if self._keys[key] is None:
+                    logger.warning(f"Skipping strategy entry with no indexable text: {keys[key]}")
+            if removed or added:
+                self._update_statistics()
+                self._similar_ids = list(self.entries)
+                self._similar = NgramIndex([" ".join(str(self.entries[i].get(field, "")) for field in FIELD_WEIGHTS)
+                                            for i in self._similar_ids])
+            self._stamp = stamp
+        if removed or added:
+            logger.info(f"Indexed strategy library {self.path.name}: "
+                        f"{len(added)} added, {len(removed)} removed, {len(self.entries)} entries")
+        return bool(removed or added)
+
+    def search(self, query: str, k: int = 3) -> List[StrategyMatch]:
+        """
+        Return the `k` best-scoring strategies for a prompt or contradiction description.
+
+        Args:
+            query: Free text, e.g. a detection message plus the matched phrases
+            k: Number of results
+
+        Returns:
+            Matches ordered by descending BM25 score (entries sharing no term are left out)
+        """
+        self._maybe_refresh()
+        with self._lock:
+            scores: Dict[int, float] = {}
+            for token in set(tokenize(query)):
+                impacts = self._impacts.get(token)
+                if not impacts:
+                    continue
+                if not scores:
+                    scores = dict(impacts)
+                    continue
+                for doc_id, weight in impacts.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            entries = [(self.entries[doc_id], score) for doc_id, score in best]
+        return self._matches(entries)
+
+    def search_similar(self, query: str, k: int = 3) -> List[StrategyMatch]:
+        """
+        Return the `k` entries most similar to `query` by character n-gram cosine.
+
+        Unlike `search`, this matches paraphrases and inflections that share
+        no exact word with the entry ("keeps recursing" finds "Infinite
+        recursion without progress").
+        """
+        return self.search_similar_batch([query], k)[0]
+
+    def search_similar_batch(self, queries: Sequence[str], k: int = 3) -> List[List[StrategyMatch]]:
+        """`search_similar` for many queries at once."""
+        self._maybe_refresh()
+        with self._lock:
+            if self._similar is None:
+                return [[] for _ in queries]
+            results = [[(self.entries[self._similar_ids[i]], score) for i, score in best]
+                       for best in self._similar.search_batch(queries, k)]
+        return [self._matches(entries) for entries in results]
+
+    def _maybe_refresh(self) -> None:
+        if self.check_interval is not None and time.monotonic() - self._checked >= self.check_interval:
+            self._checked = time.monotonic()
+            self.refresh()
+
+    @staticmethod
+    def _matches(entries: List[Tuple[Dict[str, Any], float]]) -> List[StrategyMatch]:
+        return [StrategyMatch(
+            contradiction_type=entry.get("contradiction_type", ""),
+            strategy=entry.get("strategy", ""),
+            example_usage=entry.get("example_usage", ""),
+            source_reference=entry.get("source_reference", ""),
+            score=round(score, 4)
+        ) for entry, score in entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -2,33 +2,232 @@
 
 # Complete implementation
 
+import re
+import json
+import unicodedata
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple
+
+# Phrases and rules live next to this file, so adding one is not a code change
+PATTERN_FILE = Path(__file__).with_name("paradox_patterns.json")
+
+# One-to-one replacements (so match offsets stay valid) for characters that
+# commonly stand in for ASCII punctuation in pasted text
+_PUNCTUATION = str.maketrans({
+    "‘": "'", "’": "'", "‛": "'", "′": "'",
+    "“": '"', "”": '"', "″": '"',
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-",
+})
+
+
+@dataclass
+class ParadoxMatch:
+    """One occurrence of a pattern phrase in the (normalized) prompt."""
+    category: str
+    phrase: str
+    start: int
+    end: int
+    text: str
+
+
+def normalize(text: str) -> str:
+    """
+    Apply NFKC normalization and fold typographic quotes and dashes.
+
+    ASCII input is returned unchanged, so match spans refer to the original
+    prompt; otherwise they refer to the normalized text (see `ParadoxMatch.text`).
+    """
+    if text.isascii():
+        return text
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    return text.translate(_PUNCTUATION)
+
+
+def _canonical(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_regex(phrases: List[str]) -> str:
+    """
+    Build one regex matching any of the (canonical, lowercase) phrases.
+
+    The alternatives are merged into a character trie, so at each position
+    the engine follows a single branch instead of trying every phrase; the
+    cost stays nearly flat as phrases are added. Spaces match any run of
+    whitespace, and phrases ending in a word character must end at a word
+    boundary. Longer continuations are tried before a phrase ends, so the
+    longest phrase at a position wins. The left word boundary is checked by
+    `_search` instead: a leading lookbehind would stop the regex engine from
+    skipping ahead to positions that can start a phrase.
+    """
+    trie: Dict[str, Any] = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = phrase
+
+    def build(node: Dict[str, Any]) -> str:
+        alternatives = [(r"\s+" if ch == " " else re.escape(ch)) + build(child)
+                        for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            alternatives.append(r"(?!\w)" if node[""][-1].isalnum() else "")
+        if not alternatives:
+            return ""
+        return alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+
+    return build(trie)
+
+
+def _search(pattern: "re.Pattern[str]", text: str, pos: int = 0) -> Optional["re.Match[str]"]:
+    """First match at or after `pos` that also starts at a word boundary."""
+    while True:
+        m = pattern.search(text, pos)
+        if m is None:
+            return None
+        start = m.start()
+        if start == 0 or not text[start].isalnum() or not (text[start - 1].isalnum() or text[start - 1] == "_"):
+            return m
+        pos = start + 1
+
+
+class _Matcher:
+    """A compiled phrase trie, with a case-insensitive twin for text whose lowercase form changes length."""
+
+    def __init__(self, phrases: List[str]):
+        regex = _trie_regex(phrases)
+        self.pattern = re.compile(regex)
+        self.pattern_ignorecase = re.compile(regex, re.IGNORECASE)
+
+    def select(self, text: str, lowered: str) -> Tuple["re.Pattern[str]", str]:
+        # Lowercasing keeps offsets for nearly all text; when it doesn't (e.g.
+        # "İ"), match the original case-insensitively so spans stay valid
+        if len(lowered) == len(text):
+            return self.pattern, lowered
+        return self.pattern_ignorecase, text
+
+
+class ParadoxDetector:
+    """
+    Pattern phrases compiled into trie-shaped regexes, built once per pattern file.
+
+    Each category either fires on any of its `phrases`, or (with `all_of`)
+    when every group of alternatives occurs somewhere in the prompt.
+    Categories are checked in file order; the first one that fires decides
+    the message. All `phrases` share a single regex, so one pass finds every
+    phrase occurrence (leftmost, longest, non-overlapping). `all_of` groups
+    tend to contain common words, so for each group only the first
+    occurrence is searched for. Matching is case-insensitive with any
+    whitespace between words.
+    """
+
+    def __init__(self, categories: List[Dict[str, Any]]):
+        self.categories = categories
+        # canonical phrase -> indexes of the categories listing it
+        self._phrase_categories: Dict[str, List[int]] = {}
+        for ci, category in enumerate(categories):
+            for phrase in category.get("phrases", []):
+                self._phrase_categories.setdefault(_canonical(phrase), []).append(ci)
+        self._phrases = _Matcher(list(self._phrase_categories)) if self._phrase_categories else None
+        # category index -> one matcher per all_of group
+        self._groups: Dict[int, List[_Matcher]] = {
+            ci: [_Matcher([_canonical(p) for p in group]) for group in category["all_of"]]
+            for ci, category in enumerate(categories) if category.get("all_of")
+        }
+
+    @classmethod
+    def from_file(cls, path: Path = PATTERN_FILE) -> "ParadoxDetector":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["categories"])
+
+    def scan(self, prompt: str) -> List[ParadoxMatch]:
+        """Return the phrase occurrences and, for `all_of` rules, the first occurrence of each group."""
+        return self.detect(prompt)[1]
+
+    def detect(self, prompt: str, first_only: bool = False) -> Tuple[Optional[Dict[str, Any]], List[ParadoxMatch]]:
+        """
+        Decide which category (if any) the prompt falls into.
+
+        Args:
+            prompt: Text to screen
+            first_only: Stop as soon as the deciding category is known (the
+                matches list is then incomplete)
+
+        Returns:
+            Tuple of (first firing category or None, matches)
+        """
+        text = normalize(prompt)
+        lowered = text.lower()
+        matches: List[ParadoxMatch] = []
+        fired = set()
+
+        if self._phrases is not None:
+            pattern, subject = self._phrases.select(text, lowered)
+            m = _search(pattern, subject)
+            while m is not None:
+                start, end = m.span()
+                phrase = _canonical(m.group())
+                for ci in self._phrase_categories[phrase]:
+                    matches.append(ParadoxMatch(self.categories[ci]["name"], phrase, start, end, text[start:end]))
+                    fired.add(ci)
+                if first_only and 0 in fired:
+                    return self.categories[0], matches
+                m = _search(pattern, subject, end if end > start else end + 1)
+
+        for ci, groups in self._groups.items():
+            if first_only and fired and min(fired) < ci:
+                break  # an earlier category already decided the result
+            found = []
+            for matcher in groups:
+                pattern, subject = matcher.select(text, lowered)
+                m = _search(pattern, subject)
+                if m is None:
+                    break
+                found.append(m)
+            else:
+                fired.add(ci)
+                for m in found:
+                    start, end = m.span()
+                    matches.append(ParadoxMatch(self.categories[ci]["name"], _canonical(m.group()),
+                                                start, end, text[start:end]))
+
+        matches.sort(key=lambda match: match.start)
+        return (self.categories[min(fired)] if fired else None), matches
+
+
+_detector = ParadoxDetector.from_file()
+
+
+def scan(prompt):
+    """
+    Detect paradoxical statements and report where they occur.
+
+    Args:
+        prompt (str): The input prompt to check
+
+    Returns:
+        dict: "category" and "message" (None when nothing fired) and "matches",
+        a list of {"category", "phrase", "start", "end", "text"}
+    """
+    category, matches = _detector.detect(prompt)
+    return {
+        "category": category["name"] if category else None,
+        "message": category["message"] if category else None,
+        "matches": [asdict(m) for m in matches]
+    }
+
+
 def handle(prompt):
     """
     Detect paradoxical statements in the input prompt.
-    
+
     Args:
         prompt (str): The input prompt to check
-        
+
     Returns:
         str or None: Error message if paradox detected, None otherwise
     """
-    paradoxes = [
-        "lying right now",
-        "this statement is false",
-        "am i telling the truth when i say i'm lying",
-        "the next statement is true. the previous statement is false",
-        "i always lie",
-        "the following sentence is true. the previous sentence is false"
-    ]
-    
-    prompt_lower = prompt.lower()
-    for paradox in paradoxes:
-        if paradox in prompt_lower:
-            return ("Paradox detected: Self-referential contradiction found. "
-                    "Halting recursive processing to prevent infinite loop.")
-            
-    # Check for more complex paradox patterns
-    if "sentence is" in prompt_lower and ("false" in prompt_lower or "true" in prompt_lower) and "this" in prompt_lower:
-        return ("Potential liar paradox detected. Processing with caution to avoid recursive loops.")
-    
-    return None
\ No newline at end of file
+    category, _ = _detector.detect(prompt, first_only=True)
+    return category["message"] if category else None
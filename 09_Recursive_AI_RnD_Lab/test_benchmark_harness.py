@@ -0,0 +1,58 @@
+import pytest
+
+from benchmark_harness import BenchmarkHarness, BenchmarkResult, check_regression, percentile
+from sandbox_pool import SandboxPool
+from version_store import VersionStore
+
+
+@pytest.fixture(params=["pool", "cold"])
+def harness(request):
+    pool = SandboxPool(size=1) if request.param == "pool" else None
+    yield BenchmarkHarness(sandbox_pool=pool, warmup=1, iterations=5, timeout=20)
+    if pool is not None:
+        pool.close()
+
+
+def test_times_main_with_warmup(harness, tmp_path):
+    script = tmp_path / "AI_Main.py"
+    script.write_text("import time\ncalls = []\n\ndef main():\n    calls.append(1)\n"
+                      "    print('noise')\n    time.sleep(0.01)\n    return len(calls)\n")
+    result = harness.run(str(script))
+    assert result.ok, result.error
+    assert len(result.timings) == 5
+    assert 0.01 <= result.median <= result.p95
+    assert result.peak_rss_mb > 0
+
+
+def test_reports_failures(harness, tmp_path):
+    script = tmp_path / "AI_Main.py"
+    script.write_text("def main():\n    raise RuntimeError('broken')\n")
+    result = harness.run(str(script))
+    assert not result.ok
+    assert "RuntimeError: broken" in result.error
+
+
+def test_check_regression():
+    def bench(median, p95=None, rss=50.0):
+        return BenchmarkResult(iterations=5, median=median, p95=p95 or median, peak_rss_mb=rss, timings=[median])
+
+    assert check_regression(bench(0.105), bench(0.100))[0]
+    ok, reason = check_regression(bench(0.150), bench(0.100), latency_threshold=0.10)
+    assert not ok and "median latency" in reason
+    assert not check_regression(bench(0.1, rss=80.0), bench(0.1, rss=50.0))[0]
+    # Sub-millisecond jitter is ignored
+    assert check_regression(bench(0.0004), bench(0.0002))[0]
+    assert check_regression(bench(0.1), None)[0]
+    assert not check_regression(BenchmarkResult(error="boom"), bench(0.1))[0]
+
+
+def test_percentile():
+    assert percentile([3, 1, 2, 4], 0.5) == 2
+    assert percentile(list(range(1, 21)), 0.95) == 19
+
+
+def test_benchmark_stored_with_version(tmp_path):
+    store = VersionStore(tmp_path, "AI_Main")
+    store.put(1, "x = 1\n")
+    store.set_metadata(1, "benchmark", {"median": 0.5})
+    assert VersionStore(tmp_path, "AI_Main").record(1).metadata == {"benchmark": {"median": 0.5}}
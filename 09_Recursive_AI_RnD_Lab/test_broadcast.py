@@ -0,0 +1,65 @@
+import threading
+import time
+
+from broadcast import BroadcastRing
+
+
+def test_independent_cursors_see_every_item():
+    ring = BroadcastRing(8)
+    for i in range(5):
+        assert ring.publish(i) == i
+
+    items, cursor, dropped = ring.read(0, timeout=0)
+    assert [item for _, item in items] == [0, 1, 2, 3, 4]
+    assert cursor == 5 and dropped == 0
+
+    items, cursor, _ = ring.read(3, max_items=1, timeout=0)
+    assert items == [(3, 3)] and cursor == 4
+
+
+def test_slow_reader_reports_dropped_items():
+    ring = BroadcastRing(4)
+    for i in range(10):
+        ring.publish(i)
+    assert len(ring) == 4 and ring.oldest_seq == 6
+
+    items, cursor, dropped = ring.read(2, timeout=0)
+    assert dropped == 4
+    assert [seq for seq, _ in items] == [6, 7, 8, 9]
+    assert cursor == 10
+    assert ring.snapshot(2) == [8, 9]
+
+
+def test_read_times_out_and_wakes_on_publish():
+    ring = BroadcastRing(4)
+    start = time.monotonic()
+    items, cursor, _ = ring.read(ring.next_seq, timeout=0.05)
+    assert items == [] and cursor == 0
+    assert time.monotonic() - start >= 0.04
+
+    # A cursor from before a restart (ahead of the ring) starts from now
+    assert ring.read(100, timeout=0)[1] == 0
+
+    threading.Timer(0.05, ring.publish, args=("hello",)).start()
+    items, cursor, _ = ring.read(0, timeout=5)
+    assert items == [(0, "hello")] and cursor == 1
+
+
+def test_concurrent_publishers_get_distinct_sequence_numbers():
+    ring = BroadcastRing(4096)
+    seqs = [[] for _ in range(8)]
+
+    def publish(out):
+        for i in range(400):
+            out.append(ring.publish(i))
+
+    threads = [threading.Thread(target=publish, args=(out,)) for out in seqs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(s for out in seqs for s in out) == list(range(3200))
+    assert ring.next_seq == 3200
+    items, cursor, dropped = ring.read(0, max_items=4096, timeout=0)
+    assert [seq for seq, _ in items] == list(range(3200)) and cursor == 3200 and dropped == 0
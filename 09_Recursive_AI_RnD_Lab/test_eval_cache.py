@@ -0,0 +1,52 @@
+import time
+
+from eval_cache import EvaluationCache
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = EvaluationCache(tmp_path / "cache.sqlite3")
+    assert cache.get("abc") is None
+    cache.put("abc", True, True, {"status": "ok"}, runtime=0.25)
+
+    entry = cache.get("abc")
+    assert entry.valid and entry.success and entry.executed
+    assert entry.result == {"status": "ok"}
+    assert entry.runtime == 0.25
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_compile_only_entries_miss_when_execution_required(tmp_path):
+    cache = EvaluationCache(tmp_path / "cache.sqlite3")
+    cache.put("abc", True)
+    assert cache.get("abc").valid
+    assert cache.get("abc", executed_only=True) is None
+
+
+def test_persists_across_instances(tmp_path):
+    first = EvaluationCache(tmp_path / "cache.sqlite3")
+    generation = first.generation
+    first.put("abc", False)
+    assert first.generation != generation and len(first) == 1
+    reopened = EvaluationCache(tmp_path / "cache.sqlite3")
+    assert len(reopened) == 1 and reopened.get("abc").valid is False
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EvaluationCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put("a", True)
+    time.sleep(0.01)
+    cache.put("b", True)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.put("c", True)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = EvaluationCache(tmp_path / "cache.sqlite3", ttl=0.05)
+    cache.put("abc", True, True, {})
+    time.sleep(0.1)
+    assert cache.get("abc") is None
+    assert len(cache) == 0
@@ -0,0 +1,148 @@
+import time
+import hashlib
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from evolution_scheduler import EvolutionScheduler, HourlyRateLimiter, SchedulerBusy
+
+
+class FakeAI:
+    """Stands in for SelfModifyingAI with instant, scripted stages."""
+
+    def __init__(self, draft_delay=0.0):
+        self.version = 1
+        self.draft_delay = draft_delay
+        self.model_client = SimpleNamespace(saturated=False)
+        self.sandbox_pool = None
+        self.promoted = []
+        self.parents = []
+        self.lock = threading.Lock()
+
+    def get_current_code(self):
+        return f"version = {self.version}\n"
+
+    def draft_candidate(self, current_code):
+        time.sleep(self.draft_delay)
+        return current_code + "x = 1\n"
+
+    def _validate_python_code(self, code):
+        return True
+
+    def evaluate_candidate(self, index, code):
+        return SimpleNamespace(index=index, code=code, valid=code is not None, success=code is not None,
+                               score=1.0 if code else float("-inf"), runtime=0.0, cached=False, result={})
+
+    def promote_best(self, candidates, parent_hash=None):
+        with self.lock:
+            self.parents.append(parent_hash)
+            self.version += 1
+            self.promoted.append([c.index for c in candidates])
+        return True, f"Modified to version {self.version}"
+
+
+def _config(**overrides):
+    config = {"scheduler_max_pending_jobs": 4, "scheduler_max_jobs_per_hour": 0, "candidates_per_cycle": 3}
+    config.update(overrides)
+    return config
+
+
+def test_jobs_flow_through_all_stages():
+    ai = FakeAI()
+    scheduler = EvolutionScheduler(ai, _config()).start()
+    try:
+        jobs = [scheduler.submit() for _ in range(3)]
+        submitted = scheduler.generation
+        assert scheduler.wait_idle(timeout=5)
+        assert [job.status for job in jobs] == ["succeeded"] * 3
+        assert ai.promoted == [[0, 1, 2]] * 3
+        assert ai.version == 4
+        # Each job hands over the hash of the code it was dispatched against
+        assert ai.parents[0] == hashlib.md5(b"version = 1\n").hexdigest()
+        assert scheduler.generation != submitted
+    finally:
+        scheduler.shutdown()
+
+
+def test_rejects_when_too_many_pending():
+    ai = FakeAI(draft_delay=0.2)
+    scheduler = EvolutionScheduler(ai, _config(scheduler_max_pending_jobs=2)).start()
+    try:
+        scheduler.submit()
+        scheduler.submit()
+        with pytest.raises(SchedulerBusy):
+            scheduler.submit()
+        assert scheduler.stats["rejected"] == 1
+    finally:
+        assert scheduler.shutdown(drain=True, timeout=5)
+
+
+def test_generation_waits_while_model_saturated():
+    ai = FakeAI()
+    ai.model_client.saturated = True
+    scheduler = EvolutionScheduler(ai, _config()).start()
+    try:
+        job = scheduler.submit(1)
+        assert not job.done.wait(0.3)
+        ai.model_client.saturated = False
+        assert job.done.wait(5)
+        assert scheduler.stats["backpressure_waits"] >= 1
+    finally:
+        scheduler.shutdown()
+
+
+def test_shutdown_drains_and_refuses_new_jobs():
+    ai = FakeAI(draft_delay=0.05)
+    scheduler = EvolutionScheduler(ai, _config()).start()
+    job = scheduler.submit()
+    assert scheduler.shutdown(drain=True, timeout=5)
+    assert job.status == "succeeded"
+    with pytest.raises(SchedulerBusy):
+        scheduler.submit()
+
+
+def test_cancel_queued_and_running_jobs():
+    ai = FakeAI(draft_delay=0.2)
+    scheduler = EvolutionScheduler(ai, _config(scheduler_workers={"generate": 1})).start()
+    try:
+        running = scheduler.submit()
+        queued = scheduler.submit()
+        time.sleep(0.05)
+        assert scheduler.cancel(running.id)
+        assert scheduler.cancel(queued.id)
+        assert scheduler.wait_idle(timeout=5)
+        assert running.status == queued.status == "cancelled"
+        assert ai.promoted == []
+        assert not scheduler.cancel(running.id)
+        assert not scheduler.cancel("missing")
+    finally:
+        scheduler.shutdown()
+
+
+def test_job_results_and_history_limit():
+    ai = FakeAI()
+    scheduler = EvolutionScheduler(ai, _config(scheduler_job_history=2)).start()
+    try:
+        jobs = []
+        for _ in range(3):
+            # One at a time, so the jobs finish (and are forgotten) in submission order
+            jobs.append(scheduler.submit(2))
+            assert jobs[-1].done.wait(5)
+        data = jobs[-1].to_dict(include_results=True)
+        assert data["status"] == "succeeded" and data["version"] == ai.version
+        assert [c["index"] for c in data["candidates"]] == [0, 1]
+        assert scheduler.get(jobs[0].id) is None
+        assert [j.id for j in scheduler.jobs()] == [jobs[2].id, jobs[1].id]
+    finally:
+        scheduler.shutdown()
+
+
+def test_hourly_rate_limit():
+    limiter = HourlyRateLimiter(2, window=0.2)
+    assert limiter.try_acquire()[0]
+    assert limiter.try_acquire()[0]
+    allowed, retry_after = limiter.try_acquire()
+    assert not allowed and 0 < retry_after <= 0.2
+    time.sleep(0.25)
+    assert limiter.try_acquire()[0]
@@ -0,0 +1,44 @@
+import importlib.util
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    "handle_paradox", Path(__file__).parent / "strategy_plugins" / "handle_paradox.py")
+handle_paradox = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(handle_paradox)
+
+
+def test_detects_phrases_with_spans():
+    report = handle_paradox.scan("Well.  This   statement is FALSE, obviously")
+    assert report["category"] == "self_reference"
+    assert report["matches"] == [{"category": "self_reference", "phrase": "this statement is false",
+                                  "start": 7, "end": 32, "text": "This   statement is FALSE"}]
+    assert handle_paradox.handle("Normal statement that isn't paradoxical") is None
+
+
+def test_normalizes_unicode_and_quotes():
+    assert handle_paradox.handle("Am I telling the truth when I say I’m lying") is not None
+    assert handle_paradox.handle("Ｔｈｉｓ statement is false") is not None
+    # Lowercasing "İ" changes the length; spans must still point into the text
+    report = handle_paradox.scan("İ this statement is false")
+    match = report["matches"][0]
+    assert "İ this statement is false"[match["start"]:match["end"]] == "this statement is false"
+
+
+def test_word_boundaries_and_all_of_rules():
+    assert handle_paradox.handle("I always lied") is None
+    assert handle_paradox.scan("xthis statement is false")["matches"] == []
+
+    report = handle_paradox.scan("this sentence is fine, that is true")
+    assert report["category"] == "liar_pattern"
+    assert [m["phrase"] for m in report["matches"]] == ["this", "sentence is", "true"]
+    assert handle_paradox.handle("this sentence is fine") is None
+
+
+def test_longest_phrase_wins_and_custom_patterns():
+    detector = handle_paradox.ParadoxDetector([
+        {"name": "short", "message": "s", "phrases": ["loop"]},
+        {"name": "long", "message": "l", "phrases": ["loop forever", "Recursion  depth"]},
+    ])
+    category, matches = detector.detect("a loop forever and recursion\ndepth")
+    assert category["name"] == "long"
+    assert [(m.phrase, m.start, m.end) for m in matches] == [("loop forever", 2, 14), ("recursion depth", 19, 34)]
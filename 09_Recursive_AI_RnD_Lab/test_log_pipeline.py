@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import logging
+
+import log_pipeline
+from log_pipeline import JsonLinesFormatter, LogPipeline, RotatingJsonFileHandler
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord("test.pipeline", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_include_extra_fields_and_tracebacks():
+    line = json.loads(JsonLinesFormatter().format(_record("loss=%.2f", 0.5, session_id="abc")))
+    assert line["message"] == "loss=0.50"
+    assert line["level"] == "INFO" and line["logger"] == "test.pipeline"
+    assert line["session_id"] == "abc"
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        import sys
+        record = logging.LogRecord("t", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    assert "ValueError: boom" in json.loads(JsonLinesFormatter().format(record))["exception"]
+
+
+def test_rotates_on_size_and_age(tmp_path):
+    path = str(tmp_path / "app.log")
+    handler = RotatingJsonFileHandler(path, max_bytes=300, backup_count=2, interval=None)
+    for i in range(10):
+        handler.emit(_record(f"message {i}"))
+    handler.close()
+    assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+
+    handler = RotatingJsonFileHandler(path, max_bytes=0, backup_count=2, interval=60)
+    later = _record("later")
+    later.created = time.time() + 120
+    handler.emit(_record("now"))
+    handler.emit(later)
+    handler.close()
+    with open(path) as f:
+        assert [json.loads(line)["message"] for line in f] == ["later"]
+
+
+def test_age_counts_from_the_first_record_across_restarts(tmp_path):
+    path = str(tmp_path / "app.log")
+    handler = RotatingJsonFileHandler(path, max_bytes=0, interval=3600)
+    first = _record("first")
+    first.created = time.time() - 3000
+    handler.emit(first)
+    handler.emit(_record("just before the restart"))
+    handler.close()
+
+    # The file was written a moment ago, but it was begun 3000s ago
+    restarted = RotatingJsonFileHandler(path, max_bytes=0, interval=3600)
+    assert abs(restarted.rollover_at - (first.created + 3600)) < 1
+    restarted.close()
+
+
+def test_pipeline_writes_in_background_and_detaches_session_logs(tmp_path):
+    pipeline = LogPipeline(str(tmp_path / "main.log"), console=False, interval=None).start()
+    try:
+        session = RotatingJsonFileHandler(str(tmp_path / "session.log"), interval=None)
+        session.addFilter(log_pipeline._FieldFilter("session_id", "s1"))
+        pipeline.attach(session)
+        logger = logging.getLogger("test.pipeline.background")
+        logger.info("for everyone")
+        logger.info("for the session", extra={"session_id": "s1"})
+        pipeline.detach(session)
+        logger.info("after detach", extra={"session_id": "s1"})
+    finally:
+        pipeline.stop()
+    assert session not in pipeline.listener.handlers
+
+    with open(tmp_path / "main.log") as f:
+        assert [json.loads(line)["message"] for line in f] == ["for everyone", "for the session", "after detach"]
+    with open(tmp_path / "session.log") as f:
+        assert [json.loads(line)["message"] for line in f] == ["for the session"]
+
+
+def test_model_trainer_closes_its_session_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import train_llm
+
+    pipeline = log_pipeline.get_pipeline()
+    before = len(pipeline.listener.handlers)
+    trainers = [train_llm.ModelTrainer(train_llm.TrainingConfig(model_name=f"m{i}")) for i in range(3)]
+    assert len(pipeline.listener.handlers) == before + 3
+    for trainer in trainers:
+        trainer.close()
+    pipeline.queue.join()
+    assert len(pipeline.listener.handlers) == before
@@ -0,0 +1,83 @@
+import logging
+
+from broadcast import BroadcastRing
+from log_sink import RingLogHandler, attach
+
+
+class CountingFormatter(logging.Formatter):
+    calls = 0
+
+    def format(self, record):
+        CountingFormatter.calls += 1
+        return super().format(record)
+
+
+def _logger(handler, name):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_records_are_formatted_once_when_read():
+    handler = RingLogHandler(capacity=8)
+    handler.setFormatter(CountingFormatter("%(levelname)s %(message)s"))
+    logger = _logger(handler, "test_log_sink.lazy")
+    CountingFormatter.calls = 0
+
+    logger.info("value=%d", 42)
+    assert CountingFormatter.calls == 0
+
+    entries = handler.entries()
+    assert entries[0]["message"] == "INFO value=42"
+    assert entries[0]["logger"] == "test_log_sink.lazy"
+    handler.entries()
+    assert CountingFormatter.calls == 1
+
+
+def test_overflow_overwrites_oldest_and_counts_drops():
+    handler = RingLogHandler(capacity=4)
+    logger = _logger(handler, "test_log_sink.overflow")
+    for i in range(10):
+        logger.info(f"record {i}")
+    assert [e["message"] for e in handler.entries()] == [f"record {i}" for i in range(6, 10)]
+    assert [e["message"] for e in handler.entries(limit=2)] == ["record 8", "record 9"]
+    assert handler.dropped == 6
+
+
+def test_shared_ring_and_tracebacks():
+    ring = BroadcastRing(8)
+    ring.publish(("metrics", "{}"))
+    handler = RingLogHandler(ring)
+    logger = _logger(handler, "test_log_sink.shared")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    entries = handler.entries()
+    assert len(entries) == 1
+    assert "ValueError: boom" in entries[0]["message"]
+
+
+def test_attach_does_not_duplicate_handlers():
+    logger = logging.getLogger("test_log_sink.attach")
+    logger.handlers = []
+    first = attach(RingLogHandler(capacity=4), logger)
+    assert attach(RingLogHandler(capacity=4), logger) is first
+    assert attach(first, logger) is first
+    assert logger.handlers == [first]
+
+
+def test_handle_applies_filters_and_keeps_the_handler_lock():
+    handler = RingLogHandler(capacity=8)
+    handler.addFilter(lambda record: "secret" not in record.getMessage())
+    logger = _logger(handler, "test_log_sink.filters")
+
+    logger.info("kept")
+    logger.info("secret value")
+    assert [e["message"] for e in handler.entries()] == ["kept"]
+    # Code that takes the handler lock (logging.Handler.handle on Python 3.13+, flush, close) still works
+    with handler.lock:
+        pass
+    handler.close()
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+
+from loop_monitor import LoopMonitor
+
+SOURCE = (Path(__file__).parent / "self_modify.py").read_text()
+
+
+def test_cycle_fires_mid_stream():
+    monitor = LoopMonitor()
+    watch = monitor.watch()
+    fired = [watch.feed("The loop checks the input once more and compares it with the previous result. ")
+             for _ in range(20)]
+    first = next(i for i, detection in enumerate(fired) if detection is not None)
+    assert first < 5 and fired[first].kind == "cycle"
+    assert watch.close() is fired[first]
+    assert monitor.stats()["detections"]["cycle"] == 1
+
+
+def test_ordinary_code_does_not_fire():
+    monitor = LoopMonitor()
+    watch = monitor.watch()
+    for i in range(0, len(SOURCE), 37):
+        assert watch.feed(SOURCE[i:i + 37]) is None
+    assert watch.close() is None
+    assert monitor.observe(SOURCE.replace("self", "this")) is None
+
+
+def test_repeated_responses_fire_on_third_near_duplicate():
+    monitor = LoopMonitor(window=4)
+    response = "```python\n" + SOURCE[:6000] + "\n```"
+    assert monitor.observe(response) is None
+    assert monitor.observe(response.replace("config", "settings", 1)) is None
+    assert monitor.observe("```python\nprint('something else entirely')\n```") is None
+    detection = monitor.observe(response)
+    assert detection.kind == "repeated_response"
+
+    # Bounded history: after `window` other responses the old ones are forgotten
+    for i in range(4):
+        monitor.observe(f"unrelated answer number {i} " * 3)
+    assert monitor.observe(response) is None
+    assert monitor.stats()["remembered"] == 4
+
+
+def test_repeated_self_referencing_statement():
+    monitor = LoopMonitor()
+    watch = monitor.watch()
+    results = [watch.feed(f"Attempt {i}: I am not sure what I should do here. Trying option {i}. ")
+               for i in range(3)]
+    assert results[:2] == [None, None]
+    assert results[2].kind == "self_reference"
+
+
+def test_shared_boilerplate_across_responses_is_not_a_loop():
+    monitor = LoopMonitor()
+    for i in range(10):
+        response = f"Here is my improved version:\n```python\ndef step():\n    return {i} * {i}\n```"
+        assert monitor.observe(response) is None
+    assert monitor.stats()["detections"]["self_reference"] == 0
+
+
+def module_with(functions, changed=None):
+    return "\n".join(f"def function_{i}(values):\n    total = sum(values) + {i}\n"
+                     f"    return {'max' if i == changed else 'min'}(total, len(values) * {i})\n"
+                     for i in range(functions))
+
+
+def test_edits_of_different_functions_are_not_duplicates():
+    parent = module_with(60)
+    edits = ["```python\n" + module_with(60, changed=i) + "```" for i in (3, 17, 31, 45)]
+
+    # Compared whole, four edits of one large file look like one response repeated
+    whole = LoopMonitor()
+    assert any(whole.observe(e) is not None for e in edits)
+
+    monitor = LoopMonitor()
+    assert [monitor.observe(e, parent) for e in edits] == [None] * 4
+    # The same edit coming back is still a loop
+    assert monitor.observe(edits[0], parent) is None
+    assert monitor.observe(edits[0], parent).kind == "repeated_response"
+
+
+def test_bands_must_divide_sketch():
+    with pytest.raises(ValueError):
+        LoopMonitor(sketch_size=64, bands=10)
@@ -0,0 +1,52 @@
+from metrics_store import MetricsStore, RingBuffer, TierSpec
+
+
+def _sample(t, cpu, temperature=None):
+    return {"timestamp": t, "cpu_percent": cpu, "memory_percent": 50.0, "disk_usage_percent": 10.0,
+            "network_bytes_sent": int(t), "network_bytes_recv": 0, "temperature": temperature}
+
+
+def test_ring_buffer_wraps_and_queries_ranges():
+    ring = RingBuffer(4, [("value", "d")])
+    for t in range(10):
+        ring.append(float(t), {"value": t * 10.0})
+    assert len(ring) == 4
+    assert ring.oldest() == 6.0 and ring.newest() == 9.0
+    lo, hi = ring.index_range(7, 8.5)
+    assert ring.column("timestamp", lo, hi) == [7.0, 8.0]
+    assert ring.column("value", *ring.index_range(0, 100)) == [60.0, 70.0, 80.0, 90.0]
+
+
+def test_rollups_keep_min_avg_max():
+    store = MetricsStore([TierSpec("raw", 0, 10), TierSpec("1m", 60, 10)])
+    for t in range(0, 185, 5):
+        store.append(_sample(float(t), cpu=float(t % 60)))
+
+    raw = store.query(150, 200)
+    assert raw["tier"] == "raw"
+    assert raw["timestamp"] == [150.0, 155.0, 160.0, 165.0, 170.0, 175.0, 180.0]
+
+    # Raw history no longer reaches back to t=0, so the 1 minute tier answers
+    rolled = store.query(0, 200)
+    assert rolled["tier"] == "1m"
+    assert rolled["timestamp"] == [0.0, 60.0, 120.0]
+    assert rolled["cpu_percent_min"] == [0.0] * 3
+    assert rolled["cpu_percent_max"] == [55.0] * 3
+    assert rolled["cpu_percent"] == [27.5] * 3
+    assert rolled["temperature"] == [None] * 3
+
+
+def test_resolution_selects_coarser_tier():
+    store = MetricsStore([TierSpec("raw", 0, 1000), TierSpec("1m", 60, 100)])
+    for t in range(0, 600, 5):
+        store.append(_sample(float(t), cpu=1.0, temperature=40.0))
+    assert store.query(0, 600)["tier"] == "raw"
+    result = store.query(0, 600, fields=["temperature"], resolution=60)
+    assert result["tier"] == "1m" and len(result["timestamp"]) == 9
+    assert "cpu_percent" not in result
+    assert store.latest()["timestamp"] == 595.0
+
+
+def test_memory_is_preallocated():
+    store = MetricsStore()
+    assert store.memory_bytes() < 8 * 1024 * 1024
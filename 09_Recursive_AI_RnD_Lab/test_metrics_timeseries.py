@@ -0,0 +1,43 @@
+from metrics_timeseries import MetricsTimeSeries
+
+
+def _sample(t, cpu, temperature=None):
+    return {"timestamp": t, "cpu_percent": cpu, "memory_percent": 50.0, "disk_usage_percent": 10.0,
+            "network_bytes_sent": int(t), "network_bytes_recv": 0, "temperature": temperature}
+
+
+def test_range_query_survives_reopen(tmp_path):
+    series = MetricsTimeSeries(tmp_path)
+    for t in range(100):
+        series.append(_sample(float(t), cpu=t / 2))
+    series.close()
+
+    reopened = MetricsTimeSeries(tmp_path)
+    assert len(reopened) == 100
+    result = reopened.query(10, 12, fields=["cpu_percent", "temperature", "network_bytes_sent"])
+    assert result == {"timestamp": [10.0, 11.0, 12.0], "cpu_percent": [5.0, 5.5, 6.0],
+                      "temperature": [None] * 3, "network_bytes_sent": [10, 11, 12]}
+    reopened.append(_sample(100.0, cpu=1.0))
+    assert reopened.query(99.5)["timestamp"] == [100.0]
+
+
+def test_step_downsamples(tmp_path):
+    series = MetricsTimeSeries(tmp_path)
+    for t in range(0, 120, 5):
+        series.append(_sample(float(t), cpu=float(t)))
+    result = series.query(0, 200, step=60, fields=["cpu_percent"])
+    assert result == {"timestamp": [0.0, 60.0], "cpu_percent": [27.5, 87.5]}
+
+
+def test_rotates_by_size(tmp_path):
+    series = MetricsTimeSeries(tmp_path, segment_bytes=64 + 56 * 10, max_segments=3)
+    for t in range(45):
+        series.append(_sample(float(t), cpu=1.0))
+    assert len(list(tmp_path.glob("metrics-*.ts"))) == 3
+    assert len(series) == 25
+    assert series.query()["timestamp"][0] == 20.0
+    series.close()
+
+    reopened = MetricsTimeSeries(tmp_path, segment_bytes=64 + 56 * 10, max_segments=3)
+    reopened.append(_sample(45.0, cpu=1.0))
+    assert reopened.query(40)["timestamp"] == [40.0, 41.0, 42.0, 43.0, 44.0, 45.0]
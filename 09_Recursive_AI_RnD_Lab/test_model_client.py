@@ -0,0 +1,180 @@
+import sys
+import json
+import time
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from loop_monitor import LoopMonitor
+from model_client import (CodeFenceDetector, HTTPModelClient, ModelClient, ModelClientError, SubprocessModelClient,
+                          create_model_client, stream_until_code_block)
+
+STREAM_TOKENS = ["Here", " is", " the", " code:\n``", "`python\nprint(1)", "\n`", "``", "\nNow", " let", " me", " explain"]
+
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    """Minimal Ollama-style /api/generate endpoint."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body.get("stream"):
+            return self._stream_tokens(body)
+        if self.path != "/api/generate":
+            payload, status = b'{"error": "not found"}', 404
+        else:
+            self.server.prompts.append(body["prompt"])
+            reply = f"```python\nprint({body['prompt']!r})\n```"
+            payload, status = json.dumps({"model": body["model"], "response": reply, "done": True}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_tokens(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, token in enumerate(STREAM_TOKENS):
+                line = json.dumps({"model": body["model"], "response": token, "done": False}).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+                if i >= 6:
+                    time.sleep(0.5)  # prose after the code block is slow
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubModelHandler)
+    server.prompts = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server, path="/api/generate"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_http_client_reuses_connections(stub_server):
+    client = HTTPModelClient(_url(stub_server), "recursive-ai", timeout=5)
+    for i in range(5):
+        assert client.generate(f"prompt {i}") == f"```python\nprint('prompt {i}')\n```"
+    client.close()
+
+    assert stub_server.prompts == [f"prompt {i}" for i in range(5)]
+    assert client.stats["connections_opened"] == 1
+    assert client.stats["connections_reused"] == 4
+
+
+def test_http_client_limits_concurrency(stub_server):
+    client = HTTPModelClient(_url(stub_server), "recursive-ai", timeout=5, pool_size=2, max_concurrency=2)
+    threads = [threading.Thread(target=client.generate, args=(str(i),)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.close()
+
+    assert len(stub_server.prompts) == 8
+    assert client.stats["connections_opened"] <= 2
+
+
+def test_http_client_raises_on_error_status(stub_server):
+    client = HTTPModelClient(_url(stub_server, "/missing"), "recursive-ai", timeout=5)
+    with pytest.raises(ModelClientError):
+        client.generate("hello")
+    assert client.stats["errors"] == 1
+
+
+def test_create_model_client_prefers_api_url():
+    client = create_model_client({"api_url": "http://localhost:11434/api/generate", "model_service": "ollama"})
+    assert isinstance(client, HTTPModelClient)
+    assert create_model_client({}) is None
+
+
+def test_code_fence_detector_handles_split_fences():
+    detector = CodeFenceDetector()
+    results = [detector.feed(token) for token in STREAM_TOKENS]
+    assert results.index(True) == 6
+    assert detector.code == "print(1)"
+    assert detector.text.endswith("```")
+
+
+def test_http_stream_stops_at_code_block(stub_server):
+    client = HTTPModelClient(_url(stub_server), "recursive-ai", timeout=5)
+    response, stats = stream_until_code_block(client, "improve")
+    client.close()
+
+    assert response == "Here is the code:\n```python\nprint(1)\n```"
+    assert stats.stopped_early
+    assert stats.time_to_first_token <= stats.time_to_code_complete
+    assert stats.total_time < 1.0
+
+
+def test_subprocess_stream_kills_model_process(tmp_path):
+    script = tmp_path / "fake_model.py"
+    script.write_text(
+        "import sys, time\n"
+        "print('```python\\nprint(2)\\n```', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    client = SubprocessModelClient(sys.executable, str(script), timeout=60)
+    response, stats = stream_until_code_block(client, "improve")
+
+    assert response == "```python\nprint(2)\n```"
+    assert stats.stopped_early
+    assert stats.total_time < 10
+
+
+def test_subprocess_timeout_raises_model_client_error(tmp_path):
+    script = tmp_path / "slow_model.py"
+    script.write_text("import time\ntime.sleep(30)\n")
+    client = SubprocessModelClient(sys.executable, str(script), timeout=0.5)
+    with pytest.raises(ModelClientError, match="timed out") as excinfo:
+        client.generate("improve")
+    assert isinstance(excinfo.value.__cause__, subprocess.TimeoutExpired)
+
+
+class LoopingClient(ModelClient):
+    """Streams the same sentence until the caller stops reading."""
+
+    def __init__(self):
+        self.closed = False
+
+    def stream(self, prompt):
+        try:
+            while True:
+                yield "Let me reconsider the approach to this problem before writing any code. "
+        finally:
+            self.closed = True
+
+
+def test_missing_model_command_raises_model_client_error(tmp_path):
+    client = SubprocessModelClient(str(tmp_path / "no-such-model"), "endpoint")
+    with pytest.raises(ModelClientError, match="Cannot start") as excinfo:
+        client.generate("prompt")
+    assert isinstance(excinfo.value.__cause__, FileNotFoundError)
+
+
+def test_stream_aborts_when_loop_monitor_fires():
+    client = LoopingClient()
+    response, stats = stream_until_code_block(client, "improve", LoopMonitor())
+
+    assert stats.loop is not None
+    assert stats.stopped_early and stats.time_to_code_complete is None
+    assert stats.chunks < 10
+    assert client.closed
@@ -0,0 +1,42 @@
+import math
+
+from ngram_index import NgramIndex, ngram_counts
+from strategy_index import StrategyIndex
+
+TEXTS = [
+    "Self-referential loop: remove the self-reference",
+    "Circular paradox: X depends on Y and Y depends on X",
+    "Infinite recursion without progress: stop and summarize",
+    "Contradictory goal and limitation: rank the goals",
+]
+
+
+def test_ngram_counts_fold_case_and_whitespace():
+    assert ngram_counts("Ab  C", ngrams=(3,)) == ngram_counts("ab c", ngrams=(3,)) == {" ab": 1, "ab ": 1, "b c": 1, " c ": 1}
+
+
+def test_matches_paraphrases_with_cosine_scores():
+    index = NgramIndex(TEXTS)
+    assert index.search("it keeps recursing forever", k=1)[0][0] == 2
+    assert index.search("I keep referring to myself", k=1)[0][0] == 0
+    best, score = index.search(TEXTS[1], k=1)[0]
+    assert best == 1 and math.isclose(score, 1.0)
+    assert index.search("zzzz qqqq") == []
+
+
+def test_batch_and_approximate_agree_with_single_queries():
+    queries = ["recursing forever", "the goals and the limits", "A depends on B depends on A"]
+    exact = NgramIndex(TEXTS, approximate=False)
+    for batched, single in zip(exact.search_batch(queries, k=2), [exact.search(q, k=2) for q in queries]):
+        assert [doc for doc, _ in batched] == [doc for doc, _ in single]
+        assert all(math.isclose(a, b) for (_, a), (_, b) in zip(batched, single))
+    approximate = NgramIndex(TEXTS, approximate=True, max_df=0.5)
+    assert [r[0][0] for r in approximate.search_batch(queries, k=1)] == [2, 3, 1]
+
+
+def test_strategy_library_similarity_search():
+    index = StrategyIndex(check_interval=None)
+    assert index.search_similar("it keeps recursing without getting anywhere")[0].contradiction_type == \
+        "Infinite recursion without progress"
+    results = index.search_similar_batch(["A depends on B and B depends on A", "the question answers itself"], k=1)
+    assert [r[0].contradiction_type for r in results] == ["Circular paradox", "Circular question/answer"]
@@ -0,0 +1,97 @@
+import time
+
+from plugin_engine import LatencyHistogram, PluginEngine
+from plugin_registry import PluginRegistry
+
+PLUGINS = {
+    "quiet": "def handle(prompt):\n    return None\n",
+    "loud": "def handle(prompt):\n    return 'loud' if 'x' in prompt else None\n",
+    "broken": "def handle(prompt):\n    raise ValueError('bad input')\n",
+    "sleepy": "import threading, time\nrelease = threading.Event()\n"
+              "def handle(prompt):\n    release.wait(10)\n    return 'sleepy'\n",
+    "hang": "import time\ndef handle(prompt):\n    if prompt == 'hang':\n        time.sleep(30)\n"
+            "    return 'seen' if 'x' in prompt else None\n",
+}
+
+
+def make_registry(tmp_path):
+    for name, body in PLUGINS.items():
+        (tmp_path / f"{name}.py").write_text(body)
+    return PluginRegistry(tmp_path)
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram(bounds=(0.001, 0.01, 0.1))
+    for seconds in [0.0005] * 90 + [0.005] * 9 + [2.0]:
+        histogram.record(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["buckets"] == [[0.001, 90], [0.01, 99], [0.1, 99], ["+Inf", 100]]
+    assert (snapshot["p50"], snapshot["p95"], snapshot["max"]) == (0.001, 0.01, 2.0)
+
+
+def test_ordered_chain_short_circuits_and_counts(tmp_path):
+    engine = PluginEngine(make_registry(tmp_path), chain=["quiet", "broken", "loud", "sleepy"])
+    try:
+        result = engine.run("x marks the spot")
+        assert result.detected.plugin == "loud"
+        assert [(o.plugin, o.status) for o in result.outcomes] == [("quiet", "ok"), ("broken", "error"),
+                                                                   ("loud", "ok")]
+        assert result.to_dict()["message"] == "loud"
+        metrics = engine.metrics()
+        assert "sleepy" not in metrics
+        assert metrics["broken"]["errors"] == 1 and metrics["loud"]["detections"] == 1
+        assert metrics["quiet"]["latency"]["count"] == 1
+    finally:
+        engine.close()
+
+
+def test_hanging_plugin_is_bounded(tmp_path):
+    registry = make_registry(tmp_path)
+    engine = PluginEngine(registry, chain=["sleepy", "loud"], deadline=0.05, max_overdue=2)
+    try:
+        statuses = []
+        for _ in range(4):
+            start = time.perf_counter()
+            result = engine.run("x")
+            assert time.perf_counter() - start < 1
+            assert result.detected.plugin == "loud"
+            statuses.append(result.outcomes[0].status)
+        assert statuses == ["timeout", "timeout", "skipped", "skipped"]
+        assert engine.metrics()["sleepy"]["overdue"] == 2
+
+        registry.modules["sleepy"].release.set()
+        time.sleep(0.1)
+        assert engine.metrics()["sleepy"]["overdue"] == 0
+        assert engine.run("x").detected.plugin == "sleepy"
+    finally:
+        engine.close()
+
+
+def test_fanout_returns_first_detection(tmp_path):
+    registry = make_registry(tmp_path)
+    engine = PluginEngine(registry, chain=["sleepy", "quiet", "loud"], mode="fanout", deadline=5)
+    try:
+        start = time.perf_counter()
+        result = engine.run("x")
+        assert time.perf_counter() - start < 1
+        assert result.detected.plugin == "loud"
+        assert "sleepy" not in [o.plugin for o in result.outcomes]
+    finally:
+        registry.modules["sleepy"].release.set()
+        engine.close()
+
+
+def test_isolated_plugin_is_killed_on_deadline(tmp_path):
+    engine = PluginEngine(make_registry(tmp_path), chain=["hang"], isolated=["hang"],
+                          deadline=0.3, process_workers=1)
+    try:
+        assert engine.run("x").detected.plugin == "hang"
+        start = time.perf_counter()
+        assert engine.run("hang").outcomes[0].status == "timeout"
+        assert time.perf_counter() - start < 2
+        # The hung worker was replaced
+        assert engine.run("x").detected.report["message"] == "seen"
+        assert engine.metrics()["hang"]["timeouts"] == 1
+    finally:
+        engine.close()
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import threading
+
+from plugin_registry import PluginRegistry
+
+
+def write_plugin(path, body, bump=0):
+    path.write_text(body)
+    # Make sure the change is visible even on coarse-mtime filesystems
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_manifest_and_lazy_import(tmp_path):
+    write_plugin(tmp_path / "alpha.py", "import sys\nsys.modules['__alpha_imported__'] = True\n"
+                                        "def run(prompt):\n    return 'alpha:' + prompt\n")
+    write_plugin(tmp_path / "beta.py", "def register_plugin():\n    return lambda p: 'beta:' + p\n")
+    write_plugin(tmp_path / "broken.py", "raise RuntimeError('nope')\n")
+    (tmp_path / "manifest.json").write_text(json.dumps({"plugins": [
+        {"name": "alpha", "entrypoint": "alpha:run", "capabilities": ["screen"]}]}))
+
+    registry = PluginRegistry(tmp_path)
+    assert sorted(registry) == ["alpha", "beta", "broken"]
+    assert registry.names("screen") == ["alpha"]
+    assert "alpha" in registry and registry.loaded() == []
+    assert "__alpha_imported__" not in sys.modules
+
+    assert registry["alpha"]("x") == "alpha:x"
+    assert registry["beta"]("y") == "beta:y"
+    assert registry.modules["alpha"].run("z") == "alpha:z"
+    assert registry.get("broken") is None and registry.get("missing") is None
+    assert sorted(registry.loaded()) == ["alpha", "beta"]
+    sys.modules.pop("__alpha_imported__", None)
+
+
+def test_hot_swap_keeps_in_flight_calls(tmp_path):
+    plugin = tmp_path / "slow.py"
+    write_plugin(plugin, "import threading\nrelease = threading.Event()\n"
+                         "def handle(prompt):\n    release.wait(5)\n    return 'v1'\n")
+    registry = PluginRegistry(tmp_path)
+    old_module = registry.modules["slow"]
+    generation = registry.generation
+
+    results = []
+    caller = threading.Thread(target=lambda: results.append(registry["slow"]("p")))
+    caller.start()
+
+    # Touching without changing content does not reload
+    write_plugin(plugin, plugin.read_text(), bump=1)
+    assert registry.refresh() == []
+
+    write_plugin(plugin, "def handle(prompt):\n    return 'v2'\n", bump=2)
+    assert registry.refresh() == ["slow"]
+    assert registry["slow"]("p") == "v2"
+    assert registry.generation != generation
+
+    old_module.release.set()
+    caller.join()
+    assert results == ["v1"]
+
+    # A broken edit keeps the working version
+    write_plugin(plugin, "def handle(prompt) syntax error\n", bump=3)
+    assert registry.refresh() == []
+    assert registry["slow"]("p") == "v2"
+
+
+def test_picks_up_new_and_removed_plugins(tmp_path):
+    registry = PluginRegistry(tmp_path)
+    assert len(registry) == 0
+    write_plugin(tmp_path / "gamma.py", "def handle(prompt):\n    return None\n")
+    registry.refresh()
+    assert list(registry) == ["gamma"] and registry["gamma"]("p") is None
+    (tmp_path / "gamma.py").unlink()
+    registry.refresh()
+    assert "gamma" not in registry and registry.loaded() == []
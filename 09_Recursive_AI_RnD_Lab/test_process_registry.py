@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+from process_registry import ProcessRegistry
+
+
+def test_samples_registered_processes():
+    registry = ProcessRegistry()
+    registry.register(os.getpid(), "server")
+    busy = bytearray(32 * 1024 * 1024)
+    registry.sample()
+    sum(range(300000))
+    (info,) = registry.sample()
+    assert info.kind == "server"
+    assert info.rss_mb >= 32 and info.peak_rss_mb >= info.rss_mb
+    assert info.cpu_time > 0 and info.num_threads >= 1
+    del busy
+
+
+def test_attributes_processes_to_jobs():
+    registry = ProcessRegistry()
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        with registry.job_scope("job-1"):
+            registry.register(child.pid, "sandbox", label="AI_Main.py")
+        registry.register(12345678, "training", job_id="job-2")
+        registry.sample()  # pid 12345678 does not exist and is dropped
+        assert [p["pid"] for p in registry.processes(job_id="job-1")] == [child.pid]
+        assert registry.job_usage("job-1")["active"] == 1
+        assert registry.processes(kind="training") == []
+    finally:
+        child.kill()
+        child.wait()
+
+    registry.unregister(child.pid, usage={"cpu_time": 1.5, "peak_rss_mb": 20.0})
+    usage = registry.job_usage("job-1")
+    assert usage["processes"] == 1 and usage["active"] == 0
+    assert usage["cpu_time"] == 1.5 and usage["peak_rss_mb"] == 20.0
+    assert registry.job_usage("unknown") is None
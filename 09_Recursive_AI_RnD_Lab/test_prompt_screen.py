@@ -0,0 +1,110 @@
+import os
+import time
+
+from plugin_engine import PluginEngine
+from plugin_registry import PluginRegistry
+from prompt_screen import BatchScreener, batch_items, ndjson_records, load_chain, screen
+
+PROMPTS = [
+    "This statement is false",
+    {"id": "calm", "prompt": "Summarize the training log"},
+    {"id": "empty", "prompt": ""},
+    42,
+    "this sentence is true",
+]
+
+
+def test_parses_ndjson_and_array_items():
+    lines = [b'"first"\n', b"\n", b'{"id": "x", "prompt": "second"}\n', b"{not json\n", b'{"prompt": "fourth"}']
+    items = list(batch_items(ndjson_records(lines)))
+    assert items[0] == (0, "first", None)
+    assert items[1] == ("x", "second", None)
+    assert items[2][0] == 2 and items[2][1] is None and items[2][2].startswith("Invalid JSON")
+    assert items[3] == (3, "fourth", None)
+
+    items = list(batch_items(PROMPTS))
+    assert [item[0] for item in items] == [0, "calm", "empty", 3, 4]
+    assert [item[2] is None for item in items] == [True, True, False, False, True]
+
+
+def test_results_stream_in_order_with_ids():
+    screener = BatchScreener(workers=2, chunk_size=2, max_pending=1, processes=False)
+    try:
+        results = list(screener.screen(batch_items(PROMPTS * 5)))
+    finally:
+        screener.close()
+    assert [r["id"] for r in results] == [item[0] for item in batch_items(PROMPTS * 5)]
+    first = results[:5]
+    assert first[0]["paradox_detected"] and first[0]["plugin"] == "handle_paradox"
+    assert first[0]["category"] == "self_reference"
+    assert not first[1]["paradox_detected"]
+    assert first[2] == {"id": "empty", "error": "No prompt provided"}
+    assert "error" in first[3]
+    assert first[4]["category"] == "liar_pattern"
+
+
+def test_process_pool_matches_in_process_screening():
+    prompts = [f"step {i}: this statement is false" if i % 3 == 0 else f"step {i}: all good" for i in range(50)]
+    chain = load_chain(["handle_paradox"])
+    expected = [{"id": i, **screen(chain, p)} for i, p in enumerate(prompts)]
+
+    screener = BatchScreener(workers=2, chunk_size=8)
+    try:
+        chunks = list(screener.screen_chunks(batch_items(prompts)))
+    finally:
+        screener.close()
+    assert [len(c) for c in chunks] == [8] * 6 + [2]
+    assert [r for c in chunks for r in c] == expected
+
+
+def test_pool_follows_registry_reloads(tmp_path):
+    plugin = tmp_path / "marker.py"
+    plugin.write_text("def handle(prompt):\n    return 'v1' if 'x' in prompt else None\n")
+    registry = PluginRegistry(tmp_path)
+    screener = BatchScreener(chain=["marker"], workers=1, chunk_size=1, registry=registry)
+    try:
+        assert [r["message"] for r in screener.screen(batch_items(["x", "y"]))] == ["v1", None]
+        plugin.write_text("def handle(prompt):\n    return 'v2'\n")
+        os.utime(plugin, ns=(0, plugin.stat().st_mtime_ns + 10 ** 9))
+        assert registry.refresh() == ["marker"]
+        assert [r["message"] for r in screener.screen(batch_items(["x", "y"]))] == ["v2", "v2"]
+    finally:
+        screener.close()
+
+
+def test_overrunning_chunk_is_rescreened_through_the_engine(tmp_path):
+    (tmp_path / "hang.py").write_text("import time\ndef handle(prompt):\n    if prompt == 'hang':\n"
+                                      "        time.sleep(30)\n    return 'seen' if 'x' in prompt else None\n")
+    registry = PluginRegistry(tmp_path)
+    engine = PluginEngine(registry, chain=["hang"], deadline=0.2, isolated=["hang"], process_workers=1)
+    screener = BatchScreener(chain=["hang"], workers=2, chunk_size=2, registry=registry,
+                             deadline=0.5, engine=engine)
+    try:
+        start = time.perf_counter()
+        results = list(screener.screen(batch_items(["x", "hang", "y", "x", "xx", "z"])))
+        assert time.perf_counter() - start < 10
+        assert [r["id"] for r in results] == list(range(6))
+        assert [r["message"] for r in results] == ["seen", None, None, "seen", "seen", None]
+        assert results[1]["plugins"][0]["status"] == "timeout"
+
+        metrics = engine.metrics()["hang"]
+        assert metrics["timeouts"] == 1
+        # The chunks the pool finished are counted too, not just the re-screened one
+        assert metrics["calls"] == 6 and metrics["detections"] == 3
+        assert metrics["latency"]["count"] >= 5
+    finally:
+        screener.close()
+        engine.close()
+
+
+def test_workers_are_fresh_interpreters(tmp_path):
+    (tmp_path / "origin.py").write_text("import sys\ndef handle(prompt):\n"
+                                        "    return sys.modules['__main__'].__file__\n")
+    screener = BatchScreener(chain=["origin"], plugin_dir=tmp_path, workers=1, deadline=5)
+    try:
+        results = list(screener.screen(batch_items(["a", "b"])))
+    finally:
+        screener.close()
+    # Workers run the screening module, not a forked copy of this (multithreaded) process
+    assert [r["plugin"] for r in results] == ["origin", "origin"]
+    assert results[0]["message"].endswith("prompt_screen.py")
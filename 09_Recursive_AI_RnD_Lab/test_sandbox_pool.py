@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import subprocess
+
+import pytest
+
+from sandbox_pool import SandboxPool, SandboxPoolError, ResourceLimits, run_limited, _MessageReader
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=1, max_runs=3)
+    yield pool
+    pool.close()
+
+
+def _script(tmp_path, body, name="AI_Main.py"):
+    path = tmp_path / name
+    path.write_text(body)
+    return str(path)
+
+
+def test_runs_script_as_main_in_cwd(pool, tmp_path):
+    script = _script(tmp_path, "import os, json\nif __name__ == '__main__':\n"
+                               "    print(json.dumps({'cwd': os.getcwd()}))\n")
+    result = pool.run(script, cwd=str(tmp_path))
+    assert result.returncode == 0
+    assert json.loads(result.stdout) == {"cwd": str(tmp_path)}
+
+
+def test_reports_failures(pool, tmp_path):
+    result = pool.run(_script(tmp_path, "raise ValueError('boom')\n"), cwd=str(tmp_path))
+    assert result.returncode == 1
+    assert "ValueError: boom" in result.stderr
+
+    result = pool.run(_script(tmp_path, "import sys\nsys.exit(3)\n"), cwd=str(tmp_path))
+    assert result.returncode == 3
+
+
+def test_timeout_kills_child(pool, tmp_path):
+    with pytest.raises(subprocess.TimeoutExpired):
+        pool.run(_script(tmp_path, "import time\ntime.sleep(30)\n"), cwd=str(tmp_path), timeout=0.5)
+    assert pool.run(_script(tmp_path, "print('ok')\n", "next.py"), cwd=str(tmp_path)).stdout == "ok\n"
+
+
+def test_workers_recycled_after_max_runs(pool, tmp_path):
+    script = _script(tmp_path, "import os\nprint(os.getppid())\n")
+    parents = [pool.run(script, cwd=str(tmp_path)).stdout for _ in range(4)]
+    assert len(set(parents[:3])) == 1
+    assert parents[3] != parents[0]
+    assert pool.stats["workers_recycled"] == 1
+
+
+def test_worker_replaced_after_crash(pool, tmp_path):
+    script = _script(tmp_path, "import os, signal\nos.kill(os.getppid(), signal.SIGKILL)\n")
+    with pytest.raises(SandboxPoolError):
+        pool.run(script, cwd=str(tmp_path), timeout=2)
+    assert pool.run(_script(tmp_path, "print('alive')\n", "next.py"), cwd=str(tmp_path)).stdout == "alive\n"
+
+
+LIMITS = ResourceLimits(address_space_mb=512, cpu_seconds=1, output_bytes=4096, nice=0)
+
+
+@pytest.mark.parametrize("runner", ["pool", "cold"])
+def test_usage_reported(pool, tmp_path, runner):
+    script = _script(tmp_path, "data = bytearray(64 * 1024 * 1024)\nprint('x' * 100)\n")
+    if runner == "pool":
+        result = pool.run(script, cwd=str(tmp_path), limits=LIMITS)
+    else:
+        result = run_limited([sys.executable, script], cwd=str(tmp_path), limits=LIMITS)
+    assert result.returncode == 0
+    assert result.usage["peak_rss_mb"] >= 64
+    assert result.usage["output_bytes"] == 101
+    assert not result.usage["output_truncated"]
+    assert result.usage["wall_time"] >= result.usage["cpu_time"] - 0.05
+    assert set(result.usage) >= {"cpu_user", "cpu_system"}
+
+
+@pytest.mark.parametrize("runner", ["pool", "cold"])
+def test_limits_enforced(pool, tmp_path, runner):
+    def run(body, name):
+        script = _script(tmp_path, body, name)
+        if runner == "pool":
+            return pool.run(script, cwd=str(tmp_path), timeout=10, limits=LIMITS)
+        return run_limited([sys.executable, script], cwd=str(tmp_path), timeout=10, limits=LIMITS)
+
+    result = run("data = bytearray(1024 * 1024 * 1024)\n", "memory.py")
+    assert result.returncode != 0
+    assert "MemoryError" in result.stderr
+
+    result = run("while True:\n    pass\n", "spin.py")
+    assert result.returncode != 0
+    assert result.usage["cpu_time"] >= 0.9
+    assert result.usage["wall_time"] < 5
+
+    result = run("import sys\nsys.stdout.write('x' * 100000)\n", "chatty.py")
+    assert len(result.stdout) <= 4096
+    assert result.usage["output_truncated"]
+
+
+def test_reader_returns_messages_that_arrived_in_one_write():
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, b'{"started": 1}\n{"returncode": 0}\n{"part')
+        reader = _MessageReader(read_fd)
+        start = time.monotonic()
+        assert reader.read(5) == {"started": 1}
+        assert reader.read(5) == {"returncode": 0}
+        assert time.monotonic() - start < 1
+        assert reader.read(0.1) is None  # an incomplete message waits for its newline
+        os.write(write_fd, b'": 2}\n')
+        assert reader.read(5) == {"part": 2}
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
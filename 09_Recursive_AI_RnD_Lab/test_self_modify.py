@@ -0,0 +1,158 @@
+import json
+import hashlib
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+
+import self_modify
+from model_client import ModelClient
+from self_modify import CandidateResult, SelfModifyingAI, default_candidate_score
+
+STATUS_CODE = "import json\nprint(json.dumps({'status': 'ok'}))\n"
+PLAIN_CODE = "print('plain output')\n"
+FAILING_CODE = "raise SystemExit(1)\n"
+
+
+class ScriptedClient(ModelClient):
+    """Answers each prompt with the next scripted code block."""
+
+    def __init__(self, codes):
+        self.codes = list(codes)
+        self.lock = threading.Lock()
+
+    def generate(self, prompt):
+        with self.lock:
+            code = self.codes.pop(0)
+        return f"```python\n{code}```"
+
+
+@pytest.fixture
+def ai(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"eval_cache_enabled": False, "sandbox_pool_size": 0,
+                                  "benchmark_enabled": False, "loop_monitor_enabled": False}))
+    system = SelfModifyingAI(main_script=str(tmp_path / "AI_Main.py"), backup_dir=str(tmp_path / "backups"),
+                             config_file=str(config))
+    system.fallback_client = None
+    return system
+
+
+def candidate(index, code, success=True, result=None, runtime=0.0):
+    return CandidateResult(index=index, code=code, code_hash=str(hash(code)), valid=True,
+                           success=success, result=result or {}, runtime=runtime)
+
+
+def test_default_score_prefers_structured_fast_runs():
+    structured = candidate(0, "a", result={"status": "ok"})
+    plain = candidate(1, "b", result={"stdout": "ok"})
+    slow = candidate(2, "c", result={"status": "ok"}, runtime=15.0)
+    noisy = candidate(3, "d", result={"stdout": "ok", "stderr": "warning"})
+    scores = [default_candidate_score(c) for c in (structured, plain, slow, noisy)]
+    assert scores == sorted(scores, reverse=True)
+    assert default_candidate_score(candidate(4, "e", success=False)) == float("-inf")
+    assert default_candidate_score(CandidateResult(index=5, code="", code_hash="", valid=False)) == float("-inf")
+
+
+def test_tournament_promotes_best_candidate(ai):
+    ai.model_client = ScriptedClient([PLAIN_CODE, FAILING_CODE, STATUS_CODE, "def broken(:\n"])
+    success, message = ai.self_modify_tournament(4)
+
+    assert success, message
+    assert ai.get_current_code().strip() == STATUS_CODE.strip()
+    assert ai.version == 2
+    valid = {c.code.strip(): c for c in ai.last_tournament if c.valid}
+    assert set(valid) == {PLAIN_CODE.strip(), FAILING_CODE.strip(), STATUS_CODE.strip()}
+    assert valid[FAILING_CODE.strip()].score == float("-inf")
+
+
+def test_tournament_skips_current_code_and_failures(ai):
+    current = ai.get_current_code()
+    ai.model_client = ScriptedClient([current, FAILING_CODE])
+    success, message = ai.self_modify_tournament(2)
+
+    assert not success and "No viable candidate" in message
+    assert ai.get_current_code() == current and ai.version == 1
+
+
+def test_benchmark_rejection_falls_through_to_next_candidate(ai, monkeypatch):
+    best, runner_up = candidate(0, STATUS_CODE, result={"status": "ok"}), candidate(1, PLAIN_CODE)
+    monkeypatch.setattr(ai, "_check_performance",
+                        lambda code: (code != STATUS_CODE, "latency regressed", None))
+    success, message = ai.promote_best([best, runner_up])
+
+    assert success and "candidate 1" in message
+    assert ai.get_current_code() == PLAIN_CODE
+
+    monkeypatch.setattr(ai, "_check_performance", lambda code: (False, "latency regressed", None))
+    success, message = ai.promote_best([candidate(0, STATUS_CODE, result={"status": "ok"})])
+    assert not success and message.startswith("All candidates regressed")
+
+
+def test_eval_cache_skips_infrastructure_failures_and_counts_once(tmp_path, monkeypatch):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"sandbox_pool_size": 0, "benchmark_enabled": False}))
+    system = SelfModifyingAI(main_script=str(tmp_path / "AI_Main.py"), backup_dir=str(tmp_path / "backups"),
+                             config_file=str(config))
+    cache, code_hash = system.eval_cache, hashlib.md5(PLAIN_CODE.encode()).hexdigest()
+
+    def broken_spawn(*args, **kwargs):
+        raise OSError("fork failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(self_modify, "run_limited", broken_spawn)
+        assert system._validate_python_code(PLAIN_CODE)
+        assert not system.evaluate_candidate(0, PLAIN_CODE).success
+    assert cache.get(code_hash, executed_only=True, count=False) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # One counted lookup per candidate, however many stages consult the cache
+    assert system._validate_python_code(PLAIN_CODE)
+    assert system.evaluate_candidate(1, PLAIN_CODE).success
+    assert system._validate_python_code(PLAIN_CODE)
+    assert system.evaluate_candidate(2, PLAIN_CODE).cached
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_version_survives_restart_without_benchmarks(ai, tmp_path):
+    ai.model_client = ScriptedClient([PLAIN_CODE])
+    assert ai.self_modify(1)[0]
+    assert ai.version == 2 and ai.version_store.get(2).strip() == PLAIN_CODE.strip()
+
+    restarted = SelfModifyingAI(main_script=ai.main_script, backup_dir=str(ai.backup_dir),
+                                config_file=ai.config_file)
+    assert restarted.version == 2
+    restarted.backup_current_version()
+    assert len(restarted.version_store) == 2
+
+
+def test_candidates_of_a_stale_parent_are_not_promoted(ai):
+    parent_hash = hashlib.md5(ai.get_current_code().encode()).hexdigest()
+    assert ai.promote_best([candidate(0, PLAIN_CODE)], parent_hash=parent_hash)[0]
+
+    # A second job that started from the same parent must not overwrite that promotion
+    success, message = ai.promote_best([candidate(0, STATUS_CODE, result={"status": "ok"})],
+                                       parent_hash=parent_hash)
+    assert not success and message.startswith("Stale parent")
+    assert ai.get_current_code() == PLAIN_CODE and ai.version == 2
+
+
+def test_loop_monitor_compares_candidates_against_their_parent(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"eval_cache_enabled": False, "sandbox_pool_size": 0, "benchmark_enabled": False}))
+    main_script = tmp_path / "AI_Main.py"
+    functions = [f"def function_{i}(values):\n    return min(sum(values), {i})\n" for i in range(60)]
+    main_script.write_text("\n".join(functions))
+    system = SelfModifyingAI(main_script=str(main_script), backup_dir=str(tmp_path / "backups"),
+                             config_file=str(config))
+    system.fallback_client = None
+
+    edits = []
+    for i in (3, 17, 31, 45):
+        edited = list(functions)
+        edited[i] = edited[i].replace("min", "max")
+        edits.append("\n".join(edited))
+    system.model_client = ScriptedClient(edits)
+    assert system.self_modify_tournament(4)[0]
+    assert system.loop_monitor.stats()["detections"]["repeated_response"] == 0
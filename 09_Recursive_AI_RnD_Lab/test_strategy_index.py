@@ -0,0 +1,69 @@
+import os
+import json
+
+from strategy_index import StrategyIndex, tokenize
+
+ENTRIES = [
+    {"contradiction_type": "Self-referential loop", "strategy": "Remove the self-reference.",
+     "example_usage": "I cannot decide because I am undecided.", "source_reference": "test"},
+    {"contradiction_type": "Circular paradox", "strategy": "Fix one side of the dependency.",
+     "example_usage": "X depends on Y, but Y depends on X.", "source_reference": "test"},
+    {"contradiction_type": "Contradictory goal and limitation", "strategy": "Rank the goals.",
+     "example_usage": "Maximize speed while never using more memory.", "source_reference": "test"},
+]
+
+
+def write_library(path, entries, bump=0):
+    path.write_text(json.dumps(entries))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_tokenize_folds_case_plurals_and_stopwords():
+    assert tokenize("The Loops are Self-Referential; policies!") == ["loop", "self", "referential", "policy"]
+
+
+def test_ranks_by_field_weighted_bm25(tmp_path):
+    library = tmp_path / "library.json"
+    write_library(library, ENTRIES)
+    index = StrategyIndex(library, check_interval=None)
+    assert len(index) == 3
+
+    results = index.search("Self-referential contradiction, halting to prevent an infinite loop", k=2)
+    assert results[0].contradiction_type == "Self-referential loop"
+    assert [r.contradiction_type for r in index.search("A depends on B which depends on A")] == ["Circular paradox"]
+    assert index.search("the goals conflict")[0].contradiction_type == "Contradictory goal and limitation"
+    assert index.search("zebra") == []
+
+
+def test_reloads_incrementally(tmp_path):
+    library = tmp_path / "library.json"
+    write_library(library, ENTRIES)
+    index = StrategyIndex(library, check_interval=0)
+    kept = dict(index._keys)
+
+    added = {"contradiction_type": "Negation conflict", "strategy": "Isolate the negated parts.",
+             "example_usage": "If A then not B.", "source_reference": "test"}
+    write_library(library, ENTRIES[1:] + [added], bump=1)
+    assert index.search("negation")[0].contradiction_type == "Negation conflict"
+    assert index.search("self referential") == []
+    # Unchanged entries keep their ids and postings
+    assert {key: doc_id for key, doc_id in index._keys.items() if key in kept} == \
+        {key: doc_id for key, doc_id in kept.items() if key in index._keys}
+    assert len(index) == 3
+
+    # A broken file keeps the previous index
+    library.write_text("[{")
+    os.utime(library, ns=(0, library.stat().st_mtime_ns + 2_000_000_000))
+    assert index.search("negation")[0].contradiction_type == "Negation conflict"
+
+
+def test_entries_without_text_are_skipped(tmp_path):
+    library = tmp_path / "library.json"
+    write_library(library, [{"contradiction_type": "", "strategy": "", "example_usage": ""}])
+    index = StrategyIndex(library, check_interval=0)
+    assert len(index) == 0 and index.search("loop") == []
+
+    write_library(library, [{"contradiction_type": "", "strategy": "The"}] + ENTRIES, bump=1)
+    assert index.search("self referential")[0].contradiction_type == "Self-referential loop"
+    assert len(index) == 3
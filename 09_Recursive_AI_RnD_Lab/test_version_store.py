@@ -0,0 +1,99 @@
+from version_store import VersionStore
+
+
+def _object_count(store):
+    return sum(1 for p in store.objects_dir.rglob("*") if p.is_file())
+
+
+def test_put_get_and_dedup(tmp_path):
+    store = VersionStore(tmp_path, "AI_Main")
+    store.put(1, "print('a')\n")
+    store.put(2, "print('b')\n", parent=1)
+    store.put(3, "print('a')\n", parent=2)
+
+    assert store.get(1) == store.get(3) == "print('a')\n"
+    assert store.get(2) == "print('b')\n"
+    assert store.record(3).parent == 2
+    assert store.latest_version() == 3
+    assert _object_count(store) == 2
+
+    generation = store.generation
+    store.set_metadata(3, "benchmark", {"median": 0.1})
+    assert store.generation > generation
+
+
+def test_index_survives_reopen(tmp_path):
+    store = VersionStore(tmp_path, "AI_Main")
+    for version in range(1, 6):
+        store.put(version, f"print({version})\n", parent=version - 1 or None)
+    store.drop(2)
+
+    reopened = VersionStore(tmp_path, "AI_Main")
+    assert [r.version for r in reopened.history()] == [5, 4, 3, 1]
+    assert reopened.get(4) == "print(4)\n"
+    assert 2 not in reopened
+    assert reopened.latest_version() == 5
+
+
+def test_prune_keeps_shared_blobs(tmp_path):
+    store = VersionStore(tmp_path, "AI_Main")
+    store.put(1, "same\n")
+    store.put(2, "other\n")
+    store.put(3, "same\n")
+
+    assert store.prune(1) == [1, 2]
+    assert store.get(3) == "same\n"
+    assert _object_count(store) == 1
+
+
+def test_imports_legacy_backups(tmp_path):
+    (tmp_path / "AI_Main_v1.py").write_text("v1\n")
+    (tmp_path / "AI_Main_v2.py").write_text("v2\n")
+    (tmp_path / "AI_Main_v10.py").write_text("v10\n")
+    # Stray copies matching the glob are skipped
+    (tmp_path / "AI_Main_v2_old.py").write_text("old\n")
+    (tmp_path / "AI_Main_vbak.py").write_text("bak\n")
+
+    store = VersionStore(tmp_path, "AI_Main")
+    assert store.get(2) == "v2\n"
+    assert store.record(2).parent == 1
+    assert store.record(10).parent == 2
+    assert store.latest_version() == 10
+    assert len(store) == 3
+
+
+def _evolve(n_versions, lines=200):
+    code = [f"value_{i} = {i}\n" for i in range(lines)]
+    for version in range(1, n_versions + 1):
+        code[(version * 7) % lines] = f"value_{version} = {version * 3}\n"
+        yield version, "".join(code)
+
+
+def test_deltas_bounded_by_snapshot_interval(tmp_path):
+    store = VersionStore(tmp_path, "AI_Main", snapshot_interval=5)
+    expected = {}
+    for version, code in _evolve(23):
+        store.put(version, code, parent=version - 1 or None)
+        expected[version] = code
+
+    depths = [store.record(v).depth for v in sorted(expected)]
+    assert max(depths) == 4
+    assert depths.count(0) == 5
+
+    reopened = VersionStore(tmp_path, "AI_Main", snapshot_interval=5)
+    assert all(reopened.get(v) == code for v, code in expected.items())
+
+
+def test_prune_keeps_delta_bases_until_unused(tmp_path):
+    store = VersionStore(tmp_path, "AI_Main", snapshot_interval=10)
+    expected = {}
+    for version, code in _evolve(15):
+        store.put(version, code, parent=version - 1 or None)
+        expected[version] = code
+
+    store.prune(3)
+    reopened = VersionStore(tmp_path, "AI_Main", snapshot_interval=10)
+    assert [r.version for r in reopened.history()] == [15, 14, 13]
+    assert all(reopened.get(v) == expected[v] for v in (13, 14, 15))
+    # Only the chain starting at the snapshot for version 11 is still needed
+    assert _object_count(reopened) == 5
@@ -8,20 +8,17 @@ import subprocess
 import hashlib
 import threading
 import shutil
+import weakref
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 
+from process_registry import default_registry
+from log_pipeline import configure_logging, open_session_log, close_session_log
+
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levellevelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("model_training.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+configure_logging("model_training.log")
 logger = logging.getLogger("model_trainer")
 
 @dataclass
@@ -161,13 +158,24 @@ class ModelTrainer:
         self.logs_dir = os.path.join("training_logs", self.session_id)
         os.makedirs(self.logs_dir, exist_ok=True)
         
-        # Set up file handlers for this specific training session
+        # Tag this session's records and copy them to the session's own log;
+        # the handler is closed by close() or when the trainer is collected
+        self.log = logging.LoggerAdapter(logger, {"session_id": self.session_id})
         self.log_file = os.path.join(self.logs_dir, "training.log")
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        logger.addHandler(file_handler)
+        self._session_log = open_session_log(self.log_file, "session_id", self.session_id, interval=None)
+        self._session_log_finalizer = weakref.finalize(self, close_session_log, self._session_log)
         
-        logger.info(f"Initialized training session {self.session_id} for model '{config.model_name}'")
+        self.log.info(f"Initialized training session {self.session_id} for model '{config.model_name}'")
+    
+    def close(self) -> None:
+        """Close this session's log file."""
+        self._session_log_finalizer()
+    
+    def __enter__(self) -> 'ModelTrainer':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
     
     def _generate_session_id(self) -> str:
         """Generate a unique session ID."""
@@ -186,20 +194,20 @@ class ModelTrainer:
         try:
             # Check if training dataset exists
             if not self.config.training_dataset:
-                logger.error("No training dataset specified")
+                self.log.error("No training dataset specified")
                 self.session.status = "failed"
                 self.session.error_message = "No training dataset specified"
                 return False
             
             if not os.path.exists(self.config.training_dataset):
-                logger.error(f"Training dataset not found: {self.config.training_dataset}")
+                self.log.error(f"Training dataset not found: {self.config.training_dataset}")
                 self.session.status = "failed"
                 self.session.error_message = f"Training dataset not found: {self.config.training_dataset}"
                 return False
             
             # If validation dataset is specified, check if it exists
             if self.config.validation_dataset and not os.path.exists(self.config.validation_dataset):
-                logger.error(f"Validation dataset not found: {self.config.validation_dataset}")
+                self.log.error(f"Validation dataset not found: {self.config.validation_dataset}")
                 self.session.status = "failed"
                 self.session.error_message = f"Validation dataset not found: {self.config.validation_dataset}"
                 return False
@@ -214,25 +222,25 @@ class ModelTrainer:
                         
                     # Basic structure validation for different formats
                     if isinstance(data, list):
-                        logger.info(f"Dataset contains {len(data)} examples")
+                        self.log.info(f"Dataset contains {len(data)} examples")
                     elif isinstance(data, dict) and "data" in data:
-                        logger.info(f"Dataset contains {len(data['data'])} examples")
+                        self.log.info(f"Dataset contains {len(data['data'])} examples")
                     else:
-                        logger.warning("Dataset structure is non-standard, verify compatibility with your model")
+                        self.log.warning("Dataset structure is non-standard, verify compatibility with your model")
                         
                 except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON in dataset: {str(e)}")
+                    self.log.error(f"Invalid JSON in dataset: {str(e)}")
                     self.session.status = "failed"
                     self.session.error_message = f"Invalid JSON in dataset: {str(e)}"
                     return False
             
             # For other formats (like .txt, .csv, etc.), we could add additional validation
             
-            logger.info(f"Successfully validated training data: {self.config.training_dataset}")
+            self.log.info(f"Successfully validated training data: {self.config.training_dataset}")
             return True
             
         except Exception as e:
-            logger.error(f"Error during data preparation: {str(e)}")
+            self.log.error(f"Error during data preparation: {str(e)}")
             self.session.status = "failed"
             self.session.error_message = f"Error during data preparation: {str(e)}"
             return False
@@ -251,13 +259,12 @@ class ModelTrainer:
             
             def process_line(line, is_stderr=False):
                 # Write to appropriate log file
+                # Buffered writes; the files are flushed when closed below
                 if is_stderr:
                     stderr_log.write(line + '\n')
-                    stderr_log.flush()
-                    logger.warning(f"STDERR: {line}")
+                    self.log.warning(f"STDERR: {line}")
                 else:
                     stdout_log.write(line + '\n')
-                    stdout_log.flush()
                     
                     # Try to extract metrics from the output
                     try:
@@ -285,10 +292,10 @@ class ModelTrainer:
                                 learning_rate=lr
                             )
                             self.session.add_metric(metric)
-                            logger.info(f"Recorded metrics: epoch={epoch}, loss={loss}, lr={lr}")
+                            self.log.info(f"Recorded metrics: epoch={epoch}, loss={loss}, lr={lr}")
                     except Exception as e:
                         # Just log the error but don't crash the output handler
-                        logger.debug(f"Failed to extract metrics from line: {str(e)}")
+                        self.log.debug(f"Failed to extract metrics from line: {str(e)}")
             
             # Process stdout
             for line in iter(process.stdout.readline, b''):
@@ -307,7 +314,7 @@ class ModelTrainer:
                     process_line(decoded_line, is_stderr=True)
                     
         except Exception as e:
-            logger.error(f"Error in output handler: {str(e)}")
+            self.log.error(f"Error in output handler: {str(e)}")
         finally:
             # Close log files
             stdout_log.close()
@@ -338,7 +345,7 @@ class ModelTrainer:
                 else:
                     cmd.append(f"--{key}={value}")
             
-            logger.info(f"Starting Ollama training with command: {' '.join(cmd)}")
+            self.log.info(f"Starting Ollama training with command: {' '.join(cmd)}")
             
             # Start the training process
             self.session.status = "running"
@@ -349,6 +356,8 @@ class ModelTrainer:
                 bufsize=1,
                 universal_newlines=False
             )
+            default_registry.register(self.training_process.pid, "training", label=self.config.model_name,
+                                      job_id=self.session_id)
             
             # Start output handler in a separate thread
             self.output_handler_thread = threading.Thread(
@@ -359,6 +368,7 @@ class ModelTrainer:
             
             # Wait for training to complete
             returncode = self.training_process.wait()
+            default_registry.unregister(self.training_process.pid)
             
             # Stop the output handler
             self.stop_output_handler.set()
@@ -373,18 +383,18 @@ class ModelTrainer:
                 # In Ollama, models are stored internally
                 self.session.output_model_path = f"{self.config.model_name}"
                 
-                logger.info(f"Training completed successfully. Model available as '{self.config.model_name}' in Ollama")
+                self.log.info(f"Training completed successfully. Model available as '{self.config.model_name}' in Ollama")
                 return True
             else:
                 self.session.status = "failed"
                 self.session.error_message = f"Training process exited with code {returncode}"
                 self.session.end_time = time.time()
                 
-                logger.error(f"Training failed with exit code {returncode}")
+                self.log.error(f"Training failed with exit code {returncode}")
                 return False
                 
         except Exception as e:
-            logger.error(f"Error in Ollama training: {str(e)}")
+            self.log.error(f"Error in Ollama training: {str(e)}")
             self.session.status = "failed"
             self.session.error_message = f"Error in Ollama training: {str(e)}"
             self.session.end_time = time.time()
@@ -0,0 +1,433 @@
+import os
+import re
+import json
+import time
+import zlib
+import heapq
+import difflib
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger("version_store")
+
+
+@dataclass
+class VersionRecord:
+    """
+    Index entry describing one stored version.
+
+    `hash` identifies the full content. `object` names the stored blob, which
+    is either a full snapshot (`base` is None) or a line delta against the
+    stored entry `base`; `depth` counts the deltas back to the last snapshot.
+    `metadata` holds measurements attached after the fact (e.g. benchmarks).
+    """
+    version: int
+    hash: str
+    parent: Optional[int]
+    timestamp: float
+    size: int
+    id: int = -1
+    object: str = ""
+    base: Optional[int] = None
+    depth: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def make_line_delta(old: str, new: str) -> List[List[Any]]:
+    """
+    Compute a line-level delta that turns `old` into `new`.
+
+    Returns:
+        List of [start, end, replacement_lines] edits against the old lines
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [[i1, i2, new_lines[j1:j2]]
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def apply_line_delta(old: str, delta: List[List[Any]]) -> str:
+    """Apply a delta produced by `make_line_delta`."""
+    old_lines = old.splitlines(keepends=True)
+    out: List[str] = []
+    pos = 0
+    for start, end, lines in delta:
+        out.extend(old_lines[pos:start])
+        out.extend(lines)
+        pos = end
+    out.extend(old_lines[pos:])
+    return "".join(out)
+
+
+class VersionStore:
+    """
+    Content-addressed, delta-compressed store for versions of an evolving script.
+
+    Every `snapshot_interval`-th entry in a chain is stored as a full
+    zlib-compressed snapshot; the entries in between are stored as line deltas
+    against their predecessor, so reconstructing any version needs at most
+    `snapshot_interval - 1` delta applications. Blobs are named by their
+    SHA-256, and a version whose content matches an earlier one reuses that
+    entry's blob.
+
+    An append-only index (one JSON record per line) is read once on open and
+    kept in memory, so lookups never touch the directory. Dropped versions are
+    hidden immediately, but their blobs are kept until no remaining delta
+    depends on them.
+    """
+
+    INDEX_FILE = "index.jsonl"
+    OBJECTS_DIR = "objects"
+    CACHE_SIZE = 8
+
+    def __init__(self, root: str, name: str = "AI_Main", snapshot_interval: int = 20):
+        """
+        Open (or create) a version store.
+
+        Args:
+            root: Directory holding the store
+            name: Name of the tracked script, used to import legacy `<name>_vN.py` backups
+            snapshot_interval: Maximum chain length between full snapshots (1 disables deltas)
+        """
+        self.root = Path(root)
+        self.name = name
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.objects_dir = self.root / self.OBJECTS_DIR
+        self.index_path = self.root / self.INDEX_FILE
+        self.objects_dir.mkdir(exist_ok=True, parents=True)
+
+        self._lock = threading.RLock()
+        self._entries: Dict[int, VersionRecord] = {}    # every entry with stored data, by id
+        self._records: Dict[int, VersionRecord] = {}    # visible entries, by version
+        self._dependents: Dict[int, int] = {}           # entry id -> number of deltas based on it
+        self._refcounts: Dict[str, int] = {}            # object name -> number of entries using it
+        self._by_hash: Dict[str, int] = {}              # content hash -> entry id
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        self._next_id = 0
+        self._latest = 0
+        self._index_lines = 0
+        self.generation = 0  # bumped on every index change, for caches built on top of the store
+        self._load_index()
+
+        if not self._records:
+            self._import_legacy_backups()
+
+    # ------------------------------------------------------------------
+    # Index handling
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> None:
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                self._index_lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt index line in {self.index_path}")
+                    continue
+                if entry.get("op") == "drop":
+                    self._hide(entry["id"])
+                    continue
+                if entry.get("op") == "meta":
+                    record = self._entries.get(entry["id"])
+                    if record is not None:
+                        record.metadata[entry["key"]] = entry["value"]
+                    continue
+                record = VersionRecord(**{k: entry[k] for k in VersionRecord.__dataclass_fields__ if k in entry})
+                if record.id < 0:
+                    record.id = self._next_id
+                if not record.object:
+                    record.object = record.hash
+                self._add_entry(record)
+        for entry_id in list(self._entries):
+            self._collect(entry_id)
+
+    def _add_entry(self, record: VersionRecord) -> None:
+        self._entries[record.id] = record
+        self._next_id = max(self._next_id, record.id + 1)
+        self._refcounts[record.object] = self._refcounts.get(record.object, 0) + 1
+        self._by_hash[record.hash] = record.id
+        if record.base is not None:
+            self._dependents[record.base] = self._dependents.get(record.base, 0) + 1
+
+        replaced = self._records.get(record.version)
+        self._records[record.version] = record
+        self._latest = max(self._latest, record.version)
+        if replaced is not None:
+            self._collect(replaced.id)
+
+    def _hide(self, entry_id: int) -> None:
+        record = self._entries.get(entry_id)
+        if record is not None and self._records.get(record.version) is record:
+            del self._records[record.version]
+
+    def _collect(self, entry_id: Optional[int]) -> None:
+        """Delete hidden entries, and their bases, once no delta depends on them."""
+        while entry_id is not None:
+            record = self._entries.get(entry_id)
+            if (record is None or self._records.get(record.version) is record
+                    or self._dependents.get(entry_id, 0) > 0):
+                return
+            del self._entries[entry_id]
+            self._dependents.pop(entry_id, None)
+            self._cache.pop(entry_id, None)
+            if self._by_hash.get(record.hash) == entry_id:
+                del self._by_hash[record.hash]
+            self._refcounts[record.object] -= 1
+            if self._refcounts[record.object] <= 0:
+                del self._refcounts[record.object]
+                self._delete_object(record.object)
+
+            entry_id = record.base
+            if entry_id is not None:
+                self._dependents[entry_id] -= 1
+
+    def _append_index(self, entry: Dict[str, Any]) -> None:
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._index_lines += 1
+        self.generation += 1
+
+    def compact(self) -> None:
+        """Rewrite the index with only the entries that still hold data."""
+        with self._lock:
+            tmp_path = self.index_path.with_suffix(".tmp")
+            lines = 0
+            with open(tmp_path, "w") as f:
+                for entry_id in sorted(self._entries):
+                    record = self._entries[entry_id]
+                    f.write(json.dumps(asdict(record)) + "\n")
+                    lines += 1
+                    if self._records.get(record.version) is not record:
+                        f.write(json.dumps({"op": "drop", "id": entry_id}) + "\n")
+                        lines += 1
+            os.replace(tmp_path, self.index_path)
+            self._index_lines = lines
+
+    # ------------------------------------------------------------------
+    # Blob handling
+    # ------------------------------------------------------------------
+
+    def _object_path(self, name: str) -> Path:
+        return self.objects_dir / name[:2] / name[2:]
+
+    def _write_object(self, data: bytes) -> str:
+        name = hashlib.sha256(data).hexdigest()
+        path = self._object_path(name)
+        if path.exists():
+            return name
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(data))
+        os.replace(tmp_path, path)
+        return name
+
+    def _delete_object(self, name: str) -> None:
+        try:
+            self._object_path(name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _read_object(self, name: str) -> bytes:
+        with open(self._object_path(name), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def _remember_content(self, entry_id: int, text: str) -> None:
+        self._cache[entry_id] = text
+        self._cache.move_to_end(entry_id)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _materialize(self, entry_id: int) -> str:
+        """Rebuild the content of an entry from its snapshot and delta chain."""
+        cached = self._cache.get(entry_id)
+        if cached is not None:
+            self._cache.move_to_end(entry_id)
+            return cached
+
+        chain = []
+        current = self._entries[entry_id]
+        while current.base is not None and current.id not in self._cache:
+            chain.append(current)
+            current = self._entries[current.base]
+        if current.id in self._cache:
+            text = self._cache[current.id]
+        else:
+            text = self._read_object(current.object).decode("utf-8")
+        for record in reversed(chain):
+            text = apply_line_delta(text, json.loads(self._read_object(record.object)))
+
+        self._remember_content(entry_id, text)
+        return text
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def put(self, version: int, code: str, parent: Optional[int] = None) -> VersionRecord:
+        """
+        Store the code for a version, replacing any existing entry for it.
+
+        The code is stored as a delta against the parent (or latest) version
+        unless that chain is already `snapshot_interval` long or the delta
+        would not be smaller than the code itself.
+
+        Args:
+            version: Version number
+            code: Source code of the version
+            parent: Version this one was derived from
+
+        Returns:
+            The new index record
+        """
+        data = code.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            existing = self._records.get(version)
+            if existing is not None and existing.hash == digest:
+                return existing
+
+            record = VersionRecord(version=version, hash=digest, parent=parent,
+                                   timestamp=time.time(), size=len(data), id=self._next_id)
+            same = self._entries.get(self._by_hash.get(digest, -1))
+            if same is not None:
+                logger.info(f"Version {version} matches version {same.version}, reusing stored blob")
+                record.object, record.base, record.depth = same.object, same.base, same.depth
+            else:
+                self._store_content(record, code, data, parent)
+
+            self._append_index(asdict(record))
+            self._add_entry(record)
+            self._remember_content(record.id, code)
+            return record
+
+    def _store_content(self, record: VersionRecord, code: str, data: bytes, parent: Optional[int]) -> None:
+        base = self._records.get(parent) if parent is not None else None
+        if base is None and self._records:
+            base = self._records[max(self._records)]
+        if base is not None and base.depth + 1 < self.snapshot_interval:
+            payload = json.dumps(make_line_delta(self._materialize(base.id), code)).encode("utf-8")
+            if len(payload) < len(data):
+                record.object = self._write_object(payload)
+                record.base = base.id
+                record.depth = base.depth + 1
+                return
+        record.object = self._write_object(data)
+
+    def get(self, version: int) -> Optional[str]:
+        """Return the code for a version, or None if it is not stored."""
+        with self._lock:
+            record = self._records.get(version)
+            if record is None:
+                return None
+            return self._materialize(record.id)
+
+    def record(self, version: int) -> Optional[VersionRecord]:
+        return self._records.get(version)
+
+    def location(self, version: int) -> str:
+        """Return the path of the blob holding a version, or an empty string."""
+        record = self._records.get(version)
+        return str(self._object_path(record.object)) if record else ""
+
+    def __contains__(self, version: int) -> bool:
+        return version in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def latest_version(self) -> int:
+        """Return the highest version number ever stored, or 0 if the store is empty."""
+        return self._latest
+
+    def history(self, limit: Optional[int] = None) -> List[VersionRecord]:
+        """Return index records ordered from newest to oldest."""
+        versions = (heapq.nlargest(limit, self._records) if limit is not None
+                    else sorted(self._records, reverse=True))
+        return [self._records[v] for v in versions]
+
+    def set_metadata(self, version: int, key: str, value: Any) -> bool:
+        """
+        Attach a JSON-serializable value to a stored version.
+
+        Returns:
+            True if the version exists
+        """
+        with self._lock:
+            record = self._records.get(version)
+            if record is None:
+                return False
+            self._append_index({"op": "meta", "id": record.id, "key": key, "value": value})
+            record.metadata[key] = value
+            return True
+
+    def drop(self, version: int) -> bool:
+        """
+        Remove a version from the index; its blob is deleted once nothing depends on it.
+
+        Returns:
+            True if the version existed
+        """
+        with self._lock:
+            record = self._records.get(version)
+            if record is None:
+                return False
+            self._append_index({"op": "drop", "id": record.id})
+            self._hide(record.id)
+            self._collect(record.id)
+            return True
+
+    def prune(self, max_versions: int) -> List[int]:
+        """
+        Drop the oldest versions so that at most `max_versions` remain.
+
+        Returns:
+            Version numbers that were dropped
+        """
+        with self._lock:
+            excess = len(self._records) - max_versions
+            if excess <= 0:
+                return []
+            dropped = heapq.nsmallest(excess, self._records)
+            for version in dropped:
+                self.drop(version)
+            if self._index_lines > 2 * max(len(self._entries), 1) + 100:
+                self.compact()
+            return dropped
+
+    def disk_usage(self) -> int:
+        """Return the number of bytes used by blobs and the index."""
+        total = self.index_path.stat().st_size if self.index_path.exists() else 0
+        return total + sum(p.stat().st_size for p in self.objects_dir.rglob("*") if p.is_file())
+
+    def _import_legacy_backups(self) -> None:
+        """Import `<name>_vN.py` full-copy backups written by earlier releases."""
+        pattern = re.compile(rf"{re.escape(self.name)}_v(\d+)")
+        legacy = []
+        for backup_file in self.root.glob(f"{self.name}_v*.py"):
+            match = pattern.fullmatch(backup_file.stem)
+            if match is None:
+                logger.warning(f"Skipping {backup_file.name}: not a numbered backup")
+                continue
+            legacy.append((int(match.group(1)), backup_file))
+        legacy.sort()
+        previous = None
+        for version, backup_file in legacy:
+            record = self.put(version, backup_file.read_text(), parent=previous)
+            record.timestamp = backup_file.stat().st_mtime
+            previous = version
+        if legacy:
+            self.compact()
+            logger.info(f"Imported {len(legacy)} legacy backups into version store at {self.root}")